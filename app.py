@@ -1,186 +1,192 @@
+import math
+import os
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-from functions import get_mysql_conn
+from busca_meta import PARAMETROS_META, buscar_minimo
+from cache_resultados import cache_padrao, checksum_despesas, chave_cenario
+from functions import carregar_despesas, listar_profissionais
+from instrumentacao import iniciar_rerun, painel_debug
+from migracoes import garantir_schema
+from monte_carlo import ConfigMonteCarlo, Distribuicao, rodar_monte_carlo
+from perfil_execucao import iniciar_perfil, painel_perfil
+from simulacao import (
+    RESOLUCOES,
+    MatrizDespesas,
+    ParametrosSimulacao,
+    ProjecaoIncremental,
+    custos_por_mes,
+    profissionais_do_cadastro,
+    resumo_anual,
+    tabela_salarios,
+)
+from varredura import PARAMETROS_VARREDURA, executar_varredura, mapa_calor
 
 st.set_page_config(page_title="Simulador Clínico", layout="wide")
 st.title("📊 Simulador Financeiro de Clínica")
+medicao_banco = iniciar_rerun("app")  # ?debug=1 liga o painel de acessos ao banco
+perfil = iniciar_perfil("app")  # tempos por etapa; ?profile=1 (cProfile) ou ?profile=amostragem
 
 
-# =========================
-# DB: Despesas
-# =========================
-def carregar_despesas() -> pd.DataFrame:
-    with get_mysql_conn() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM despesas ORDER BY id")
-            return pd.DataFrame(cursor.fetchall())
-
-
-df_despesas = carregar_despesas()
-if df_despesas.empty:
-    df_despesas = pd.DataFrame(columns=["id", "nome", "valor", "mes_inicio", "duracao_meses"])
-
-
-def despesa_ativa_no_mes(row: dict, mes: int) -> bool:
-    inicio = int(row.get("mes_inicio", 1) or 1)
-    dur = row.get("duracao_meses", None)
-
-    # NULL = infinito
-    if dur is None or (isinstance(dur, float) and pd.isna(dur)):
-        return mes >= inicio
-
-    dur = int(dur)
-    fim = inicio + dur - 1
-    return inicio <= mes <= fim
-
+# o resto do rerun roda dentro do perfil: ele é finalizado (perfilador parado,
+# tempos registrados) mesmo se o rerun parar no meio (st.rerun, st.stop, exceção)
+with perfil:
+    # =========================
+    # DB: Despesas
+    # =========================
+    with perfil.etapa("carregar"):
+        garantir_schema()
+        df_despesas = carregar_despesas()
+        if df_despesas.empty:
+            df_despesas = pd.DataFrame(columns=["id", "nome", "valor", "mes_inicio", "duracao_meses"])
+        df_profissionais = listar_profissionais()
 
-def soma_por_nome(df: pd.DataFrame, mes: int, nome_exato: str) -> float:
-    if df is None or df.empty:
-        return 0.0
-    total = 0.0
-    alvo = nome_exato.strip().upper()
-    for _, r in df.iterrows():
-        nome = str(r.get("nome", "")).strip().upper()
-        if nome == alvo and despesa_ativa_no_mes(r, mes):
-            total += float(r.get("valor", 0) or 0)
-    return float(total)
 
+    # acima disso a tabela vira resumo anual e os gráficos são reduzidos
+    LINHAS_TABELA_COMPLETA = 120
+    PONTOS_GRAFICO = 240
 
-def soma_operacional(df: pd.DataFrame, mes: int, nomes_excluir: set[str]) -> float:
-    if df is None or df.empty:
-        return 0.0
-    total = 0.0
-    for _, r in df.iterrows():
-        nome = str(r.get("nome", "")).strip().upper()
-        if nome in nomes_excluir:
-            continue
-        if despesa_ativa_no_mes(r, mes):
-            total += float(r.get("valor", 0) or 0)
-    return float(total)
 
+    def highlight_negatives(val):
+        return "color: red;" if val < 0 else ""
 
-# nomes “financeiros” que queremos acompanhar separadamente
-NOMES_FINANCEIROS = {"PRONAMPE", "BB GIRO 1", "BB GIRO 2", "INVESTIDOR"}
 
-
-def highlight_negatives(val):
-    return "color: red;" if val < 0 else ""
+    def reduzir_para_grafico(serie: pd.DataFrame, coluna_periodo: str, passo: int) -> pd.DataFrame:
+        # agrupa `passo` períodos por ponto: montante do fim do grupo, lucro somado
+        if passo <= 1:
+            return serie
+        grupo = (serie[coluna_periodo] - 1) // passo
+        return serie.groupby(grupo).agg(
+            {coluna_periodo: "last", "Montante de Saúde (R$)": "last", "Lucro (R$)": "sum"}
+        )
 
 
-# =========================
-# SIDEBAR
-# =========================
-with st.sidebar:
-    st.header("🔢 Parâmetros Financeiros")
+    # =========================
+    # SIDEBAR
+    # =========================
+    with st.sidebar:
+        st.header("🔢 Parâmetros Financeiros")
 
-    valor_sessao = st.number_input("Valor de cada sessão (R$)", min_value=1.0, value=300.0)
-    porcent_clinica = (
-        st.number_input("% da sessão para a clínica", min_value=0.0, max_value=100.0, value=60.0) / 100
+        valor_sessao = st.number_input("Valor de cada sessão (R$)", min_value=1.0, value=300.0)
+        porcent_clinica = (
+            st.number_input("% da sessão para a clínica", min_value=0.0, max_value=100.0, value=60.0) / 100
+        )
+        base_imposto = st.selectbox("Imposto incide sobre:", ["Total do faturamento", "Apenas % da clínica"])
+        porcent_imposto = st.number_input("% de imposto", min_value=0.0, max_value=100.0, value=15.0) / 100
+
+        st.markdown("---")
+        st.header("Montante Saúde Inicial")
+        investimento_inicial_saude = st.number_input("Montante Inicial de Saúde Financeira", min_value=0, value=0)
+
+        st.markdown("---")
+        st.header("💸 Investidor")
+        investidor_inicio_mes = st.number_input("Mês de início do pagamento ao investidor", min_value=1, value=8)
+        st.caption("O valor mensal do investidor vem da despesa 'INVESTIDOR' no cadastro de despesas.")
+
+        st.markdown("---")
+        st.header("📅 Início da Clínica")
+        meses_sem_funcionar = st.number_input("Meses de aluguel antes de operar", min_value=0, max_value=60, value=0)
+        clientes_iniciais = st.number_input("Clientes iniciais (mês 1 após início)", min_value=0, value=15)
+
+        st.markdown("---")
+        st.header("👩‍⚕️ Equipe fixa")
+        st.dataframe(
+            df_profissionais[["nome", "sessoes_mes", "valor_sessao"]],
+            column_config={
+                "nome": "Profissional",
+                "sessoes_mes": "Sessões/mês",
+                "valor_sessao": st.column_config.NumberColumn("Valor (R$)", format="%.2f"),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.caption("ℹ️ Sessões, valores, quem ocupa sala, quem entra no teto e a participação no lucro são editados na página Profissionais. Nenhuma psicóloga gera faturamento para a clínica.")
+
+        st.markdown("---")
+        st.header("⚙️ Operacional")
+        dias_uteis = st.number_input("Dias úteis/semana", min_value=1, max_value=7, value=5)
+        semanas = st.number_input("Semanas/mês", min_value=1, max_value=5, value=4)
+        horas_dia = st.number_input("Horas/dia por sala", min_value=1, max_value=24, value=12)
+        num_salas = st.number_input("Nº de salas", min_value=1, value=3)
+
+        st.markdown("---")
+        st.header("📈 Projeção")
+        clientes_crescimento = st.number_input("Clientes adicionais/mês", min_value=0, value=5)
+        horizonte_anos = st.number_input("Horizonte (anos)", min_value=1, max_value=20, value=5)
+        resolucao = st.selectbox("Resolução", list(RESOLUCOES))
+
+        st.markdown("---")
+        st.header("📌 Expansão da Clínica")
+        clientes_por_psicologo = st.number_input("Clientes trazidos por novo psicólogo", min_value=0, value=0)
+        capacidade_psicologo = st.number_input("Capacidade de atendimento por psicólogo (clientes/mês)", min_value=1, value=30)
+
+
+    # =========================
+    # CÁLCULOS INICIAIS
+    # =========================
+    params = ParametrosSimulacao(
+        valor_sessao=valor_sessao,
+        porcent_clinica=porcent_clinica,
+        base_imposto=base_imposto,
+        porcent_imposto=porcent_imposto,
+        investimento_inicial_saude=investimento_inicial_saude,
+        investidor_inicio_mes=investidor_inicio_mes,
+        meses_sem_funcionar=meses_sem_funcionar,
+        clientes_iniciais=clientes_iniciais,
+        profissionais=profissionais_do_cadastro(df_profissionais),
+        dias_uteis=dias_uteis,
+        semanas=semanas,
+        horas_dia=horas_dia,
+        num_salas=num_salas,
+        clientes_crescimento=clientes_crescimento,
+        clientes_por_psicologo=clientes_por_psicologo,
+        capacidade_psicologo=capacidade_psicologo,
+        max_meses=int(horizonte_anos) * 12,
     )
-    base_imposto = st.selectbox("Imposto incide sobre:", ["Total do faturamento", "Apenas % da clínica"])
-    porcent_imposto = st.number_input("% de imposto", min_value=0.0, max_value=100.0, value=15.0) / 100
-
-    st.markdown("---")
-    st.header("Montante Saúde Inicial")
-    investimento_inicial_saude = st.number_input("Montante Inicial de Saúde Financeira", min_value=0, value=0)
-
-    st.markdown("---")
-    st.header("💸 Investidor")
-    investidor_inicio_mes = st.number_input("Mês de início do pagamento ao investidor", min_value=1, value=8)
-    st.caption("O valor mensal do investidor vem da despesa 'INVESTIDOR' no cadastro de despesas.")
-
-    st.markdown("---")
-    st.header("📅 Início da Clínica")
-    meses_sem_funcionar = st.number_input("Meses de aluguel antes de operar", min_value=0, max_value=60, value=0)
-    clientes_iniciais = st.number_input("Clientes iniciais (mês 1 após início)", min_value=0, value=15)
-
-    st.markdown("---")
-    st.header("👩‍⚕️ Psicólogas")
-    opcao_teto = st.selectbox("Sessões consideradas no teto:", ["Nenhuma", "Apenas Luiza", "Luiza e Noelia"])
-    st.caption("ℹ️ Apenas Luiza ocupa salas, e nenhuma psicóloga gera faturamento para a clínica.")
-
-    st.subheader("Luiza")
-    luiza_sessoes = st.number_input("Sessões/mês Luiza", min_value=0, value=100)
-    luiza_valor_sessao = st.number_input("Valor sessão Luiza (R$)", min_value=0.0, value=300.0)
-
-    st.subheader("Noelia")
-    noelia_sessoes = st.number_input("Sessões/mês Noelia", min_value=0, value=150)
-    noelia_valor_sessao = st.number_input("Valor sessão Noelia (R$)", min_value=0.0, value=350.0)
-
-    st.markdown("---")
-    st.header("⚙️ Operacional")
-    dias_uteis = st.number_input("Dias úteis/semana", min_value=1, max_value=7, value=5)
-    semanas = st.number_input("Semanas/mês", min_value=1, max_value=5, value=4)
-    horas_dia = st.number_input("Horas/dia por sala", min_value=1, max_value=24, value=12)
-    num_salas = st.number_input("Nº de salas", min_value=1, value=3)
-
-    st.markdown("---")
-    st.header("📈 Projeção")
-    clientes_crescimento = st.number_input("Clientes adicionais/mês", min_value=0, value=5)
-
-    st.markdown("---")
-    st.header("📌 Expansão da Clínica")
-    clientes_por_psicologo = st.number_input("Clientes trazidos por novo psicólogo", min_value=0, value=0)
-    capacidade_psicologo = st.number_input("Capacidade de atendimento por psicólogo (clientes/mês)", min_value=1, value=30)
-
-
-# =========================
-# CÁLCULOS INICIAIS
-# =========================
-receita_clinica_bruta_por_sessao = valor_sessao * porcent_clinica
-if base_imposto == "Apenas % da clínica":
-    imposto_por_sessao = receita_clinica_bruta_por_sessao * porcent_imposto
-else:
-    imposto_por_sessao = valor_sessao * porcent_imposto
-receita_liquida_por_sessao = receita_clinica_bruta_por_sessao - imposto_por_sessao
-
-tempo_sessao = 1  # horas
-
-total_horas = horas_dia * dias_uteis * semanas * num_salas
-horas_ocupadas_luiza = luiza_sessoes * tempo_sessao
-horas_ocupadas_noelia = noelia_sessoes * tempo_sessao
-
-if opcao_teto == "Apenas Luiza":
-    horas_disponiveis = max(0, total_horas - horas_ocupadas_luiza)
-elif opcao_teto == "Luiza e Noelia":
-    horas_disponiveis = max(0, total_horas - horas_ocupadas_luiza - horas_ocupadas_noelia)
-else:
-    horas_disponiveis = total_horas
-
-sessoes_disponiveis = horas_disponiveis / tempo_sessao
-
-# custo fixo do mês 1 (vindo do banco)
-mes_ref = 1
-custo_operacional_m1 = soma_operacional(df_despesas, mes_ref, NOMES_FINANCEIROS)
-pag_pronampe_m1 = soma_por_nome(df_despesas, mes_ref, "PRONAMPE")
-pag_bb1_m1 = soma_por_nome(df_despesas, mes_ref, "BB GIRO 1")
-pag_bb2_m1 = soma_por_nome(df_despesas, mes_ref, "BB GIRO 2")
-
-pag_invest_db_m1 = soma_por_nome(df_despesas, mes_ref, "INVESTIDOR")
-pag_invest_m1 = pag_invest_db_m1 if mes_ref >= investidor_inicio_mes else 0.0
-
-custo_fixo_m1 = custo_operacional_m1 + pag_pronampe_m1 + pag_bb1_m1 + pag_bb2_m1 + pag_invest_m1
-
-sessoes_minimas = custo_fixo_m1 / receita_liquida_por_sessao if receita_liquida_por_sessao > 0 else 0
-percent_ocupado = (sessoes_minimas / sessoes_disponiveis) * 100 if sessoes_disponiveis > 0 else 0
-clientes_mes = sessoes_minimas / 4 if sessoes_minimas > 0 else 0
-
-faturamento_maximo = sessoes_disponiveis * receita_liquida_por_sessao
-# Lucro máximo aqui é “mês 1” só como referência
-lucro_maximo = faturamento_maximo - custo_fixo_m1
-
-# =========================
-# MÉTRICAS
-# =========================
-st.header("📌 Indicadores Principais")
-
-# ===== Helpers (explicações) =====
-with st.expander("ℹ️ Como esses indicadores são calculados", expanded=False):
-    st.markdown(
-        f"""
+
+    receita_clinica_bruta_por_sessao = params.receita_clinica_bruta_por_sessao
+    imposto_por_sessao = params.imposto_por_sessao
+    receita_liquida_por_sessao = params.receita_liquida_por_sessao
+
+    total_horas = params.total_horas
+    horas_disponiveis = params.horas_disponiveis
+    sessoes_disponiveis = params.sessoes_disponiveis
+
+    with perfil.etapa("agregar"):
+        # máscara (despesa × mês) montada uma vez e reaproveitada no mês 1 e na projeção
+        matriz_despesas = MatrizDespesas(df_despesas, params.max_meses)
+
+        # custo fixo do mês 1 (vindo do banco)
+        custos_m1 = custos_por_mes(matriz_despesas, 1, investidor_inicio_mes)
+    custo_operacional_m1 = float(custos_m1["operacional"][0])
+    pag_pronampe_m1 = float(custos_m1["pronampe"][0])
+    pag_bb1_m1 = float(custos_m1["bb1"][0])
+    pag_bb2_m1 = float(custos_m1["bb2"][0])
+    pag_invest_m1 = float(custos_m1["investidor"][0])
+
+    custo_fixo_m1 = float(custos_m1["custo_fixo"][0])
+
+    sessoes_minimas = custo_fixo_m1 / receita_liquida_por_sessao if receita_liquida_por_sessao > 0 else 0
+    percent_ocupado = (sessoes_minimas / sessoes_disponiveis) * 100 if sessoes_disponiveis > 0 else 0
+    clientes_mes = sessoes_minimas / 4 if sessoes_minimas > 0 else 0
+
+    faturamento_maximo = sessoes_disponiveis * receita_liquida_por_sessao
+    # Lucro máximo aqui é “mês 1” só como referência
+    lucro_maximo = faturamento_maximo - custo_fixo_m1
+
+    # =========================
+    # MÉTRICAS
+    # =========================
+    st.header("📌 Indicadores Principais")
+
+    # ===== Helpers (explicações) =====
+    with st.expander("ℹ️ Como esses indicadores são calculados", expanded=False):
+        st.markdown(
+            f"""
 **1) Receita líquida por sessão (para a clínica)**  
 - Valor da sessão: **R$ {valor_sessao:,.2f}**  
 - % para a clínica: **{porcent_clinica*100:.1f}%** → clínica bruta: **R$ {receita_clinica_bruta_por_sessao:,.2f}**  
@@ -201,283 +207,369 @@ with st.expander("ℹ️ Como esses indicadores são calculados", expanded=False
 
 **4) Sessões disponíveis**  
 - Total de horas/mês: **{total_horas:.0f}h**  
-- Regra de teto: **{opcao_teto}** → horas disponíveis: **{horas_disponiveis:.0f}h**  
+- No teto: **{", ".join(p.nome for p in params.profissionais if p.conta_no_teto) or "Nenhuma"}** ({params.horas_no_teto:.0f}h) → horas disponíveis: **{horas_disponiveis:.0f}h**  
 ➡️ **Sessões disponíveis** = horas disponíveis ÷ duração da sessão (1h)
 """
-    )
-
-# Mini helper inline (pra ficar visível sem abrir o expander)
-st.caption(
-    "💡 *Dica:* o custo fixo é calculado mês a mês a partir do cadastro de despesas (com início e duração). "
-    "Quando um empréstimo acaba, ele sai automaticamente do custo fixo."
-)
-
-# ===== Métricas =====
-col1, col2, col3 = st.columns(3)
-
-col1.metric(
-    "Sessões mínimas (Mês 1)",
-    f"{sessoes_minimas:.0f}",
-    help="Custo fixo do mês 1 ÷ receita líquida por sessão."
-)
-
-col2.metric(
-    "Sessões disponíveis",
-    int(sessoes_disponiveis),
-    help="Capacidade máxima do mês (horas disponíveis ÷ 1h por sessão), considerando o teto escolhido."
-)
-
-col3.metric(
-    "Capacidade ocupada",
-    f"{percent_ocupado:.2f}%",
-    help="(Sessões mínimas ÷ sessões disponíveis) × 100."
-)
-
-col4, col5, col6 = st.columns(3)
-
-col4.metric(
-    "Clientes mínimos/mês",
-    f"{clientes_mes:.0f}",
-    help="Sessões mínimas ÷ 4 (considerando 4 sessões por cliente por mês)."
-)
+        )
 
-col5.metric(
-    "Faturamento MÁX líquido",
-    f"R$ {faturamento_maximo:,.2f}",
-    help="Sessões disponíveis × receita líquida por sessão."
-)
+    # Mini helper inline (pra ficar visível sem abrir o expander)
+    st.caption(
+        "💡 *Dica:* o custo fixo é calculado mês a mês a partir do cadastro de despesas (com início e duração). "
+        "Quando um empréstimo acaba, ele sai automaticamente do custo fixo."
+    )
 
-col6.metric(
-    "Lucro MÁX (ref. Mês 1)",
-    f"R$ {lucro_maximo:,.2f}",
-    help="Faturamento máximo líquido − custo fixo do mês 1 (referência)."
-)
+    # ===== Métricas =====
+    col1, col2, col3 = st.columns(3)
 
+    col1.metric(
+        "Sessões mínimas (Mês 1)",
+        f"{sessoes_minimas:.0f}",
+        help="Custo fixo do mês 1 ÷ receita líquida por sessão."
+    )
 
-# =========================
-# SIMULAÇÃO
-# =========================
-st.header("📊 Projeção de 60 Meses")
+    col2.metric(
+        "Sessões disponíveis",
+        int(sessoes_disponiveis),
+        help="Capacidade máxima do mês (horas disponíveis ÷ 1h por sessão), considerando o teto escolhido."
+    )
 
-data = []
-clientes = 0
-psicologos_dinamicos = []
-lucro_acumulado = 0.0
+    col3.metric(
+        "Capacidade ocupada",
+        f"{percent_ocupado:.2f}%",
+        help="(Sessões mínimas ÷ sessões disponíveis) × 100."
+    )
 
+    col4, col5, col6 = st.columns(3)
 
-# acumulados (controle)
-pag_pronampe_acum = 0.0
-pag_bb1_acum = 0.0
-pag_bb2_acum = 0.0
-pag_invest_acum = 0.0
+    col4.metric(
+        "Clientes mínimos/mês",
+        f"{clientes_mes:.0f}",
+        help="Sessões mínimas ÷ 4 (considerando 4 sessões por cliente por mês)."
+    )
 
-max_meses = 60
+    col5.metric(
+        "Faturamento MÁX líquido",
+        f"R$ {faturamento_maximo:,.2f}",
+        help="Sessões disponíveis × receita líquida por sessão."
+    )
 
-for mes in range(1, max_meses + 1):
-    # custo fixo / pagamentos (sempre calculados via banco)
-    custo_operacional = soma_operacional(df_despesas, mes, NOMES_FINANCEIROS)
+    col6.metric(
+        "Lucro MÁX (ref. Mês 1)",
+        f"R$ {lucro_maximo:,.2f}",
+        help="Faturamento máximo líquido − custo fixo do mês 1 (referência)."
+    )
 
-    pag_pronampe_mes = soma_por_nome(df_despesas, mes, "PRONAMPE")
-    pag_bb1_mes = soma_por_nome(df_despesas, mes, "BB GIRO 1")
-    pag_bb2_mes = soma_por_nome(df_despesas, mes, "BB GIRO 2")
 
-    pag_invest_db = soma_por_nome(df_despesas, mes, "INVESTIDOR")
-    pag_invest_mes = pag_invest_db if mes >= investidor_inicio_mes else 0.0
+    # =========================
+    # SIMULAÇÃO
+    # =========================
+    st.header(f"📊 Projeção de {horizonte_anos} {'ano' if horizonte_anos == 1 else 'anos'} ({resolucao.lower()})")
+
+    coluna_periodo = "Semana" if resolucao == "Semanal" else "Mês"
+    n_periodos = params.max_meses * (params.semanas if resolucao == "Semanal" else 1)
+    tabela_completa = n_periodos <= LINHAS_TABELA_COMPLETA
+
+    # uma por sessão: reprojeta só a partir do primeiro mês afetado pelo que mudou
+    # desde a última projeção (ex.: investidor_inicio_mes ou uma despesa que começa
+    # no mês 40); trocar só o montante inicial não reprojeta nenhum mês
+    if "projecao_incremental" not in st.session_state:
+        st.session_state["projecao_incremental"] = ProjecaoIncremental()
+    projecao_incremental = st.session_state["projecao_incremental"]
+
+
+    def consumir_projecao():
+        # a projeção chega em blocos; de cada um guardamos só o necessário:
+        # a tabela (completa ou anual), a série compacta para análises/gráficos,
+        # o lucro mensal para os salários e a última linha para o resumo
+        partes_tabela, partes_serie, partes_lucro_mensal = [], [], []
+        for bloco in projecao_incremental.em_blocos(params, matriz_despesas, resolucao=resolucao):
+            partes_tabela.append(bloco if tabela_completa else resumo_anual(bloco))
+            partes_serie.append(bloco[[coluna_periodo, "Mês", "Montante de Saúde (R$)", "Lucro (R$)"]])
+            partes_lucro_mensal.append(bloco.groupby("Mês", as_index=False)["Lucro (R$)"].sum())
+        return {
+            "tabela": pd.concat(partes_tabela, ignore_index=True),
+            "serie": pd.concat(partes_serie, ignore_index=True),
+            "lucro_mensal": pd.concat(partes_lucro_mensal, ignore_index=True),
+            # iloc[-1] junta colunas int e float numa Series float: o resumo formata com :.0f
+            "ultima_linha": bloco.iloc[-1],
+        }
 
-    custo_fixo = custo_operacional + pag_pronampe_mes + pag_bb1_mes + pag_bb2_mes + pag_invest_mes
 
-    # meses sem operar
-    if mes <= meses_sem_funcionar:
-        faturamento = 0.0
-        lucro = -custo_fixo
-        sessoes_mes = 0
-        salas_utilizadas = 0
-        total_psicologos = 0
-        clientes_mes_loop = 0
-    else:
-        # clínica em operação
-        if mes == meses_sem_funcionar + 1:
-            clientes = clientes_iniciais
+    # cenário já visto (nesta ou em outra sessão) sai do cache sem reprojetar
+    cache = cache_padrao()
+    chave_projecao = chave_cenario(params, checksum_despesas(df_despesas), resolucao=resolucao, tabela_completa=tabela_completa)
+    with perfil.etapa("simular"):
+        projecao = cache.obter_ou_calcular(chave_projecao, consumir_projecao)
+    df_tabela, serie, ultima_linha = projecao["tabela"], projecao["serie"], projecao["ultima_linha"]
+    colunas_moeda = [c for c in df_tabela.columns if c.endswith("(R$)")]
+
+
+    # =========================
+    # TABELA
+    # =========================
+    with perfil.etapa("formatar"):
+        if tabela_completa:
+            st.dataframe(
+                df_tabela.style.format({col: "R$ {:,.2f}" for col in colunas_moeda}).applymap(
+                    highlight_negatives, subset=["Lucro (R$)", "Montante de Saúde (R$)"]
+                ),
+                use_container_width=True,
+            )
         else:
-            clientes += clientes_crescimento
-
-        # expansão por psicólogos (mesma lógica sua)
-        capacidade_total = len(psicologos_dinamicos) * capacidade_psicologo * 4
-        if clientes * 4 > capacidade_total:
-            novos_psicologos = ((clientes * 4 - capacidade_total) // (capacidade_psicologo * 4)) + 1
-            for _ in range(novos_psicologos):
-                psicologos_dinamicos.append("Novo")
-                if mes == meses_sem_funcionar + 1:
-                    clientes += clientes_por_psicologo
-
-        total_psicologos = 1 + len(psicologos_dinamicos)  # Luiza + dinâmicos
-        clientes_mes_loop = clientes
-
-        # teto de salas
-        horas_ocupadas_luiza = luiza_sessoes * tempo_sessao
-        horas_ocupadas_noelia = noelia_sessoes * tempo_sessao
-
-        if opcao_teto == "Apenas Luiza":
-            horas_disp = max(0, total_horas - horas_ocupadas_luiza)
-        elif opcao_teto == "Luiza e Noelia":
-            horas_disp = max(0, total_horas - horas_ocupadas_luiza - horas_ocupadas_noelia)
+            st.caption(
+                f"{n_periodos:,} períodos: a tabela mostra o resumo por ano "
+                "(fluxos somados no ano; clientes, salas e acumulados no fim do ano)."
+            )
+            st.dataframe(
+                df_tabela,
+                column_config={col: st.column_config.NumberColumn(col, format="R$ %.2f") for col in colunas_moeda},
+                hide_index=True,
+                use_container_width=True,
+            )
+
+
+    # =========================
+    # ANÁLISES
+    # =========================
+    st.header("📍 Análises de Investimento")
+    montante = serie["Montante de Saúde (R$)"].to_numpy()
+    periodos_montante_positivo = int((montante >= 0).sum())
+    montante_quitacao = st.number_input("Valor Breakeven", min_value=0, value=250000)
+    atingiu_quitacao = montante >= montante_quitacao
+    mes_quitacao = int(serie["Mês"].iloc[atingiu_quitacao.argmax()]) if atingiu_quitacao.any() else None
+
+    col1, col2 = st.columns(2)
+    rotulo_periodos = "Semanas" if resolucao == "Semanal" else "Meses"
+    col1.metric(f"{rotulo_periodos} com saldo positivo", f"{periodos_montante_positivo}")
+    col2.metric(f"Quitação R${montante_quitacao}", f"Mês {mes_quitacao}" if mes_quitacao else "Não atingido")
+
+    # ===== Busca de meta =====
+    st.subheader("🎯 Busca de Meta")
+    cm1, cm2, cm3 = st.columns(3)
+    meta_montante = cm1.number_input("Meta de Montante de Saúde (R$)", min_value=0, value=200000, step=10000)
+    mes_meta = cm2.number_input("Atingir até o mês", min_value=1, max_value=params.max_meses, value=min(36, params.max_meses))
+    parametros_meta = cm3.multiselect(
+        "Resolver para",
+        list(PARAMETROS_META),
+        default=list(PARAMETROS_META),
+        format_func=lambda p: PARAMETROS_META[p][0],
+    )
+    st.caption("Cada valor é o mínimo necessário variando só aquele parâmetro (os demais ficam como na barra lateral).")
+
+    cols_meta = st.columns(max(len(parametros_meta), 1))
+    for col_meta, nome_param in zip(cols_meta, parametros_meta):
+        rotulo, inteiro = PARAMETROS_META[nome_param]
+        with perfil.etapa("busca_meta"):
+            minimo_meta = buscar_minimo(params, matriz_despesas, nome_param, alvo=meta_montante, mes_limite=mes_meta)
+        if minimo_meta is None:
+            texto_meta = "Inatingível"
+        elif inteiro:
+            texto_meta = f"{minimo_meta}"
         else:
-            horas_disp = total_horas
-
-        sessoes_disp = horas_disp / tempo_sessao
-        sessoes_mes = min(clientes * 4, sessoes_disp)
+            texto_meta = f"R$ {minimo_meta:,.2f}"
+        col_meta.metric(
+            f"{rotulo} mínimo",
+            texto_meta,
+            delta=None if minimo_meta is None else f"atual: {getattr(params, nome_param):g}",
+            delta_color="off",
+        )
 
-        faturamento = sessoes_mes * receita_liquida_por_sessao
-        lucro = faturamento - custo_fixo
 
-        salas_utilizadas = min(
-            num_salas,
-            int((horas_ocupadas_luiza + sessoes_mes) / (horas_dia * dias_uteis * semanas)) + 1,
+    # =========================
+    # GRÁFICOS
+    # =========================
+    with perfil.etapa("graficos"):
+        passo_grafico = math.ceil(n_periodos / PONTOS_GRAFICO)
+        serie_grafico = reduzir_para_grafico(serie, coluna_periodo, passo_grafico)
+
+        st.subheader("📈 Evolução do Montante de Saúde")
+        fig_montante = go.Figure()
+        fig_montante.add_trace(
+            go.Scatter(
+                x=serie_grafico[coluna_periodo],
+                y=serie_grafico["Montante de Saúde (R$)"],
+                mode="lines+markers" if len(serie_grafico) <= 120 else "lines",
+            )
+        )
+        fig_montante.add_hline(
+            y=meta_montante,
+            line=dict(color="red", dash="dash"),
+            annotation_text=f"Meta: R${meta_montante:,.0f}".replace(",", "."),
+            annotation_position="top right",
+        )
+        fig_montante.update_layout(
+            title="Montante de Saúde", xaxis_title=coluna_periodo, yaxis_title="R$", template="plotly_white"
+        )
+        st.plotly_chart(fig_montante, use_container_width=True)
+
+        titulo_lucro = "Lucro Mensal" if resolucao == "Mensal" else "Lucro Semanal"
+        if passo_grafico > 1:
+            titulo_lucro = f"Lucro a cada {passo_grafico} {rotulo_periodos.lower()}"
+        st.subheader(f"📉 {titulo_lucro}")
+        fig_lucro = px.bar(serie_grafico, x=coluna_periodo, y="Lucro (R$)", title=titulo_lucro, color_discrete_sequence=["green"])
+        fig_lucro.add_hline(y=0, line_dash="dash", line_color="black")
+        fig_lucro.update_layout(template="plotly_white")
+        st.plotly_chart(fig_lucro, use_container_width=True)
+
+
+    # =========================
+    # MONTE CARLO
+    # =========================
+    st.header("🎲 Projeção Monte Carlo")
+    with st.expander("Cenários aleatórios (crescimento, churn, no-show e valor da sessão)", expanded=False):
+        mc1, mc2, mc3 = st.columns(3)
+        n_cenarios = mc1.number_input("Nº de cenários", min_value=100, max_value=500_000, value=10_000, step=1_000)
+        mes_limite_mc = mc2.number_input("Mês limite para o breakeven", min_value=1, max_value=params.max_meses, value=min(36, params.max_meses))
+        semente_mc = mc3.number_input("Semente", min_value=0, value=42)
+
+        mc4, mc5, mc6 = st.columns(3)
+        churn_medio = mc4.number_input("Churn médio (% dos clientes/mês)", min_value=0.0, max_value=100.0, value=3.0) / 100
+        no_show_medio = mc5.number_input("No-show médio (% das sessões)", min_value=0.0, max_value=100.0, value=5.0) / 100
+        desvio_valor_sessao = mc6.number_input("Desvio do valor da sessão (R$)", min_value=0.0, value=30.0)
+        st.caption(
+            "Clientes novos/mês ~ Poisson(clientes adicionais/mês); churn e no-show ~ Normal(média, média/2); "
+            "valor da sessão ~ Normal(valor, desvio). Cada cenário sorteia seus próprios valores."
         )
 
-    # acumulados
-    pag_pronampe_acum += pag_pronampe_mes
-    pag_bb1_acum += pag_bb1_mes
-    pag_bb2_acum += pag_bb2_mes
-    pag_invest_acum += pag_invest_mes
-
-    lucro_acumulado += lucro
-    montante_saude = investimento_inicial_saude + lucro_acumulado
-
-    data.append(
-        {
-            "Mês": mes,
-            "Clientes": clientes_mes_loop,
-            "Psicólogos": total_psicologos,
-            "Salas Usadas": salas_utilizadas,
-            "Sessões": sessoes_mes,
-            "Custo Operacional (R$)": round(custo_operacional, 2),
-            "Pagamento Investidor (mês) (R$)": round(pag_invest_mes, 2),
-            "Pagamento PRONAMPE (mês) (R$)": round(pag_pronampe_mes, 2),
-            "Pagamento BB Giro 1 (mês) (R$)": round(pag_bb1_mes, 2),
-            "Pagamento BB Giro 2 (mês) (R$)": round(pag_bb2_mes, 2),
-            "Custo Fixo Total (R$)": round(custo_fixo, 2),
-            "Faturamento (R$)": round(faturamento, 2),
-            "Lucro (R$)": round(lucro, 2),
-            "Montante de Saúde (R$)": round(montante_saude, 2),
-            "Investidor (acum) (R$)": round(pag_invest_acum, 2),
-            "PRONAMPE (acum) (R$)": round(pag_pronampe_acum, 2),
-            "BB Giro 1 (acum) (R$)": round(pag_bb1_acum, 2),
-            "BB Giro 2 (acum) (R$)": round(pag_bb2_acum, 2),
-        }
-    )
-
-df = pd.DataFrame(data)
-
-
-# =========================
-# TABELA
-# =========================
-st.dataframe(
-    df.style.format(
-        {
-            "Custo Operacional (R$)": "R$ {:,.2f}",
-            "Pagamento Investidor (mês) (R$)": "R$ {:,.2f}",
-            "Pagamento PRONAMPE (mês) (R$)": "R$ {:,.2f}",
-            "Pagamento BB Giro 1 (mês) (R$)": "R$ {:,.2f}",
-            "Pagamento BB Giro 2 (mês) (R$)": "R$ {:,.2f}",
-            "Custo Fixo Total (R$)": "R$ {:,.2f}",
-            "Faturamento (R$)": "R$ {:,.2f}",
-            "Lucro (R$)": "R$ {:,.2f}",
-            "Montante de Saúde (R$)": "R$ {:,.2f}",
-            "Investidor (acum) (R$)": "R$ {:,.2f}",
-            "PRONAMPE (acum) (R$)": "R$ {:,.2f}",
-            "BB Giro 1 (acum) (R$)": "R$ {:,.2f}",
-            "BB Giro 2 (acum) (R$)": "R$ {:,.2f}",
+        if st.checkbox("Rodar Monte Carlo"):
+            config_mc = ConfigMonteCarlo(
+                n_cenarios=int(n_cenarios),
+                crescimento=Distribuicao("poisson", valor=clientes_crescimento, minimo=0),
+                churn=Distribuicao("normal", valor=churn_medio, desvio=churn_medio / 2, minimo=0.0, maximo=1.0),
+                no_show=Distribuicao("normal", valor=no_show_medio, desvio=no_show_medio / 2, minimo=0.0, maximo=1.0),
+                valor_sessao=Distribuicao("normal", valor=valor_sessao, desvio=desvio_valor_sessao, minimo=0.0),
+                semente=int(semente_mc),
+                processos=1 if n_cenarios <= 50_000 else (os.cpu_count() or 1),
+            )
+            resultado_mc = rodar_monte_carlo(params, matriz_despesas, config_mc)
+            faixas = resultado_mc.percentis()
+
+            prob_quitacao = resultado_mc.prob_atingir_ate(montante_quitacao, mes_limite_mc)
+            col_mc1, col_mc2 = st.columns(2)
+            col_mc1.metric(
+                f"Prob. de atingir R${montante_quitacao:,.0f} até o mês {mes_limite_mc}",
+                f"{prob_quitacao * 100:.1f}%",
+            )
+            col_mc2.metric(f"Montante mediano no mês {params.max_meses}", f"R$ {faixas['P50'].iloc[-1]:,.2f}")
+
+            fig_mc = go.Figure()
+            for baixo, alto, cor in [("P5", "P95", "rgba(243,179,56,0.20)"), ("P25", "P75", "rgba(243,179,56,0.45)")]:
+                fig_mc.add_trace(go.Scatter(x=faixas["Mês"], y=faixas[alto], mode="lines", line=dict(width=0), showlegend=False))
+                fig_mc.add_trace(
+                    go.Scatter(x=faixas["Mês"], y=faixas[baixo], mode="lines", line=dict(width=0), fill="tonexty", fillcolor=cor, name=f"{baixo}–{alto}")
+                )
+            fig_mc.add_trace(go.Scatter(x=faixas["Mês"], y=faixas["P50"], mode="lines", line=dict(color="#506867"), name="Mediana"))
+            fig_mc.add_hline(y=montante_quitacao, line=dict(color="red", dash="dash"), annotation_text="Breakeven")
+            fig_mc.update_layout(title="Montante de Saúde — faixas de percentis", xaxis_title="Mês", yaxis_title="R$", template="plotly_white")
+            st.plotly_chart(fig_mc, use_container_width=True)
+
+
+    # =========================
+    # VARREDURA DE PARÂMETROS
+    # =========================
+    st.header("🧮 Varredura de Parâmetros")
+    with st.expander("Avaliar uma grade de combinações e ver o resultado em mapa de calor", expanded=False):
+        st.caption("Os parâmetros fora dos eixos ficam com os valores da barra lateral.")
+        opcoes_varredura = list(PARAMETROS_VARREDURA)
+        faixas_varredura = {}
+        for eixo, padrao in [("X", "valor_sessao"), ("Y", "clientes_crescimento")]:
+            cv1, cv2, cv3, cv4 = st.columns([2, 1, 1, 1])
+            nome_param = cv1.selectbox(
+                f"Eixo {eixo}",
+                opcoes_varredura,
+                index=opcoes_varredura.index(padrao),
+                format_func=PARAMETROS_VARREDURA.get,
+                key=f"varredura_param_{eixo}",
+            )
+            atual = float(getattr(params, nome_param))
+            v_min = cv2.number_input("Mínimo", value=atual * 0.5, key=f"varredura_min_{eixo}")
+            v_max = cv3.number_input("Máximo", value=max(atual * 1.5, atual + 1), key=f"varredura_max_{eixo}")
+            n_pontos = cv4.number_input("Pontos", min_value=2, max_value=1_000, value=25, key=f"varredura_n_{eixo}")
+            faixas_varredura[nome_param] = np.linspace(v_min, v_max, int(n_pontos))
+
+        metricas_varredura = {
+            "montante_final": f"Montante final (mês {params.max_meses})",
+            "mes_breakeven": "Mês de breakeven",
+            "caixa_minimo": "Caixa mínimo",
         }
-    ).applymap(highlight_negatives, subset=["Lucro (R$)", "Montante de Saúde (R$)"]),
-    use_container_width=True,
-)
-
-
-# =========================
-# ANÁLISES
-# =========================
-st.header("📍 Análises de Investimento")
-meses_montante_positivo = df[df["Montante de Saúde (R$)"] >= 0].shape[0]
-montante_quitacao = st.number_input("Valor Breakeven", min_value=0, value=250000)
-ponto_quitacao = df[df["Montante de Saúde (R$)"] >= montante_quitacao]
-mes_quitacao = int(ponto_quitacao["Mês"].iloc[0]) if not ponto_quitacao.empty else None
-
-col1, col2 = st.columns(2)
-col1.metric("Meses com saldo positivo", f"{meses_montante_positivo}")
-col2.metric(f"Quitação R${montante_quitacao}", f"Mês {mes_quitacao}" if mes_quitacao else "Não atingido")
-
+        metrica = st.selectbox("Métrica", list(metricas_varredura), format_func=metricas_varredura.get)
+
+        if len(faixas_varredura) < 2:
+            st.warning("Escolha parâmetros diferentes para os eixos X e Y.")
+        elif st.checkbox("Rodar varredura"):
+            resultado_varredura = executar_varredura(params, matriz_despesas, faixas_varredura, alvo=montante_quitacao)
+            eixo_x, eixo_y = list(faixas_varredura)
+            tabela_calor = mapa_calor(resultado_varredura, eixo_x, eixo_y, metrica)
+            fig_calor = px.imshow(
+                tabela_calor,
+                origin="lower",
+                aspect="auto",
+                labels=dict(x=PARAMETROS_VARREDURA[eixo_x], y=PARAMETROS_VARREDURA[eixo_y], color=metricas_varredura[metrica]),
+                color_continuous_scale="RdYlGn" if metrica != "mes_breakeven" else "RdYlGn_r",
+            )
+            fig_calor.update_layout(template="plotly_white")
+            st.plotly_chart(fig_calor, use_container_width=True)
+            st.caption(f"{len(resultado_varredura):,} combinações avaliadas. Breakeven = R${montante_quitacao:,.0f}; vazio = não atingido.")
+
+
+    # =========================
+    # SALÁRIOS
+    # =========================
+    st.header("💼 Salários das Psicólogas")
+    with perfil.etapa("salarios"):
+        df_sal = tabela_salarios(params, projecao["lucro_mensal"])
+        colunas_salario = [c for c in df_sal.columns if c.startswith("Salário ")]
+
+        st.markdown(
+            "  \n".join(
+                f"**💰 Salário Base {p.nome}:** R$ {p.sessoes_mes * p.valor_sessao * (1 - porcent_imposto):,.2f}"
+                f" + {p.participacao_lucro:.0%} do lucro"
+                for p in params.profissionais
+            )
+        )
 
-# =========================
-# GRÁFICOS
-# =========================
-st.subheader("📈 Evolução do Montante de Saúde")
-fig_montante = go.Figure()
-fig_montante.add_trace(
-    go.Scatter(x=df["Mês"], y=df["Montante de Saúde (R$)"], mode="lines+markers")
-)
-fig_montante.add_hline(
-    y=200000,
-    line=dict(color="red", dash="dash"),
-    annotation_text="Meta: R$200.000",
-    annotation_position="top right",
-)
-fig_montante.update_layout(
-    title="Montante de Saúde", xaxis_title="Mês", yaxis_title="R$", template="plotly_white"
-)
-st.plotly_chart(fig_montante, use_container_width=True)
-
-st.subheader("📉 Lucro Mensal")
-fig_lucro = px.bar(df, x="Mês", y="Lucro (R$)", title="Lucro Mensal", color_discrete_sequence=["green"])
-fig_lucro.add_hline(y=0, line_dash="dash", line_color="black")
-fig_lucro.update_layout(template="plotly_white")
-st.plotly_chart(fig_lucro, use_container_width=True)
-
-
-# =========================
-# SALÁRIOS (mantido como estava)
-# =========================
-st.header("💼 Salários das Psicólogas")
-percent_simples = porcent_imposto
-salario_fixo_luiza = luiza_sessoes * luiza_valor_sessao * (1 - percent_simples)
-salario_fixo_noelia = noelia_sessoes * noelia_valor_sessao * (1 - percent_simples)
-
-df_sal = df[["Mês", "Lucro (R$)"]].copy()
-df_sal["Salário Luiza (R$)"] = 0.0
-df_sal["Salário Noelia (R$)"] = 0.0
-
-st.markdown(f"**💰 Salário Base Luiza:** R$ {salario_fixo_luiza:,.2f}")
-st.markdown(f"**💰 Salário Base Noelia:** R$ {salario_fixo_noelia:,.2f}")
-
-for i, row in df_sal.iterrows():
-    lucro = row["Lucro (R$)"]
-    participacao = lucro * 0.5 if lucro > 0 else 0
-    df_sal.at[i, "Salário Luiza (R$)"] = salario_fixo_luiza + participacao
-    df_sal.at[i, "Salário Noelia (R$)"] = salario_fixo_noelia + participacao
-
-st.dataframe(
-    df_sal.style.format(
-        {
-            "Lucro (R$)": "R$ {:,.2f}",
-            "Salário Luiza (R$)": "R$ {:,.2f}",
-            "Salário Noelia (R$)": "R$ {:,.2f}",
-        }
-    ).applymap(highlight_negatives, subset=["Lucro (R$)"]),
-    use_container_width=True,
-)
+        st.dataframe(
+            df_sal.style.format({col: "R$ {:,.2f}" for col in ["Lucro (R$)", *colunas_salario]}).applymap(
+                highlight_negatives, subset=["Lucro (R$)"]
+            ),
+            use_container_width=True,
+        )
 
 
-# =========================
-# RESUMO FINAL
-# =========================
-st.subheader("📋 Resumo do Plano de Expansão")
-st.markdown(
-    f"""
-- Clientes no último mês: **{df['Clientes'].iloc[-1]}**
-- Psicólogos totais: **{df['Psicólogos'].iloc[-1]} (Incluindo Luiza)**
-- Salas utilizadas: **{df['Salas Usadas'].iloc[-1]} / {num_salas}**
+    # =========================
+    # RESUMO FINAL
+    # =========================
+    st.subheader("📋 Resumo do Plano de Expansão")
+    st.markdown(
+        f"""
+- Clientes no último mês: **{ultima_linha['Clientes']:.0f}**
+- Psicólogos totais: **{ultima_linha['Psicólogos']:.0f} (incluindo a equipe em sala)**
+- Salas utilizadas: **{ultima_linha['Salas Usadas']:.0f} / {num_salas}**
 - Crescimento mensal de clientes: **{clientes_crescimento}**
 - Cada novo psicólogo traz **{clientes_por_psicologo}** clientes e atende até **{capacidade_psicologo}**.
 """
-)
+    )
+
+    with st.expander("🗄️ Cache de resultados", expanded=False):
+        stats_cache = cache.estatisticas()
+        cc1, cc2, cc3, cc4 = st.columns(4)
+        cc1.metric("Taxa de acerto", f"{stats_cache['taxa_acerto'] * 100:.0f}%")
+        cc2.metric("Acertos (memória / disco)", f"{stats_cache['hits_memoria']} / {stats_cache['hits_disco']}")
+        cc3.metric("Falhas", stats_cache["misses"])
+        cc4.metric("Disco", f"{stats_cache['itens_disco']} itens · {stats_cache['bytes_disco'] / 1024**2:.1f} MB")
+        recalculo = projecao_incremental.ultimo_recalculo
+        if recalculo is not None:
+            st.caption(
+                f"Última projeção calculada nesta sessão: {recalculo['meses_recalculados']} de {recalculo['meses']} meses "
+                f"reprojetados (a partir do mês {recalculo['desde_mes']}); os anteriores vieram da projeção anterior."
+            )
+        if st.button("Limpar cache"):
+            cache.limpar()
+            st.rerun()
+
+
+    # =========================
+    # DEBUG
+    # =========================
+    painel_debug(medicao_banco)
+    painel_perfil(perfil)
@@ -0,0 +1,282 @@
+"""
+Backends de armazenamento: MySQL (o banco do app) e SQLite local.
+
+As funções de functions.py são o repositório (tarefas, despesas, categorias,
+responsáveis, profissionais) e continuam pegando conexões por
+`get_mysql_conn()`. Aqui fica só o que muda de um banco para o outro:
+
+- como abrir uma conexão (pymysql + SSL, ou sqlite3 no próprio processo);
+- o dialeto: os trechos de SQL que não são comuns aos dois (DDL do id
+  autoincremento, INSERT IGNORE, GROUP_CONCAT, introspecção, lock).
+
+O backend vem da variável de ambiente `banco_backend`: "mysql" (padrão) ou
+"sqlite". No SQLite, `banco_sqlite_arquivo` é o caminho do arquivo; o padrão
+":memory:" é um banco em memória compartilhado pelas conexões do processo,
+que some quando o processo termina.
+"""
+import itertools
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+
+# =========================
+# Dialetos
+# =========================
+class DialetoMySQL:
+    nome = "mysql"
+    pk_auto = "BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY"
+    opcoes_tabela = "ENGINE=InnoDB"
+    insert_ignore = "INSERT IGNORE"
+
+    def inserir_ou_obter_id(self, cursor, tabela: str, coluna: str, valor) -> int:
+        """Insere `valor` na coluna única `coluna` (se ainda não existe) e retorna o id da linha."""
+        # LAST_INSERT_ID(id) faz o lastrowid trazer o id existente quando o valor já está cadastrado
+        cursor.execute(f"""
+            INSERT INTO {tabela} ({coluna}) VALUES (%s)
+            ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+        """, (valor,))
+        return cursor.lastrowid
+
+    def concatenar_ordenado(self, coluna: str, origem: str, separador: str) -> str:
+        """Subconsulta que junta os valores de `coluna` (FROM/WHERE em `origem`) em ordem, com `separador`."""
+        return f"SELECT GROUP_CONCAT({coluna} ORDER BY {coluna} SEPARATOR '{separador}') {origem}"
+
+    def colunas(self, cursor, tabela: str) -> set[str]:
+        cursor.execute(f"SHOW COLUMNS FROM {tabela}")
+        return {c["Field"] for c in cursor.fetchall()}
+
+    def id_autoincremento(self, cursor, tabela: str) -> bool:
+        cursor.execute(f"SHOW COLUMNS FROM {tabela} LIKE 'id'")
+        coluna = cursor.fetchone()
+        return coluna is None or "auto_increment" in (coluna.get("Extra") or "").lower()
+
+    def indices(self, cursor, tabela: str) -> set[str]:
+        cursor.execute(f"SHOW INDEX FROM {tabela}")
+        return {r["Key_name"] for r in cursor.fetchall()}
+
+    def colunas_indice(self, colunas: str) -> str:
+        return colunas
+
+    def obter_lock(self, cursor, nome: str, timeout_s: int) -> bool:
+        cursor.execute("SELECT GET_LOCK(%s, %s) AS ok", (nome, timeout_s))
+        return bool(cursor.fetchone()["ok"])
+
+    def liberar_lock(self, cursor, nome: str) -> None:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (nome,))
+
+
+class DialetoSQLite:
+    nome = "sqlite"
+    # INTEGER PRIMARY KEY é o rowid: autoincrementa sem precisar de AUTOINCREMENT
+    pk_auto = "INTEGER PRIMARY KEY"
+    opcoes_tabela = ""
+    insert_ignore = "INSERT OR IGNORE"
+
+    def __init__(self):
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def inserir_ou_obter_id(self, cursor, tabela: str, coluna: str, valor) -> int:
+        cursor.execute(f"INSERT OR IGNORE INTO {tabela} ({coluna}) VALUES (%s)", (valor,))
+        cursor.execute(f"SELECT id FROM {tabela} WHERE {coluna} = %s", (valor,))
+        return cursor.fetchone()["id"]
+
+    def concatenar_ordenado(self, coluna: str, origem: str, separador: str) -> str:
+        # GROUP_CONCAT do SQLite não tem ORDER BY: ordena numa subconsulta antes de juntar
+        return f"SELECT GROUP_CONCAT(valor, '{separador}') FROM (SELECT {coluna} AS valor {origem} ORDER BY {coluna})"
+
+    def colunas(self, cursor, tabela: str) -> set[str]:
+        cursor.execute(f"PRAGMA table_info({tabela})")
+        return {c["name"] for c in cursor.fetchall()}
+
+    def id_autoincremento(self, cursor, tabela: str) -> bool:
+        return True
+
+    def indices(self, cursor, tabela: str) -> set[str]:
+        cursor.execute(f"PRAGMA index_list({tabela})")
+        return {r["name"] for r in cursor.fetchall()}
+
+    def colunas_indice(self, colunas: str) -> str:
+        # sem prefixo de índice (coluna(191)): o SQLite indexa o TEXT inteiro
+        return re.sub(r"\(\d+\)", "", colunas)
+
+    def obter_lock(self, cursor, nome: str, timeout_s: int) -> bool:
+        # o banco é do processo: basta um lock do processo
+        with self._locks_lock:
+            lock = self._locks.setdefault(nome, threading.Lock())
+        return lock.acquire(timeout=timeout_s)
+
+    def liberar_lock(self, cursor, nome: str) -> None:
+        lock = self._locks.get(nome)
+        if lock is not None and lock.locked():
+            lock.release()
+
+
+# =========================
+# Conexões SQLite
+# =========================
+# tipos que o pymysql devolve e o sqlite3 não conhece
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter("DATETIME", lambda b: datetime.fromisoformat(b.decode()))
+
+# valores que vêm de DataFrames (ids, contagens)
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.bool_, bool)
+
+_MARCADORES = re.compile(r"%%|%s")
+
+
+def _traduzir(sql: str) -> str:
+    # marcadores do pymysql (%s, e %% para um % literal) -> marcadores do sqlite3
+    return _MARCADORES.sub(lambda m: "%" if m.group() == "%%" else "?", sql)
+
+
+class CursorSQLite:
+    """Cursor com a interface do DictCursor do pymysql: `%s` como marcador e linhas como dict."""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def execute(self, sql, params=None):
+        if params is None:
+            self._cursor.execute(sql)
+        else:
+            self._cursor.execute(_traduzir(sql), tuple(params))
+        return self._cursor.rowcount
+
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(_traduzir(sql), [tuple(p) for p in seq_params])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        return None if linha is None else dict(linha)
+
+    def fetchall(self):
+        return [dict(linha) for linha in self._cursor.fetchall()]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexaoSQLite:
+    """Conexão sqlite3 com a interface que o pool e o repositório usam da conexão pymysql."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def cursor(self):
+        return CursorSQLite(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=True):
+        # só falha se a conexão já foi fechada
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self._conn.close()
+
+
+# =========================
+# Backends
+# =========================
+class BackendMySQL:
+    """O banco do app: conexão pymysql com as variáveis host/username/password/port/database."""
+
+    dialeto = DialetoMySQL()
+
+    def __init__(self):
+        import pymysql  # só quem usa o MySQL precisa do driver
+
+        self._pymysql = pymysql
+        self.erros_de_conexao = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+    def conectar(self):
+        return self._pymysql.connect(
+            host=os.getenv("host"),
+            user=os.getenv("username"),
+            password=os.getenv("password"),
+            port=int(os.getenv("port")),
+            database=os.getenv("database"),
+            cursorclass=self._pymysql.cursors.DictCursor,
+            ssl={"ssl": True}  # adapte conforme seu contexto SSL
+        )
+
+
+class BackendSQLite:
+    """
+    SQLite no próprio processo, sem rede. Com `arquivo=":memory:"` o banco é
+    compartilhado pelas conexões do processo e uma conexão fica aberta para ele
+    não sumir quando o pool fecha as ociosas.
+    """
+
+    _contador = itertools.count(1)
+    erros_de_conexao = (sqlite3.ProgrammingError,)
+
+    def __init__(self, arquivo: str = ":memory:"):
+        self.dialeto = DialetoSQLite()
+        self.arquivo = str(arquivo)
+        if self.arquivo == ":memory:":
+            self._alvo, self._uri = f"file:pitch_neuropsi_{os.getpid()}_{next(self._contador)}?mode=memory&cache=shared", True
+            self._guardia = self.conectar()
+        else:
+            self._alvo, self._uri = self.arquivo, False
+            self._guardia = None
+            with closing(self._conectar_sqlite()) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+
+    def _conectar_sqlite(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._alvo,
+            uri=self._uri,
+            timeout=30,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # o pool entrega a conexão para outras threads
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def conectar(self) -> ConexaoSQLite:
+        return ConexaoSQLite(self._conectar_sqlite())
+
+
+BACKENDS = {"mysql": BackendMySQL, "sqlite": BackendSQLite}
+
+
+def backend_da_configuracao():
+    """Backend escolhido por `banco_backend` (e `banco_sqlite_arquivo`, no SQLite)."""
+    nome = os.getenv("banco_backend", "mysql").strip().lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"banco_backend desconhecido: {nome!r} (use {' ou '.join(BACKENDS)})")
+    if nome == "sqlite":
+        return BackendSQLite(os.getenv("banco_sqlite_arquivo", ":memory:"))
+    return BackendMySQL()
@@ -0,0 +1,56 @@
+"""
+Banco local para os benchmarks: o backend SQLite do app (ver
+armazenamento.py) num arquivo temporário, com o schema criado pelas próprias
+migrações. Mede o mesmo SQL e o mesmo pool que o app usa, sem MySQL nem rede.
+"""
+import tempfile
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+import functions
+from armazenamento import BackendSQLite
+from migracoes import garantir_schema
+
+
+class BancoLocal:
+    def __init__(self, diretorio: Path | str | None = None):
+        self._tmp = tempfile.TemporaryDirectory() if diretorio is None else None
+        self.arquivo = Path(diretorio or self._tmp.name) / "benchmark.sqlite3"
+        self.arquivo.unlink(missing_ok=True)
+        self.backend = BackendSQLite(str(self.arquivo))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+    def carregar(self, tabela: str, df: pd.DataFrame) -> None:
+        """Insere as linhas de `df` (colunas = colunas da tabela), substituindo o conteúdo."""
+        colunas = list(df.columns)
+        linhas = [tuple(None if pd.isna(v) else v for v in linha) for linha in df.itertuples(index=False, name=None)]
+        with closing(self.backend.conectar()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {tabela}")
+                cursor.executemany(
+                    f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})",
+                    linhas,
+                )
+            conn.commit()
+
+    def fechar(self) -> None:
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+
+@contextmanager
+def usar_banco_local(banco: BancoLocal):
+    """Dentro do `with`, o app usa o banco local (já migrado); na saída volta ao backend anterior."""
+    anterior = functions.usar_backend(banco.backend)
+    try:
+        garantir_schema()
+        yield banco
+    finally:
+        functions.usar_backend(anterior)
@@ -0,0 +1,77 @@
+"""
+Tabelas sintéticas para os benchmarks: despesas e tarefas com o mesmo
+formato das tabelas do banco, geradas a partir de uma semente (mesma semente,
+mesmos dados).
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from simulacao import NOMES_FINANCEIROS
+
+STATUS_TAREFAS = ["OK", "PENDENTE", "URGENTE"]
+
+
+def gerar_despesas(n: int, max_meses: int = 240, semente: int = 0) -> pd.DataFrame:
+    """
+    `n` despesas com valor, `mes_inicio` e `duracao_meses` aleatórios.
+
+    Cerca de 2% das linhas usam os nomes financeiros (PRONAMPE, BB GIRO...) e o
+    resto se repete entre ~n/20 nomes, como num cadastro real com várias
+    parcelas do mesmo item. Um terço das despesas não tem duração (infinita).
+    """
+    rng = np.random.default_rng(semente)
+    n_nomes = max(10, n // 20)
+    nomes = np.array([f"Despesa {i}" for i in range(n_nomes)] + sorted(NOMES_FINANCEIROS), dtype=object)
+    pesos = np.r_[np.full(n_nomes, 0.98 / n_nomes), np.full(len(NOMES_FINANCEIROS), 0.02 / len(NOMES_FINANCEIROS))]
+
+    duracao = rng.integers(1, 61, size=n).astype(float)
+    duracao[rng.random(n) < 1 / 3] = np.nan
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "nome": rng.choice(nomes, size=n, p=pesos),
+        "valor": np.round(rng.uniform(50, 5000, size=n), 2),
+        "mes_inicio": rng.integers(1, max(2, max_meses // 2) + 1, size=n),
+        "duracao_meses": pd.array(duracao, dtype="Int64"),
+    })
+
+
+def nomes_categorias(n: int) -> list[str]:
+    return [f"Categoria {i}" for i in range(n)]
+
+
+def nomes_responsaveis(n: int) -> list[str]:
+    return [f"Responsável {i:02d}" for i in range(n)]
+
+
+def gerar_tarefas(n: int, n_categorias: int = 12, n_responsaveis: int = 20, semente: int = 0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    `n` tarefas do plano estratégico e as ligações tarefa × responsável.
+
+    Retorna (tarefas, ligacoes); `tarefas` tem as colunas de
+    `plano_estrategico` (responsáveis também no texto "A, B") e `ligacoes`
+    tem (tarefa_id, responsavel_id), com ids de responsável 1..n_responsaveis.
+    """
+    rng = np.random.default_rng(semente)
+    categorias = nomes_categorias(n_categorias)
+    responsaveis = nomes_responsaveis(n_responsaveis)
+
+    hoje = date.today()
+    prazos = [hoje + timedelta(days=int(d)) for d in rng.integers(-90, 365, size=n)]
+    sem_prazo = rng.random(n) < 0.1
+
+    linhas, ligacoes = [], []
+    for i in range(n):
+        tarefa_id = i + 1
+        escolhidos = sorted(rng.choice(n_responsaveis, size=int(rng.integers(1, 4)), replace=False))
+        ligacoes.extend((tarefa_id, int(r) + 1) for r in escolhidos)
+        linhas.append({
+            "id": tarefa_id,
+            "categoria": categorias[int(rng.integers(n_categorias))],
+            "tarefa": f"Tarefa {tarefa_id}",
+            "status": STATUS_TAREFAS[int(rng.choice(3, p=[0.5, 0.35, 0.15]))],
+            "data_limite": None if sem_prazo[i] else prazos[i],
+            "responsaveis": ", ".join(responsaveis[r] for r in escolhidos),
+        })
+    return pd.DataFrame(linhas), pd.DataFrame(ligacoes, columns=["tarefa_id", "responsavel_id"])
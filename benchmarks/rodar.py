@@ -0,0 +1,296 @@
+"""
+Benchmarks da projeção, da agregação de despesas e das leituras do banco.
+
+Roda offline: despesas e tarefas são sintéticas (ver dados_sinteticos.py) e o
+banco é o backend SQLite do app num arquivo temporário (ver banco_local.py). O rerun completo das páginas usa o AppTest do Streamlit e é
+pulado se o Streamlit não estiver instalado.
+
+Cada caso roda uma vez para aquecer e depois `--repeticoes` vezes; guarda a
+mediana e o mínimo, e a comparação usa o mínimo (interferência de outros
+processos só soma tempo, então ele é o mais estável). Os resultados são
+comparados com uma baseline e o script sai com
+código 1 se algum caso ficou mais de `--limite` (fração) E mais de
+`--minimo-ms` mais lento que ela; o mínimo absoluto evita que casos de
+frações de milissegundo reprovem por ruído. Casos que não estão na baseline
+só são informados.
+
+A baseline são tempos absolutos: só vale na máquina (e na carga) em que foi
+medida. A gravada em benchmarks/baseline.json é um exemplo; antes de comparar,
+regrave-a na máquina que vai rodar a comparação, ou use `--referencia REV`,
+que mede a revisão REV do git (numa worktree temporária) no início desta
+mesma execução e compara com ela.
+
+Uso (da raiz do repositório):
+    python -m benchmarks.rodar --referencia HEAD     # mudanças não commitadas x HEAD, medidos agora
+    python -m benchmarks.rodar --salvar-baseline     # grava a baseline desta máquina
+    python -m benchmarks.rodar                       # compara com benchmarks/baseline.json
+    python -m benchmarks.rodar --grupo banco --limite 0.5 --minimo-ms 2
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import functions
+from benchmarks.banco_local import BancoLocal, usar_banco_local
+from benchmarks.dados_sinteticos import gerar_despesas, gerar_tarefas, nomes_categorias, nomes_responsaveis
+from simulacao import (
+    NOMES_FINANCEIROS,
+    MatrizDespesas,
+    ParametrosSimulacao,
+    ProjecaoIncremental,
+    custos_por_mes,
+    projetar_em_blocos,
+)
+
+RAIZ = Path(__file__).resolve().parent.parent
+BASELINE_PADRAO = Path(__file__).resolve().parent / "baseline.json"
+
+HORIZONTES_ANOS = [5, 10, 20]
+TAMANHOS_DESPESAS = [10, 1_000, 10_000, 100_000]
+N_TAREFAS = 10_000
+N_DESPESAS_BANCO = 10_000
+
+
+# =========================
+# Casos
+# =========================
+# cada grupo é um gerador de (nome, função sem argumentos); o que o grupo
+# prepara (ex.: o banco local) vale até o gerador terminar
+def casos_projecao():
+    despesas = gerar_despesas(1_000, max_meses=max(HORIZONTES_ANOS) * 12)
+    for anos in HORIZONTES_ANOS:
+        params = ParametrosSimulacao(max_meses=anos * 12)
+        for resolucao in ("Mensal", "Semanal"):
+            def projetar(params=params, resolucao=resolucao):
+                return pd.concat(list(projetar_em_blocos(params, despesas, resolucao=resolucao)), ignore_index=True)
+
+            yield f"projecao_{anos}a_{resolucao.lower()}", projetar
+
+    # rerun que só muda o fim do horizonte: o investidor passa a entrar no
+    # mês 200 ou 201, então só os últimos ~40 meses são reprojetados
+    params = ParametrosSimulacao(max_meses=max(HORIZONTES_ANOS) * 12)
+    matriz = MatrizDespesas(despesas, params.max_meses)
+    incremental = ProjecaoIncremental()
+    cenarios = itertools.cycle([replace(params, investidor_inicio_mes=200), replace(params, investidor_inicio_mes=201)])
+    yield f"projecao_incremental_{max(HORIZONTES_ANOS)}a_fim", lambda: incremental.projetar(next(cenarios), matriz)
+
+
+def casos_agregacao():
+    max_meses = max(HORIZONTES_ANOS) * 12
+    for n in TAMANHOS_DESPESAS:
+        despesas = gerar_despesas(n, max_meses=max_meses)
+        # operacional de todos os meses (o que a projeção usa)
+        yield f"despesas_operacional_{n}", lambda d=despesas: MatrizDespesas(d, max_meses).soma_operacional(NOMES_FINANCEIROS)
+        # todos os custos da projeção (operacional + financiamentos + investidor)
+        yield f"despesas_custos_{n}", lambda d=despesas: custos_por_mes(d, max_meses, investidor_inicio_mes=8)
+
+
+def casos_banco():
+    tarefas, ligacoes = gerar_tarefas(N_TAREFAS)
+    categoria = nomes_categorias(1)[0]
+    with BancoLocal() as banco, usar_banco_local(banco):
+        banco.carregar("despesas", gerar_despesas(N_DESPESAS_BANCO))
+        banco.carregar("plano_estrategico", tarefas)
+        banco.carregar("categorias_plano_estrategico", pd.DataFrame({"nome": sorted(set(tarefas["categoria"]))}))
+        banco.carregar("responsaveis_plano_estrategico", pd.DataFrame({"nome": nomes_responsaveis(20)}))
+        banco.carregar("tarefa_responsavel", ligacoes)
+
+        # __wrapped__ pula o cache de leituras: mede a consulta + montagem do DataFrame
+        yield "banco_carregar_despesas", functions.carregar_despesas.__wrapped__
+        yield "banco_contar_por_status", functions.contar_tarefas_por_status.__wrapped__
+        yield "banco_progresso_por_categoria", functions.progresso_por_categoria.__wrapped__
+        yield "banco_contar_categoria_pendentes", lambda: functions.contar_tarefas.__wrapped__(categoria, False)
+        yield "banco_pagina_categoria", lambda: functions.listar_tarefas_pagina.__wrapped__(categoria, False, 25, 0)
+        yield "banco_pagina_funda", lambda: functions.listar_tarefas_pagina.__wrapped__(None, True, 25, N_TAREFAS - 100)
+        yield "banco_pendentes_por_responsavel", functions.pendentes_por_responsavel.__wrapped__
+        yield "banco_tarefas_do_responsavel", lambda: functions.listar_tarefas_do_responsavel.__wrapped__(1)
+        # a mesma página vinda do cache de leituras (rerun sem escrita)
+        yield "banco_pagina_categoria_cache", lambda: functions.listar_tarefas_pagina(categoria, False, 25, 0)
+
+
+def casos_pagina():
+    if importlib.util.find_spec("streamlit") is None:
+        print("streamlit não instalado: grupo 'pagina' pulado.")
+        return
+    from streamlit.testing.v1 import AppTest
+
+    tarefas, ligacoes = gerar_tarefas(N_TAREFAS)
+    with tempfile.TemporaryDirectory() as tmp, BancoLocal(tmp) as banco, usar_banco_local(banco):
+        os.environ.setdefault("cache_resultados_dir", str(Path(tmp) / "cache_resultados"))
+        banco.carregar("despesas", gerar_despesas(N_DESPESAS_BANCO))
+        banco.carregar("plano_estrategico", tarefas)
+        banco.carregar("responsaveis_plano_estrategico", pd.DataFrame({"nome": nomes_responsaveis(20)}))
+        banco.carregar("tarefa_responsavel", ligacoes)
+
+        for nome, arquivo in [("pagina_app", "app.py"), ("pagina_plano_estrategico", "pages/plano_estrategico.py")]:
+            teste = AppTest.from_file(str(RAIZ / arquivo), default_timeout=120)
+
+            def rerun(teste=teste, arquivo=arquivo):
+                teste.run()
+                if teste.exception:
+                    raise RuntimeError(f"{arquivo}: {teste.exception[0].message}")
+
+            yield nome, rerun
+
+
+GRUPOS = {
+    "projecao": casos_projecao,
+    "agregacao": casos_agregacao,
+    "banco": casos_banco,
+    "pagina": casos_pagina,
+}
+
+
+# =========================
+# Medição
+# =========================
+def medir(func, repeticoes: int) -> dict:
+    func()  # aquecimento (imports, caches do numpy/pandas)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "min_ms": round(min(tempos), 3),
+        "repeticoes": repeticoes,
+    }
+
+
+def rodar(grupos: list[str], repeticoes: int) -> dict:
+    casos = {}
+    for grupo in grupos:
+        for nome, func in GRUPOS[grupo]():
+            casos[nome] = {"grupo": grupo, **medir(func, repeticoes)}
+            print(f"  {nome:<40} {casos[nome]['mediana_ms']:>10.2f} ms")
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "casos": casos,
+    }
+
+
+# =========================
+# Baseline
+# =========================
+def comparar(resultado: dict, baseline: dict, limite: float, minimo_ms: float = 0.0) -> pd.DataFrame:
+    """
+    Uma linha por caso medido: tempo da baseline, tempo atual, razão e se
+    regrediu (mais de `limite` e mais de `minimo_ms` mais lento).
+    """
+    linhas = []
+    for nome, atual in resultado["casos"].items():
+        base = baseline.get("casos", {}).get(nome)
+        base_ms = base["min_ms"] if base else None
+        razao = atual["min_ms"] / base_ms if base_ms else None
+        linhas.append({
+            "caso": nome,
+            "baseline_ms": base_ms,
+            "atual_ms": atual["min_ms"],
+            "razao": None if razao is None else round(razao, 2),
+            "regrediu": razao is not None and razao > 1 + limite and atual["min_ms"] - base_ms > minimo_ms,
+        })
+    return pd.DataFrame(linhas, columns=["caso", "baseline_ms", "atual_ms", "razao", "regrediu"])
+
+
+def ler_json(caminho: Path) -> dict:
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def gravar_json(dados: dict, caminho: Path) -> None:
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def medir_referencia(revisao: str, grupos: list[str], repeticoes: int) -> dict:
+    """Roda os mesmos grupos na revisão `revisao` do git (worktree temporária) e retorna os resultados."""
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = Path(tmp) / "referencia"
+        subprocess.run(["git", "worktree", "add", "--detach", str(worktree), revisao], cwd=RAIZ, check=True, capture_output=True)
+        try:
+            saida = Path(tmp) / "referencia.json"
+            comando = [sys.executable, "-m", "benchmarks.rodar", "--repeticoes", str(repeticoes), "--saida", str(saida),
+                       "--baseline", str(Path(tmp) / "sem_baseline.json")]
+            for grupo in grupos:
+                comando += ["--grupo", grupo]
+            subprocess.run(comando, cwd=worktree, check=True)
+            return ler_json(saida)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(worktree)], cwd=RAIZ, check=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks offline da projeção, das despesas e do banco.")
+    parser.add_argument("--grupo", action="append", choices=list(GRUPOS), help="grupo a rodar (repetível; padrão: todos)")
+    parser.add_argument("--repeticoes", type=int, default=10, help="execuções medidas por caso (compara o mínimo)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como baseline em vez de comparar")
+    parser.add_argument("--limite", type=float, default=0.25, help="fração mais lenta que a baseline que conta como regressão")
+    parser.add_argument("--minimo-ms", type=float, default=1.0, help="diferença mínima (ms) para um caso contar como regressão")
+    parser.add_argument("--referencia", metavar="REV", help="compara com a revisão REV do git, medida no início desta execução")
+    parser.add_argument("--saida", type=Path, help="também grava os resultados desta execução neste JSON")
+    args = parser.parse_args(argv)
+
+    grupos = args.grupo or list(GRUPOS)
+    referencia = None
+    if args.referencia:
+        if args.salvar_baseline:
+            parser.error("--referencia não combina com --salvar-baseline")
+        print(f"Referência ({args.referencia}):")
+        referencia = medir_referencia(args.referencia, grupos, args.repeticoes)
+        print("\nÁrvore atual:")
+    resultado = rodar(grupos, args.repeticoes)
+    if args.saida:
+        gravar_json(resultado, args.saida)
+
+    if args.salvar_baseline:
+        if args.baseline.exists() and args.grupo:
+            # rodando só alguns grupos, mantém os outros casos da baseline
+            resultado["casos"] = {**ler_json(args.baseline).get("casos", {}), **resultado["casos"]}
+        gravar_json(resultado, args.baseline)
+        print(f"\nBaseline gravada em {args.baseline}")
+        return 0
+
+    if referencia is not None:
+        baseline = referencia
+    elif not args.baseline.exists():
+        print(f"\nSem baseline em {args.baseline}; rode com --salvar-baseline (ou use --referencia).")
+        return 0
+    else:
+        baseline = ler_json(args.baseline)
+        if (baseline.get("plataforma"), baseline.get("python")) != (resultado["plataforma"], resultado["python"]):
+            print(f"\nAviso: a baseline foi medida em outro ambiente ({baseline.get('plataforma')}, Python {baseline.get('python')});"
+                  " regrave-a nesta máquina ou use --referencia.")
+
+    comparacao = comparar(resultado, baseline, args.limite, args.minimo_ms)
+    print()
+    print(comparacao.to_string(index=False))
+    regressoes = comparacao[comparacao["regrediu"]]
+    if not regressoes.empty:
+        print(
+            f"\n{len(regressoes)} caso(s) mais de {args.limite:.0%} (e de {args.minimo_ms:g} ms) mais lento(s) que a baseline: "
+            f"{', '.join(regressoes['caso'])}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Busca de meta (goal seek) sobre o motor de projeção.
+
+Responde perguntas como "qual o menor `clientes_crescimento` que leva o
+Montante de Saúde a R$ X até o mês M?". Cada passo avalia um lote de
+candidatos de uma vez com `projetar_lote` e estreita o intervalo em volta do
+primeiro que atinge a meta (uma bisseção com vários pontos por rodada).
+Supõe que aumentar o parâmetro nunca piora o montante.
+"""
+import numpy as np
+import pandas as pd
+
+from simulacao import MatrizDespesas, ParametrosSimulacao, projetar_lote
+
+# parâmetro -> (rótulo, é inteiro?)
+PARAMETROS_META = {
+    "clientes_crescimento": ("Clientes adicionais/mês", True),
+    "clientes_iniciais": ("Clientes iniciais", True),
+    "valor_sessao": ("Valor da sessão (R$)", False),
+}
+
+PONTOS_POR_RODADA = 33
+MAX_DOBRAS = 40
+
+
+def atinge_meta(
+    params: ParametrosSimulacao,
+    despesas: "pd.DataFrame | MatrizDespesas",
+    parametro: str,
+    valores,
+    alvo: float,
+    mes_limite: int,
+) -> np.ndarray:
+    """Para cada valor candidato do parâmetro: o montante chega a `alvo` em algum mês até `mes_limite`?"""
+    valores = np.atleast_1d(np.asarray(valores))
+    r = projetar_lote(params, despesas, variacoes={parametro: valores})
+    montante = np.broadcast_to(r["montante_saude"], (len(valores), len(r["meses"])))
+    return (montante[:, : int(mes_limite)] >= alvo).any(axis=1)
+
+
+def buscar_minimo(
+    params: ParametrosSimulacao,
+    despesas: "pd.DataFrame | MatrizDespesas",
+    parametro: str,
+    alvo: float,
+    mes_limite: int,
+    minimo: float = 0.0,
+    maximo: float | None = None,
+    tolerancia: float = 0.01,
+):
+    """
+    Menor valor de `parametro` (>= `minimo`) que atinge `alvo` até `mes_limite`.
+
+    Sem `maximo`, o intervalo é aberto dobrando o valor até atingir a meta.
+    Retorna None se a meta não é atingível (ex.: limite de salas).
+    """
+    if parametro not in PARAMETROS_META:
+        raise ValueError(f"Parâmetro sem busca de meta: {parametro!r}")
+    inteiro = PARAMETROS_META[parametro][1]
+    matriz = despesas if isinstance(despesas, MatrizDespesas) else MatrizDespesas(despesas, params.max_meses)
+    mes_limite = int(min(mes_limite, params.max_meses))
+
+    def testar(valores):
+        valores = np.rint(valores).astype(np.int64) if inteiro else np.asarray(valores, dtype=float)
+        return valores, atinge_meta(params, matriz, parametro, valores, alvo, mes_limite)
+
+    lo = float(minimo)
+    if testar([lo])[1][0]:
+        return _formatar(lo, inteiro)
+
+    # 1) acha um teto que atinge a meta
+    if maximo is None:
+        passo = max(abs(float(getattr(params, parametro))), 1.0)
+        candidatos = lo + passo * 2.0 ** np.arange(MAX_DOBRAS)
+    else:
+        candidatos = np.array([float(maximo)])
+    valores, ok = testar(candidatos)
+    if not ok.any():
+        return None
+    i = int(ok.argmax())
+    hi = float(valores[i])
+    if i > 0:
+        lo = float(valores[i - 1])
+
+    # 2) estreita [lo, hi]: lo nunca atinge, hi sempre atinge
+    precisao = 1.0 if inteiro else tolerancia
+    while hi - lo > precisao:
+        valores, ok = testar(np.linspace(lo, hi, PONTOS_POR_RODADA))
+        i = int(ok.argmax())  # o último ponto (hi) sempre atinge
+        novo_lo, novo_hi = float(valores[max(i - 1, 0)]), float(valores[i])
+        if (novo_lo, novo_hi) == (lo, hi):
+            break
+        lo, hi = max(lo, novo_lo), novo_hi
+    return _formatar(hi, inteiro)
+
+
+def _formatar(valor, inteiro):
+    return int(round(valor)) if inteiro else float(valor)
@@ -0,0 +1,331 @@
+"""
+Cache de resultados de projeção, endereçado pelo conteúdo.
+
+A chave é o sha256 dos parâmetros da simulação + checksum da tabela de
+despesas (+ opções como a resolução), então o mesmo cenário dá a mesma chave
+em qualquer sessão do Streamlit ou no `rodar_cenarios.py`. Há dois níveis:
+
+- memória: LRU por nº de itens, por processo;
+- disco: SQLite compartilhado entre processos, com limite de bytes (sai
+  primeiro o acessado há mais tempo).
+
+No disco os valores são só dados: a estrutura (dicts, listas, DataFrames,
+Series, escalares) vai em JSON e os arrays num .npz lido com
+allow_pickle=False, então o arquivo do cache não consegue executar código no
+processo que o lê. Valores que não cabem nesse formato ficam só na memória.
+
+Configuração por variáveis de ambiente: cache_resultados_dir,
+cache_resultados_max_mb e cache_resultados_max_itens.
+"""
+import copy
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from simulacao import ParametrosSimulacao
+
+# mude quando o motor passar a gerar resultados diferentes para os mesmos parâmetros
+VERSAO_MOTOR = 1
+
+COLUNAS_DESPESAS = ["nome", "valor", "mes_inicio", "duracao_meses"]
+
+DIRETORIO_PADRAO = Path(__file__).resolve().parent / ".cache_resultados"
+
+
+# =========================
+# Chaves
+# =========================
+def checksum_despesas(df_despesas: pd.DataFrame | None) -> str:
+    """Checksum das colunas que afetam a projeção (id e ordem das colunas não entram)."""
+    if df_despesas is None or df_despesas.empty:
+        return "vazio"
+    colunas = [c for c in COLUNAS_DESPESAS if c in df_despesas]
+    hashes = pd.util.hash_pandas_object(df_despesas[colunas].astype(str), index=False)
+    return hashlib.sha256(",".join(colunas).encode() + hashes.to_numpy().tobytes()).hexdigest()
+
+
+def chave_cenario(params: ParametrosSimulacao, checksum: str, **opcoes) -> str:
+    conteudo = {"motor": VERSAO_MOTOR, "params": asdict(params), "despesas": checksum, "opcoes": opcoes}
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# =========================
+# Serialização (disco)
+# =========================
+class NaoSerializavel(TypeError):
+    """Valor com um tipo que o formato do disco não representa (fica só na memória)."""
+
+
+def serializar(valor) -> bytes:
+    """Valor -> bytes de um .npz: os arrays e, em "estrutura", o JSON que diz como remontá-lo."""
+    arrays = {}
+    estrutura = _codificar(valor, arrays)
+    arrays["estrutura"] = np.frombuffer(json.dumps(estrutura).encode(), dtype=np.uint8)
+    saida = io.BytesIO()
+    np.savez(saida, **arrays)
+    return saida.getvalue()
+
+
+def desserializar(dados: bytes):
+    with np.load(io.BytesIO(dados), allow_pickle=False) as npz:
+        arrays = {nome: npz[nome] for nome in npz.files}
+    return _decodificar(json.loads(arrays.pop("estrutura").tobytes().decode()), arrays)
+
+
+def _codificar(valor, arrays):
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return {"tipo": "escalar", "valor": valor}
+    if isinstance(valor, np.generic):
+        return {"tipo": "escalar", "valor": valor.item()}
+    if isinstance(valor, pd.DataFrame):
+        return {
+            "tipo": "DataFrame",
+            "colunas": [_codificar(c, arrays) for c in valor.columns],
+            "valores": [_guardar_array(valor.iloc[:, i].to_numpy(), arrays) for i in range(valor.shape[1])],
+            "indice": _codificar_indice(valor.index, arrays),
+        }
+    if isinstance(valor, pd.Series):
+        return {
+            "tipo": "Series",
+            "nome": _codificar(valor.name, arrays),
+            "valores": _guardar_array(valor.to_numpy(), arrays),
+            "indice": _codificar_indice(valor.index, arrays),
+        }
+    if isinstance(valor, np.ndarray):
+        return {"tipo": "ndarray", "valores": _guardar_array(valor, arrays)}
+    if isinstance(valor, dict) and all(isinstance(k, str) for k in valor):
+        return {"tipo": "dict", "itens": {k: _codificar(v, arrays) for k, v in valor.items()}}
+    if isinstance(valor, (list, tuple)):
+        return {"tipo": type(valor).__name__, "itens": [_codificar(v, arrays) for v in valor]}
+    raise NaoSerializavel(f"tipo não suportado no cache em disco: {type(valor).__name__}")
+
+
+def _codificar_indice(indice, arrays):
+    if isinstance(indice, pd.RangeIndex):
+        return {"tipo": "RangeIndex", "inicio": indice.start, "fim": indice.stop, "passo": indice.step}
+    if isinstance(indice, pd.MultiIndex):
+        raise NaoSerializavel("MultiIndex não é suportado no cache em disco")
+    return {"tipo": "Index", "valores": _guardar_array(indice.to_numpy(), arrays), "nome": _codificar(indice.name, arrays)}
+
+
+def _guardar_array(array, arrays):
+    texto = False
+    if array.dtype == object:
+        # só texto: vira array unicode (o .npz não guarda objetos sem pickle)
+        if not all(isinstance(v, str) for v in array.ravel()):
+            raise NaoSerializavel("array de objetos que não são texto")
+        array, texto = array.astype(str), True
+    nome = f"a{len(arrays)}"
+    arrays[nome] = array
+    return {"array": nome, "texto": texto}
+
+
+def _ler_array(ref, arrays):
+    array = arrays[ref["array"]]
+    return array.astype(object) if ref["texto"] else array
+
+
+def _decodificar(estrutura, arrays):
+    tipo = estrutura["tipo"]
+    if tipo == "escalar":
+        return estrutura["valor"]
+    if tipo == "DataFrame":
+        colunas = [_decodificar(c, arrays) for c in estrutura["colunas"]]
+        dados = {i: _ler_array(ref, arrays) for i, ref in enumerate(estrutura["valores"])}
+        df = pd.DataFrame(dados, index=_decodificar_indice(estrutura["indice"], arrays))
+        df.columns = colunas
+        return df
+    if tipo == "Series":
+        return pd.Series(
+            _ler_array(estrutura["valores"], arrays),
+            index=_decodificar_indice(estrutura["indice"], arrays),
+            name=_decodificar(estrutura["nome"], arrays),
+        )
+    if tipo == "ndarray":
+        return _ler_array(estrutura["valores"], arrays)
+    if tipo == "dict":
+        return {k: _decodificar(v, arrays) for k, v in estrutura["itens"].items()}
+    if tipo in ("list", "tuple"):
+        itens = [_decodificar(v, arrays) for v in estrutura["itens"]]
+        return itens if tipo == "list" else tuple(itens)
+    raise ValueError(f"tipo desconhecido no cache em disco: {tipo}")
+
+
+def _decodificar_indice(estrutura, arrays):
+    if estrutura["tipo"] == "RangeIndex":
+        return pd.RangeIndex(estrutura["inicio"], estrutura["fim"], estrutura["passo"])
+    return pd.Index(_ler_array(estrutura["valores"], arrays), name=_decodificar(estrutura["nome"], arrays))
+
+
+# =========================
+# Cache
+# =========================
+class CacheResultados:
+    """
+    Cache em dois níveis (memória + SQLite). Os valores vão para o disco como
+    dados (ver serializar) e são devolvidos como cópia, então quem lê pode
+    alterar o resultado sem estragar o cache.
+    """
+
+    def __init__(self, diretorio: Path | str | None = DIRETORIO_PADRAO, max_itens_memoria: int = 64, max_bytes_disco: int = 256 * 1024**2):
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "gravacoes": 0, "despejos_disco": 0}
+
+        self.arquivo = None
+        if diretorio is not None:
+            try:
+                Path(diretorio).mkdir(parents=True, exist_ok=True)
+                self.arquivo = Path(diretorio) / "resultados.sqlite3"
+                with closing(self._conectar()) as conn, conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS resultados (
+                            chave TEXT PRIMARY KEY,
+                            valor BLOB NOT NULL,
+                            tamanho INTEGER NOT NULL,
+                            acessado_em REAL NOT NULL
+                        )
+                        """
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_acesso ON resultados (acessado_em)")
+            except (OSError, sqlite3.Error) as e:
+                warnings.warn(f"Cache em disco desativado ({e}); usando só memória.")
+                self.arquivo = None
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.arquivo, timeout=30)
+
+    def obter(self, chave: str):
+        """Valor guardado para `chave`, ou None."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self._stats["hits_memoria"] += 1
+                return copy.deepcopy(self._memoria[chave])
+
+        valor = self._ler_disco(chave)
+        with self._lock:
+            if valor is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits_disco"] += 1
+            self._guardar_memoria(chave, valor)
+        return copy.deepcopy(valor)
+
+    def guardar(self, chave: str, valor) -> None:
+        with self._lock:
+            self._guardar_memoria(chave, copy.deepcopy(valor))
+            self._stats["gravacoes"] += 1
+        self._gravar_disco(chave, valor)
+
+    def obter_ou_calcular(self, chave: str, calcular):
+        valor = self.obter(chave)
+        if valor is None:
+            valor = calcular()
+            self.guardar(chave, valor)
+        return valor
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._memoria.clear()
+        if self.arquivo is not None:
+            with closing(self._conectar()) as conn, conn:
+                conn.execute("DELETE FROM resultados")
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, itens_memoria=len(self._memoria))
+        consultas = stats["hits_memoria"] + stats["hits_disco"] + stats["misses"]
+        stats["taxa_acerto"] = (stats["hits_memoria"] + stats["hits_disco"]) / consultas if consultas else 0.0
+        stats["itens_disco"], stats["bytes_disco"] = 0, 0
+        if self.arquivo is not None:
+            with closing(self._conectar()) as conn:
+                itens, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()
+            stats["itens_disco"], stats["bytes_disco"] = int(itens), int(total)
+        return stats
+
+    # ----- níveis -----
+    def _guardar_memoria(self, chave, valor):
+        # chamado com o lock
+        self._memoria[chave] = valor
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_itens_memoria:
+            self._memoria.popitem(last=False)
+
+    def _ler_disco(self, chave):
+        if self.arquivo is None:
+            return None
+        with closing(self._conectar()) as conn, conn:
+            linha = conn.execute("SELECT valor FROM resultados WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+            conn.execute("UPDATE resultados SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+        try:
+            return desserializar(linha[0])
+        except Exception:
+            # formato antigo ou arquivo corrompido: conta como falta e sai do disco
+            with closing(self._conectar()) as conn, conn:
+                conn.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+            return None
+
+    def _gravar_disco(self, chave, valor):
+        if self.arquivo is None:
+            return
+        try:
+            dados = serializar(valor)
+        except NaoSerializavel:
+            return
+        if len(dados) > self.max_bytes_disco:
+            return
+        with closing(self._conectar()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO resultados (chave, valor, tamanho, acessado_em) VALUES (?, ?, ?, ?)",
+                (chave, sqlite3.Binary(dados), len(dados), time.time()),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+            if total <= self.max_bytes_disco:
+                return
+
+            # despeja os menos usados até caber no limite
+            excesso, despejar = total - self.max_bytes_disco, []
+            for chave_antiga, tamanho in conn.execute("SELECT chave, tamanho FROM resultados ORDER BY acessado_em"):
+                if excesso <= 0:
+                    break
+                despejar.append((chave_antiga,))
+                excesso -= tamanho
+            conn.executemany("DELETE FROM resultados WHERE chave = ?", despejar)
+        with self._lock:
+            self._stats["despejos_disco"] += len(despejar)
+
+
+_cache_padrao = None
+_cache_padrao_lock = threading.Lock()
+
+
+def cache_padrao() -> CacheResultados:
+    """Instância única por processo (compartilhada pelas sessões do Streamlit)."""
+    global _cache_padrao
+    with _cache_padrao_lock:
+        if _cache_padrao is None:
+            _cache_padrao = CacheResultados(
+                diretorio=os.getenv("cache_resultados_dir", str(DIRETORIO_PADRAO)),
+                max_itens_memoria=int(os.getenv("cache_resultados_max_itens", "64")),
+                max_bytes_disco=int(float(os.getenv("cache_resultados_max_mb", "256")) * 1024**2),
+            )
+        return _cache_padrao
@@ -1,8 +1,17 @@
-import pymysql
 import pandas as pd
 import os
+import sys
+import time
+import atexit
+import threading
+import functools
+from dataclasses import astuple
 from datetime import datetime
 
+from armazenamento import backend_da_configuracao
+from instrumentacao import CursorMedido, medicao_atual, origem_da_chamada
+from simulacao import PROFISSIONAIS_PADRAO
+
 def manual_load_dotenv(path="env.env"):
     if not os.path.exists(path):
         print("Arquivo inexistente")
@@ -18,24 +27,373 @@ def manual_load_dotenv(path="env.env"):
 #manual_load_dotenv()
 #print("Host do banco:", os.getenv("GCS_KEY_BASE64"))
 
+
+# =========================
+# Backend (MySQL ou SQLite, ver armazenamento.py)
+# =========================
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    """Backend em uso; na primeira chamada vem da configuração (banco_backend)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backend_da_configuracao()
+    return _backend
+
+
+def dialeto():
+    return backend().dialeto
+
+
+def usar_backend(novo):
+    """
+    Troca o backend do processo (ex.: um SQLite para análises locais e
+    benchmarks) e retorna o anterior. Fecha o pool do backend anterior e
+    esvazia o cache de leituras. Com `novo=None`, volta ao da configuração.
+    """
+    global _backend, _pool
+    with _backend_lock, _pool_lock:
+        anterior, _backend = _backend, novo
+        pool_antigo, _pool = _pool, None
+    if pool_antigo is not None:
+        pool_antigo.fechar()
+    with _cache_lock:
+        _cache_leituras.clear()
+    return anterior
+
+
+# =========================
+# Pool de conexões
+# =========================
+class PoolConexoes:
+    """
+    Pool de conexões compartilhado pelo processo (thread-safe).
+
+    Reaproveita conexões já autenticadas (o handshake TLS é o custo dominante),
+    limita o nº de conexões abertas a `tamanho_max`, fecha as que ficaram
+    ociosas mais de `ocioso_max_s` segundos e faz `ping(reconnect=True)` nas
+    que estão paradas há mais de `intervalo_ping_s` antes de entregá-las.
+    """
+
+    def __init__(self, fabrica, tamanho_max=5, ocioso_max_s=300.0, intervalo_ping_s=30.0, timeout_espera_s=30.0, erros_de_conexao=()):
+        self._fabrica = fabrica
+        # exceções que indicam conexão quebrada (ela é descartada em vez de voltar ao pool)
+        self.erros_de_conexao = tuple(erros_de_conexao)
+        self.tamanho_max = int(tamanho_max)
+        self.ocioso_max_s = float(ocioso_max_s)
+        self.intervalo_ping_s = float(intervalo_ping_s)
+        self.timeout_espera_s = float(timeout_espera_s)
+
+        self._cond = threading.Condition()
+        self._livres = []  # pilha de (conexao, instante_devolucao)
+        self._abertas = 0
+        self._metricas = {
+            "checkouts": 0,
+            "esperas": 0,
+            "criacoes": 0,
+            "pings": 0,
+            "reconexoes": 0,
+            "descartes": 0,
+            "ociosas_fechadas": 0,
+        }
+
+    def obter(self):
+        limite = time.monotonic() + self.timeout_espera_s
+        with self._cond:
+            self._metricas["checkouts"] += 1
+            ociosas = self._retirar_ociosas()
+            while True:
+                if self._livres:
+                    conn, devolvida_em = self._livres.pop()
+                    break
+                if self._abertas < self.tamanho_max:
+                    self._abertas += 1
+                    conn, devolvida_em = None, None
+                    break
+                self._metricas["esperas"] += 1
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._cond.wait(restante):
+                    raise TimeoutError(
+                        f"Nenhuma conexão livre no pool após {self.timeout_espera_s:.0f}s "
+                        f"(tamanho_max={self.tamanho_max})."
+                    )
+        _fechar_silenciosamente(ociosas)
+
+        if conn is None:
+            conn = self._criar()
+        elif time.monotonic() - devolvida_em > self.intervalo_ping_s:
+            conn = self._verificar(conn)
+        return ConexaoDoPool(self, conn)
+
+    def devolver(self, conn, descartar=False):
+        if not descartar:
+            try:
+                # encerra a transação pendente (e o snapshot de leitura) antes de reutilizar
+                conn.rollback()
+            except Exception:
+                descartar = True
+
+        with self._cond:
+            if descartar:
+                self._abertas -= 1
+                self._metricas["descartes"] += 1
+            else:
+                self._livres.append((conn, time.monotonic()))
+            self._cond.notify()
+        if descartar:
+            _fechar_silenciosamente([conn])
+
+    def fechar(self):
+        with self._cond:
+            livres = [conn for conn, _ in self._livres]
+            self._abertas -= len(livres)
+            self._livres = []
+        _fechar_silenciosamente(livres)
+
+    def metricas(self):
+        with self._cond:
+            return {
+                **self._metricas,
+                "abertas": self._abertas,
+                "livres": len(self._livres),
+                "em_uso": self._abertas - len(self._livres),
+                "tamanho_max": self.tamanho_max,
+            }
+
+    def _criar(self):
+        try:
+            conn = self._fabrica()
+        except Exception:
+            with self._cond:
+                self._abertas -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._metricas["criacoes"] += 1
+        return conn
+
+    def _verificar(self, conn):
+        with self._cond:
+            self._metricas["pings"] += 1
+        try:
+            conn.ping(reconnect=True)
+            return conn
+        except Exception:
+            # não reconectou: troca por uma conexão nova (a vaga continua contada em _abertas)
+            _fechar_silenciosamente([conn])
+            with self._cond:
+                self._metricas["reconexoes"] += 1
+            return self._criar()
+
+    def _retirar_ociosas(self):
+        # chamado com o lock; as conexões são fechadas fora dele
+        agora = time.monotonic()
+        manter, ociosas = [], []
+        for conn, devolvida_em in self._livres:
+            (ociosas if agora - devolvida_em > self.ocioso_max_s else manter).append((conn, devolvida_em))
+        if ociosas:
+            self._livres = manter
+            self._abertas -= len(ociosas)
+            self._metricas["ociosas_fechadas"] += len(ociosas)
+        return [conn for conn, _ in ociosas]
+
+
+class ConexaoDoPool:
+    """
+    Conexão emprestada do pool. Fora `close()`/`with`, repassa tudo para a
+    conexão do backend; ao sair do `with` (ou no `close()`) ela volta para o pool
+    em vez de ser fechada.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._medicao = None  # (medição, função, origem) com a instrumentação ligada
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao(), nome)
+
+    def _conexao(self):
+        if self._conn is None:
+            raise RuntimeError("Conexão já devolvida ao pool.")
+        return self._conn
+
+    def medir(self, medicao, funcao, origem):
+        """A partir daqui, consultas e commits desta conexão entram em `medicao` (ver instrumentacao.py)."""
+        self._medicao = (medicao, funcao, origem)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conexao().cursor(*args, **kwargs)
+        if self._medicao is None:
+            return cursor
+        return CursorMedido(cursor, *self._medicao)
+
+    def commit(self):
+        if self._medicao is None:
+            return self._conexao().commit()
+        medicao, funcao, _ = self._medicao
+        inicio = time.perf_counter()
+        try:
+            return self._conexao().commit()
+        finally:
+            medicao.registrar_commit(funcao, time.perf_counter() - inicio)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # erro de conexão: não devolve uma conexão possivelmente quebrada
+        self._devolver(descartar=isinstance(exc, self._pool.erros_de_conexao))
+
+    def close(self):
+        self._devolver()
+
+    def __del__(self):
+        # rede de segurança para quem esquece de fechar: não deixa a vaga presa
+        self._devolver()
+
+    def _devolver(self, descartar=False):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.devolver(conn, descartar=descartar)
+
+
+def _fechar_silenciosamente(conexoes):
+    for conn in conexoes:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obter_pool():
+    # criado sob demanda: as variáveis de ambiente podem ser carregadas depois do import
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(
+                    backend().conectar,
+                    tamanho_max=int(os.getenv("pool_tamanho_max", "5")),
+                    ocioso_max_s=float(os.getenv("pool_ocioso_max_s", "300")),
+                    erros_de_conexao=backend().erros_de_conexao,
+                )
+                atexit.register(_pool.fechar)
+    return _pool
+
+
 def get_mysql_conn():
-    return pymysql.connect(
-        host=os.getenv("host"),
-        user=os.getenv("username"),
-        password=os.getenv("password"),
-        port=int(os.getenv("port")),
-        database=os.getenv("database"),
-        cursorclass=pymysql.cursors.DictCursor,
-        ssl={"ssl": True}  # adapte conforme seu contexto SSL
-    )
+    """Conexão do pool do backend configurado (o nome é de quando só havia o MySQL)."""
+    medicao = medicao_atual()
+    if medicao is None:
+        return _obter_pool().obter()
+
+    inicio = time.perf_counter()
+    conn = _obter_pool().obter()
+    funcao, origem = sys._getframe(1).f_code.co_name, origem_da_chamada()
+    medicao.registrar_conexao(funcao, origem, time.perf_counter() - inicio)
+    conn.medir(medicao, funcao, origem)
+    return conn
+
+
+def metricas_pool():
+    """Contadores do pool: checkouts, esperas, criações, pings, reconexões, descartes, abertas/livres."""
+    return _obter_pool().metricas()
+
+
+# =========================
+# Cache de leituras
+# =========================
+# Leituras ficam em memória (compartilhadas pelo processo) até que uma escrita
+# na mesma tabela incremente a versão dela. O TTL só limita quanto tempo uma
+# alteração feita por outro processo pode demorar a aparecer.
+CACHE_LEITURA_TTL_S = float(os.getenv("cache_leitura_ttl_s", "300"))
+
+_versoes_tabela = {}
+_cache_leituras = {}
+_cache_lock = threading.Lock()
+
+
+def versao_tabela(tabela):
+    with _cache_lock:
+        return _versoes_tabela.get(tabela, 0)
+
+
+def invalidar_tabela(*tabelas):
+    with _cache_lock:
+        for tabela in tabelas:
+            _versoes_tabela[tabela] = _versoes_tabela.get(tabela, 0) + 1
+
+
+def leitura_cacheada(*tabelas):
+    """
+    Guarda o resultado da leitura por (função, argumentos) até mudar a versão
+    de alguma das `tabelas` (ou estourar o TTL). Cada chamada recebe uma cópia
+    (DataFrames com .copy(), dicts/listas/sets rasas), para que quem chama
+    possa alterá-la sem estragar o valor guardado para os próximos reruns.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            chave = (func.__name__, args, tuple(sorted(kwargs.items())))
+            with _cache_lock:
+                versoes = tuple(_versoes_tabela.get(t, 0) for t in tabelas)
+                item = _cache_leituras.get(chave)
+            acerto = item is not None and item[0] == versoes and time.monotonic() - item[1] < CACHE_LEITURA_TTL_S
+            medicao = medicao_atual()
+            if medicao is not None:
+                medicao.registrar_cache(func.__name__, acerto)
+            if acerto:
+                return _copia(item[2])
+
+            valor = func(*args, **kwargs)
+            with _cache_lock:
+                # se houve escrita durante a leitura, não guarda um valor possivelmente velho
+                if versoes == tuple(_versoes_tabela.get(t, 0) for t in tabelas):
+                    _cache_leituras[chave] = (versoes, time.monotonic(), valor)
+            return _copia(valor)
+
+        return wrapper
+
+    return decorador
+
+
+def escrita(*tabelas):
+    """Invalida o cache de leitura das `tabelas` depois da escrita (mesmo se ela falhar no meio)."""
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                invalidar_tabela(*tabelas)
+
+        return wrapper
+
+    return decorador
+
+
+def _copia(valor):
+    # escalares (int, str...) são imutáveis; os contêineres guardam escalares
+    if isinstance(valor, (pd.DataFrame, pd.Series, dict, list, set)):
+        return valor.copy()
+    return valor
 
 
 def criar_tabela_plano_estrategico():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS plano_estrategico (
-                    id BIGINT PRIMARY KEY,
+                    id {dialeto().pk_auto},
                     categoria VARCHAR(255),
                     tarefa TEXT,
                     status VARCHAR(20),
@@ -49,9 +407,9 @@ def criar_tabela_plano_estrategico():
 def criar_tabela_despesas():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS despesas (
-                    id BIGINT PRIMARY KEY,
+                    id {dialeto().pk_auto},
                     nome VARCHAR(255),
                     valor DECIMAL(10, 2)
                 )
@@ -61,9 +419,9 @@ def criar_tabela_despesas():
 def criar_tabela_categorias():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS categorias_plano_estrategico (
-                    id BIGINT PRIMARY KEY,
+                    id {dialeto().pk_auto},
                     nome VARCHAR(255) UNIQUE
                 )
             """)
@@ -72,14 +430,139 @@ def criar_tabela_categorias():
 def criar_tabela_responsaveis():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS responsaveis_plano_estrategico (
-                    id BIGINT PRIMARY KEY,
+                    id {dialeto().pk_auto},
                     nome VARCHAR(255) UNIQUE
                 )
             """)
         conn.commit()
 
+def criar_tabela_tarefa_responsavel():
+    """
+    Ligação tarefa × responsável. A PK atende "responsáveis da tarefa" e o
+    índice (responsavel_id, tarefa_id) atende "tarefas do responsável".
+    """
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS tarefa_responsavel (
+                    tarefa_id BIGINT NOT NULL,
+                    responsavel_id BIGINT NOT NULL,
+                    PRIMARY KEY (tarefa_id, responsavel_id),
+                    CONSTRAINT fk_tarefa_responsavel_tarefa
+                        FOREIGN KEY (tarefa_id) REFERENCES plano_estrategico (id) ON DELETE CASCADE,
+                    CONSTRAINT fk_tarefa_responsavel_responsavel
+                        FOREIGN KEY (responsavel_id) REFERENCES responsaveis_plano_estrategico (id) ON DELETE CASCADE
+                ) {dialeto().opcoes_tabela}
+            """)
+            # criado à parte: o SQLite não aceita KEY dentro do CREATE TABLE
+            if "idx_tarefa_responsavel_responsavel" not in dialeto().indices(cursor, "tarefa_responsavel"):
+                cursor.execute(
+                    "CREATE INDEX idx_tarefa_responsavel_responsavel ON tarefa_responsavel (responsavel_id, tarefa_id)"
+                )
+        conn.commit()
+
+
+def separar_responsaveis(texto):
+    """Texto "A, B" da coluna `responsaveis` -> ["A", "B"] (sem vazios/repetidos)."""
+    nomes = [r.strip() for r in str(texto or "").split(",")]
+    return list(dict.fromkeys(n for n in nomes if n))
+
+
+def _vincular_responsaveis(cursor, tarefa_id, nomes):
+    """Substitui os responsáveis da tarefa na tabela de ligação (cria nomes novos)."""
+    cursor.execute("DELETE FROM tarefa_responsavel WHERE tarefa_id = %s", (tarefa_id,))
+    if not nomes:
+        return
+    _inserir_nomes(cursor, "responsaveis_plano_estrategico", nomes)
+    marcadores = ", ".join(["%s"] * len(nomes))
+    cursor.execute(f"""
+        {dialeto().insert_ignore} INTO tarefa_responsavel (tarefa_id, responsavel_id)
+        SELECT %s, id FROM responsaveis_plano_estrategico WHERE nome IN ({marcadores})
+    """, [tarefa_id, *nomes])
+
+
+def _recalcular_texto_responsaveis(cursor, tarefa_ids):
+    """Refaz a coluna texto `responsaveis` das tarefas a partir da tabela de ligação."""
+    if not tarefa_ids:
+        return
+    marcadores = ", ".join(["%s"] * len(tarefa_ids))
+    nomes_da_tarefa = dialeto().concatenar_ordenado(
+        "r.nome",
+        """
+        FROM tarefa_responsavel tr
+        JOIN responsaveis_plano_estrategico r ON r.id = tr.responsavel_id
+        WHERE tr.tarefa_id = plano_estrategico.id
+        """,
+        ", ",
+    )
+    cursor.execute(f"""
+        UPDATE plano_estrategico
+        SET responsaveis = ({nomes_da_tarefa}), row_version = row_version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id IN ({marcadores})
+    """, tarefa_ids)
+
+
+def _tarefas_do_responsavel(cursor, responsavel_id):
+    cursor.execute("SELECT tarefa_id FROM tarefa_responsavel WHERE responsavel_id = %s", (responsavel_id,))
+    return [r["tarefa_id"] for r in cursor.fetchall()]
+
+
+@escrita("plano_estrategico", "responsaveis_plano_estrategico", "tarefa_responsavel")
+def migrar_tarefa_responsavel():
+    """
+    Cria a tabela de ligação e preenche a partir do texto `responsaveis` das
+    tarefas existentes (os nomes que faltarem são cadastrados). Idempotente.
+    """
+    criar_tabela_tarefa_responsavel()
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id, responsaveis FROM plano_estrategico WHERE responsaveis IS NOT NULL AND responsaveis <> ''")
+            pares = [(r["id"], nome) for r in cursor.fetchall() for nome in separar_responsaveis(r["responsaveis"])]
+            if pares:
+                _inserir_nomes(cursor, "responsaveis_plano_estrategico", sorted({nome for _, nome in pares}))
+                cursor.execute("SELECT id, nome FROM responsaveis_plano_estrategico")
+                id_por_nome = {r["nome"]: r["id"] for r in cursor.fetchall()}
+                cursor.executemany(
+                    f"{dialeto().insert_ignore} INTO tarefa_responsavel (tarefa_id, responsavel_id) VALUES (%s, %s)",
+                    [(tarefa_id, id_por_nome[nome]) for tarefa_id, nome in pares if nome in id_por_nome],
+                )
+        conn.commit()
+
+
+# =========================
+# Versões das tarefas (concorrência otimista)
+# =========================
+# Toda escrita em plano_estrategico soma 1 à row_version da linha e carimba
+# updated_at. Quem edita guarda a versão que leu e só grava se ela não mudou
+# (ver atualizar_tarefa_completa).
+
+@escrita("plano_estrategico")
+def migrar_versionamento_tarefas():
+    """Adiciona as colunas row_version (as tarefas existentes ficam na versão 1) e updated_at. Idempotente."""
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            colunas = dialeto().colunas(cursor, "plano_estrategico")
+            if "row_version" not in colunas:
+                cursor.execute("ALTER TABLE plano_estrategico ADD COLUMN row_version BIGINT NOT NULL DEFAULT 1")
+            if "updated_at" not in colunas:
+                cursor.execute("ALTER TABLE plano_estrategico ADD COLUMN updated_at DATETIME NULL")
+        conn.commit()
+
+
+class ConflitoDeVersao(Exception):
+    """A tarefa mudou (ou foi excluída) depois de lida: a gravação foi recusada."""
+
+    def __init__(self, tarefa_id, versao_esperada, versao_atual):
+        self.tarefa_id = tarefa_id
+        self.versao_esperada = versao_esperada
+        self.versao_atual = versao_atual  # None: a tarefa foi excluída
+        situacao = "foi excluída" if versao_atual is None else f"está na versão {versao_atual}"
+        super().__init__(f"A tarefa {tarefa_id} {situacao} (esperada: versão {versao_esperada}).")
+
+
+@leitura_cacheada("categorias_plano_estrategico")
 def listar_categorias():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
@@ -88,6 +571,7 @@ def listar_categorias():
             cols = ["id", "nome"]
             return pd.DataFrame(rows, columns=cols) if rows else pd.DataFrame(columns=cols)
 
+@leitura_cacheada("responsaveis_plano_estrategico")
 def listar_responsaveis():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
@@ -96,48 +580,55 @@ def listar_responsaveis():
             cols = ["id", "nome"]
             return pd.DataFrame(rows, columns=cols) if rows else pd.DataFrame(columns=cols)
 
+@escrita("categorias_plano_estrategico")
 def adicionar_categoria(nome):
+    """Cria (ou reaproveita, se o nome já existe) e retorna o id."""
     if not nome:
-        return
+        return None
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT MAX(id) as max_id FROM categorias_plano_estrategico")
-            next_id = (cursor.fetchone()['max_id'] or 0) + 1
-            try:
-                cursor.execute("""
-                    INSERT INTO categorias_plano_estrategico (id, nome) VALUES (%s, %s)
-                """, (next_id, nome.strip()))
-            except pymysql.err.IntegrityError:
-                pass  # já existe
+            novo_id = dialeto().inserir_ou_obter_id(cursor, "categorias_plano_estrategico", "nome", nome.strip())
         conn.commit()
+    return novo_id
 
+@escrita("responsaveis_plano_estrategico")
 def adicionar_responsavel(nome):
+    """Cria (ou reaproveita, se o nome já existe) e retorna o id."""
     if not nome:
-        return
+        return None
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT MAX(id) as max_id FROM responsaveis_plano_estrategico")
-            next_id = (cursor.fetchone()['max_id'] or 0) + 1
-            try:
-                cursor.execute("""
-                    INSERT INTO responsaveis_plano_estrategico (id, nome) VALUES (%s, %s)
-                """, (next_id, nome.strip()))
-            except pymysql.err.IntegrityError:
-                pass  # já existe
+            novo_id = dialeto().inserir_ou_obter_id(cursor, "responsaveis_plano_estrategico", "nome", nome.strip())
         conn.commit()
+    return novo_id
+
+
+def _inserir_nomes(cursor, tabela, nomes):
+    """INSERT IGNORE multi-linha (no MySQL, o executemany do pymysql junta tudo num só comando)."""
+    if not nomes:
+        return 0
+    cursor.executemany(f"{dialeto().insert_ignore} INTO {tabela} (nome) VALUES (%s)", [(n,) for n in nomes])
+    return cursor.rowcount
+
 
+@escrita("categorias_plano_estrategico")
 def excluir_categoria(categoria_id):
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
             cursor.execute("DELETE FROM categorias_plano_estrategico WHERE id = %s", (categoria_id,))
         conn.commit()
 
+@escrita("responsaveis_plano_estrategico", "plano_estrategico", "tarefa_responsavel")
 def excluir_responsavel(responsavel_id):
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
+            afetadas = _tarefas_do_responsavel(cursor, responsavel_id)
+            # a FK remove as ligações; o texto das tarefas é refeito sem o nome
             cursor.execute("DELETE FROM responsaveis_plano_estrategico WHERE id = %s", (responsavel_id,))
+            _recalcular_texto_responsaveis(cursor, afetadas)
         conn.commit()
 
+@escrita("categorias_plano_estrategico")
 def renomear_categoria(categoria_id, novo_nome):
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
@@ -146,41 +637,145 @@ def renomear_categoria(categoria_id, novo_nome):
             """, (novo_nome.strip(), categoria_id))
         conn.commit()
 
+@escrita("responsaveis_plano_estrategico", "plano_estrategico", "tarefa_responsavel")
 def renomear_responsavel(responsavel_id, novo_nome):
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE responsaveis_plano_estrategico SET nome = %s WHERE id = %s
             """, (novo_nome.strip(), responsavel_id))
+            _recalcular_texto_responsaveis(cursor, _tarefas_do_responsavel(cursor, responsavel_id))
+        conn.commit()
+
+@escrita("categorias_plano_estrategico")
+def seed_categorias():
+    """
+    Cadastra as categorias usadas nas tarefas que ainda não estão na tabela de
+    cadastro, num único INSERT ... SELECT. Retorna o nº de categorias inseridas.
+
+    Responsáveis não precisam disso: cada escrita de tarefa já os cadastra ao
+    preencher a tabela de ligação (ver _vincular_responsaveis).
+    """
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                {dialeto().insert_ignore} INTO categorias_plano_estrategico (nome)
+                SELECT DISTINCT TRIM(categoria) FROM plano_estrategico
+                WHERE categoria IS NOT NULL AND TRIM(categoria) <> ''
+            """)
+            inseridas = cursor.rowcount
         conn.commit()
+    return inseridas
 
-def seed_categorias_e_responsaveis():
-    df = listar_tarefas()
-    # categorias
-    for cat in sorted(set(df["categoria"].dropna().astype(str))):
-        if cat.strip():
-            adicionar_categoria(cat.strip())
 
-    # responsaveis (coluna é string com nomes separados por vírgula)
-    responsaveis_raw = []
-    for txt in df["responsaveis"].fillna(""):
-        responsaveis_raw.extend([r.strip() for r in str(txt).split(",") if r.strip()])
-    for r in sorted(set(responsaveis_raw)):
-        adicionar_responsavel(r)
+COLUNAS_TAREFAS = ["id", "categoria", "tarefa", "status", "data_limite", "responsaveis", "row_version", "updated_at"]
 
 
+@leitura_cacheada("plano_estrategico")
 def listar_tarefas():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM plano_estrategico")
+            cursor.execute(f"SELECT {', '.join(COLUNAS_TAREFAS)} FROM plano_estrategico")
+            return pd.DataFrame(cursor.fetchall(), columns=COLUNAS_TAREFAS)
+
+
+# ordem de exibição: pendentes/urgentes antes das concluídas; dentro delas,
+# prazo mais antigo (mais atrasado) primeiro e sem prazo no fim
+def _ordem_tarefas(alias=""):
+    p = f"{alias}." if alias else ""
+    return f"{p}status = 'OK', {p}data_limite IS NULL, {p}data_limite, {p}id"
+
+
+def _filtro_tarefas(categoria=None, incluir_concluidas=True):
+    condicoes, params = [], []
+    if categoria is not None:
+        condicoes.append("categoria = %s")
+        params.append(categoria)
+    if not incluir_concluidas:
+        condicoes.append("status <> 'OK'")
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, params
+
+
+# consultas quentes: verificar_indices.py roda o EXPLAIN exatamente destes SQLs
+SQL_CONTAR_POR_STATUS = "SELECT status, COUNT(*) AS n FROM plano_estrategico GROUP BY status"
+SQL_PROGRESSO_POR_CATEGORIA = """
+    SELECT categoria, COUNT(*) AS total, SUM(status = 'OK') AS concluidas
+    FROM plano_estrategico
+    GROUP BY categoria
+    ORDER BY categoria
+"""
+COLUNAS_PAGINA_TAREFAS = ["id", "categoria", "tarefa", "status", "data_limite", "responsaveis", "row_version"]
+COLUNAS_TAREFAS_DO_RESPONSAVEL = ["id", "categoria", "tarefa", "status", "data_limite", "responsaveis"]
+
+
+def sql_tarefas_pagina(categoria=None, incluir_concluidas=True, limite=25, offset=0):
+    """(SQL, parâmetros) de uma página de tarefas; ver listar_tarefas_pagina."""
+    where, params = _filtro_tarefas(categoria, incluir_concluidas)
+    sql = f"""
+        SELECT {', '.join(COLUNAS_PAGINA_TAREFAS)}
+        FROM plano_estrategico
+        {where}
+        ORDER BY {_ordem_tarefas()}
+        LIMIT %s OFFSET %s
+    """
+    return sql, [*params, int(limite), int(offset)]
+
+
+def sql_tarefas_do_responsavel(responsavel_id, incluir_concluidas=False):
+    """(SQL, parâmetros) das tarefas de um responsável; ver listar_tarefas_do_responsavel."""
+    filtro = "" if incluir_concluidas else "AND p.status <> 'OK'"
+    sql = f"""
+        SELECT {', '.join(f"p.{c}" for c in COLUNAS_TAREFAS_DO_RESPONSAVEL)}
+        FROM tarefa_responsavel tr
+        JOIN plano_estrategico p ON p.id = tr.tarefa_id
+        WHERE tr.responsavel_id = %s {filtro}
+        ORDER BY {_ordem_tarefas("p")}
+    """
+    return sql, (responsavel_id,)
+
+
+@leitura_cacheada("plano_estrategico")
+def contar_tarefas_por_status():
+    """{status: nº de tarefas}, contado no banco."""
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(SQL_CONTAR_POR_STATUS)
+            return {r["status"]: int(r["n"]) for r in cursor.fetchall()}
+
+
+@leitura_cacheada("plano_estrategico")
+def progresso_por_categoria():
+    """Uma linha por categoria: total de tarefas, concluídas e fração concluída."""
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(SQL_PROGRESSO_POR_CATEGORIA)
             rows = cursor.fetchall()
+    df = pd.DataFrame(rows, columns=["categoria", "total", "concluidas"]).astype({"total": int, "concluidas": int})
+    df["progresso"] = df["concluidas"] / df["total"]
+    return df
 
-            colunas = ["id", "categoria", "tarefa", "status", "data_limite", "responsaveis"]
-            if not rows:
-                return pd.DataFrame(columns=colunas)
-            return pd.DataFrame(rows, columns=colunas)
 
+@leitura_cacheada("plano_estrategico")
+def contar_tarefas(categoria=None, incluir_concluidas=True):
+    where, params = _filtro_tarefas(categoria, incluir_concluidas)
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) AS n FROM plano_estrategico {where}", params)
+            return int(cursor.fetchone()["n"])
 
+
+@leitura_cacheada("plano_estrategico")
+def listar_tarefas_pagina(categoria=None, incluir_concluidas=True, limite=25, offset=0):
+    """Uma página de tarefas, já filtrada e ordenada pelo banco (ver _ordem_tarefas)."""
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(*sql_tarefas_pagina(categoria, incluir_concluidas, limite, offset))
+            rows = cursor.fetchall()
+    return pd.DataFrame(rows, columns=COLUNAS_PAGINA_TAREFAS)
+
+
+@escrita("plano_estrategico", "responsaveis_plano_estrategico", "tarefa_responsavel")
 def adicionar_tarefa(categoria, tarefa, status, data_limite, responsaveis):
     if isinstance(data_limite, str):
         data_limite = data_limite.replace("‑", "-").replace("–", "-")
@@ -188,16 +783,25 @@ def adicionar_tarefa(categoria, tarefa, status, data_limite, responsaveis):
 
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT MAX(id) as max_id FROM plano_estrategico")
-            next_id = (cursor.fetchone()['max_id'] or 0) + 1
-
             cursor.execute("""
-                INSERT INTO plano_estrategico (id, categoria, tarefa, status, data_limite, responsaveis)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (next_id, categoria, tarefa, status, data_limite, responsaveis))
+                INSERT INTO plano_estrategico (categoria, tarefa, status, data_limite, responsaveis, updated_at)
+                VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            """, (categoria, tarefa, status, data_limite, responsaveis))
+            novo_id = cursor.lastrowid
+            _vincular_responsaveis(cursor, novo_id, separar_responsaveis(responsaveis))
         conn.commit()
+    return novo_id
+
+
+@leitura_cacheada("despesas")
+def carregar_despesas():
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM despesas ORDER BY id")
+            return pd.DataFrame(cursor.fetchall())
 
 
+@escrita("despesas")
 def excluir_despesa(despesa_id):
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
@@ -205,53 +809,70 @@ def excluir_despesa(despesa_id):
         conn.commit()
 
 
-def atualizar_titulo_categoria(id, nova_tarefa, nova_categoria):
+@escrita("plano_estrategico", "responsaveis_plano_estrategico", "tarefa_responsavel")
+def atualizar_tarefa_completa(id, versao_esperada, tarefa, categoria, status, data_limite, responsaveis):
+    """
+    Grava todos os campos editáveis da tarefa num único UPDATE, desde que ela
+    ainda esteja na `versao_esperada` (a row_version de quando foi lida). Se
+    outra pessoa gravou ou excluiu antes, nada muda e levanta
+    ConflitoDeVersao. É o único caminho de edição de tarefas. Retorna a nova
+    versão da tarefa.
+    """
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE plano_estrategico
-                SET tarefa = %s, categoria = %s
-                WHERE id = %s
-            """, (nova_tarefa, nova_categoria, id))
+                SET tarefa = %s, categoria = %s, status = %s, data_limite = %s, responsaveis = %s,
+                    row_version = row_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND row_version = %s
+            """, (tarefa, categoria, status, data_limite, responsaveis, id, versao_esperada))
+            if cursor.rowcount == 0:
+                cursor.execute("SELECT row_version FROM plano_estrategico WHERE id = %s", (id,))
+                linha = cursor.fetchone()
+                raise ConflitoDeVersao(id, versao_esperada, None if linha is None else linha["row_version"])
+            _vincular_responsaveis(cursor, id, separar_responsaveis(responsaveis))
         conn.commit()
+    return versao_esperada + 1
 
 
-def atualizar_tarefa(id, status=None, data_limite=None, responsaveis=None):
-    updates = []
-    params = []
-
-    if status is not None:
-        updates.append("status = %s")
-        params.append(status)
-    if data_limite is not None:
-        updates.append("data_limite = %s")
-        params.append(data_limite)
-    if responsaveis is not None:
-        updates.append("responsaveis = %s")
-        params.append(responsaveis)
-
-    if not updates:
-        return
-
-    query = f"UPDATE plano_estrategico SET {', '.join(updates)} WHERE id = %s"
-    params.append(id)
-
+@escrita("plano_estrategico", "tarefa_responsavel")
+def excluir_tarefa(tarefa_id):
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(query, params)
+            cursor.execute("DELETE FROM plano_estrategico WHERE id = %s", (tarefa_id,))
         conn.commit()
 
 
-def excluir_tarefa(tarefa_id):
+@leitura_cacheada("plano_estrategico", "responsaveis_plano_estrategico", "tarefa_responsavel")
+def pendentes_por_responsavel():
+    """Nº de tarefas não concluídas de cada responsável (só quem tem alguma)."""
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM plano_estrategico WHERE id = %s", (tarefa_id,))
-        conn.commit()
+            cursor.execute("""
+                SELECT r.id, r.nome, COUNT(*) AS pendentes, SUM(p.status = 'URGENTE') AS urgentes
+                FROM responsaveis_plano_estrategico r
+                JOIN tarefa_responsavel tr ON tr.responsavel_id = r.id
+                JOIN plano_estrategico p ON p.id = tr.tarefa_id
+                WHERE p.status <> 'OK'
+                GROUP BY r.id, r.nome
+                ORDER BY r.nome
+            """)
+            rows = cursor.fetchall()
+    df = pd.DataFrame(rows, columns=["id", "nome", "pendentes", "urgentes"])
+    return df.astype({"pendentes": int, "urgentes": int})
 
 
-def tarefa_existe(df_db, tarefa, categoria):
-    return not df_db[(df_db["tarefa"] == tarefa) & (df_db["categoria"] == categoria)].empty
+@leitura_cacheada("plano_estrategico", "responsaveis_plano_estrategico", "tarefa_responsavel")
+def listar_tarefas_do_responsavel(responsavel_id, incluir_concluidas=False):
+    """Tarefas de um responsável (pelo índice da tabela de ligação), por prazo."""
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(*sql_tarefas_do_responsavel(responsavel_id, incluir_concluidas))
+            rows = cursor.fetchall()
+    return pd.DataFrame(rows, columns=COLUNAS_TAREFAS_DO_RESPONSAVEL)
+
 
+@escrita("despesas")
 def migrar_tabela_despesas_add_campos_periodo():
     """
     Adiciona campos de período na tabela despesas:
@@ -263,27 +884,25 @@ def migrar_tabela_despesas_add_campos_periodo():
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
             # garante que a tabela existe
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS despesas (
-                    id BIGINT PRIMARY KEY,
+                    id {dialeto().pk_auto},
                     nome VARCHAR(255),
                     valor DECIMAL(10, 2)
                 )
             """)
 
-            def coluna_existe(nome_coluna: str) -> bool:
-                cursor.execute("SHOW COLUMNS FROM despesas LIKE %s", (nome_coluna,))
-                return cursor.fetchone() is not None
+            colunas = dialeto().colunas(cursor, "despesas")
 
             # adiciona mes_inicio
-            if not coluna_existe("mes_inicio"):
+            if "mes_inicio" not in colunas:
                 cursor.execute("""
                     ALTER TABLE despesas
                     ADD COLUMN mes_inicio INT NOT NULL DEFAULT 1
                 """)
 
             # adiciona duracao_meses
-            if not coluna_existe("duracao_meses"):
+            if "duracao_meses" not in colunas:
                 cursor.execute("""
                     ALTER TABLE despesas
                     ADD COLUMN duracao_meses INT NULL
@@ -291,26 +910,27 @@ def migrar_tabela_despesas_add_campos_periodo():
 
         conn.commit()
 
+@escrita("despesas")
 def adicionar_despesa(nome, valor, mes_inicio=1, duracao_meses=None):
     with get_mysql_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT MAX(id) as max_id FROM despesas")
-            next_id = (cursor.fetchone()['max_id'] or 0) + 1
-
             # tenta inserir com colunas novas; se não existirem, cai no insert antigo
             try:
                 cursor.execute("""
-                    INSERT INTO despesas (id, nome, valor, mes_inicio, duracao_meses)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (next_id, nome, valor, int(mes_inicio), duracao_meses))
+                    INSERT INTO despesas (nome, valor, mes_inicio, duracao_meses)
+                    VALUES (%s, %s, %s, %s)
+                """, (nome, valor, int(mes_inicio), duracao_meses))
             except Exception:
                 cursor.execute("""
-                    INSERT INTO despesas (id, nome, valor)
-                    VALUES (%s, %s, %s)
-                """, (next_id, nome, valor))
+                    INSERT INTO despesas (nome, valor)
+                    VALUES (%s, %s)
+                """, (nome, valor))
+            novo_id = cursor.lastrowid
         conn.commit()
+    return novo_id
 
 
+@escrita("despesas")
 def atualizar_despesa(id, nome=None, valor=None, mes_inicio=None, duracao_meses=None):
     updates = []
     params = []
@@ -341,3 +961,238 @@ def atualizar_despesa(id, nome=None, valor=None, mes_inicio=None, duracao_meses=
         with conn.cursor() as cursor:
             cursor.execute(query, params)
         conn.commit()
+
+
+class DespesasExcluidas(Exception):
+    """Despesas editadas foram excluídas (por outra sessão) antes de salvar: o lote foi recusado."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        super().__init__(f"Despesa(s) excluída(s) antes de salvar: {', '.join(map(str, ids))}.")
+
+
+@escrita("despesas")
+def salvar_despesas_em_lote(alteracoes, com_periodo=True):
+    """
+    Grava de uma vez várias despesas editadas (lista de dicts com id, nome,
+    valor e, se `com_periodo`, mes_inicio e duracao_meses).
+
+    Uma conexão e uma transação para o lote inteiro. Só atualiza despesas que
+    ainda existem: se alguma foi excluída depois de carregada, nada é gravado
+    e levanta DespesasExcluidas (um upsert a recriaria). Retorna o nº de
+    linhas enviadas.
+    """
+    if not alteracoes:
+        return 0
+
+    if com_periodo:
+        query = "UPDATE despesas SET nome = %s, valor = %s, mes_inicio = %s, duracao_meses = %s WHERE id = %s"
+        linhas = [
+            (a["nome"], a["valor"], int(a["mes_inicio"]), a["duracao_meses"], int(a["id"]))
+            for a in alteracoes
+        ]
+    else:
+        query = "UPDATE despesas SET nome = %s, valor = %s WHERE id = %s"
+        linhas = [(a["nome"], a["valor"], int(a["id"])) for a in alteracoes]
+
+    with get_mysql_conn() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.executemany(query, linhas)
+                if cursor.rowcount < len(linhas):
+                    # o MySQL não conta linhas que já tinham os mesmos valores:
+                    # confere quais ids sumiram antes de recusar o lote
+                    ids = [linha[-1] for linha in linhas]
+                    cursor.execute(f"SELECT id FROM despesas WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+                    existentes = {r["id"] for r in cursor.fetchall()}
+                    excluidas = [i for i in ids if i not in existentes]
+                    if excluidas:
+                        raise DespesasExcluidas(excluidas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return len(linhas)
+
+
+def migrar_ids_auto_increment():
+    """
+    Passa a coluna `id` das tabelas para AUTO_INCREMENT, para que os INSERTs
+    não precisem mais de `SELECT MAX(id)` (uma ida a mais ao banco e corrida
+    entre usuários). O próximo valor continua a partir do maior id existente.
+
+    Seguro para rodar várias vezes (idempotente).
+    """
+    tabelas = ["plano_estrategico", "despesas", "categorias_plano_estrategico", "responsaveis_plano_estrategico"]
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            for tabela in tabelas:
+                if not dialeto().id_autoincremento(cursor, tabela):
+                    cursor.execute(f"ALTER TABLE {tabela} MODIFY id BIGINT NOT NULL AUTO_INCREMENT")
+        conn.commit()
+
+
+# =========================
+# Profissionais
+# =========================
+COLUNAS_PROFISSIONAIS = ["id", "nome", "sessoes_mes", "valor_sessao", "ocupa_sala", "conta_no_teto", "participacao_lucro"]
+
+
+
+def criar_tabela_profissionais():
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS profissionais (
+                    id {dialeto().pk_auto},
+                    nome VARCHAR(255) NOT NULL UNIQUE,
+                    sessoes_mes INT NOT NULL DEFAULT 0,
+                    valor_sessao DECIMAL(10, 2) NOT NULL DEFAULT 0,
+                    ocupa_sala TINYINT(1) NOT NULL DEFAULT 0,
+                    conta_no_teto TINYINT(1) NOT NULL DEFAULT 0,
+                    participacao_lucro DECIMAL(6, 4) NOT NULL DEFAULT 0
+                )
+            """)
+        conn.commit()
+
+
+@escrita("profissionais")
+def seed_profissionais():
+    """Cadastra a equipe inicial (a que era fixa no app) se a tabela estiver vazia."""
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS n FROM profissionais")
+            if cursor.fetchone()["n"] == 0:
+                cursor.executemany("""
+                    INSERT INTO profissionais
+                        (nome, sessoes_mes, valor_sessao, ocupa_sala, conta_no_teto, participacao_lucro)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, [astuple(p) for p in PROFISSIONAIS_PADRAO])
+        conn.commit()
+
+
+@leitura_cacheada("profissionais")
+def listar_profissionais():
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM profissionais ORDER BY id")
+            rows = cursor.fetchall()
+    df = pd.DataFrame(rows, columns=COLUNAS_PROFISSIONAIS)
+    return df.astype({
+        "sessoes_mes": int,
+        "valor_sessao": float,
+        "ocupa_sala": bool,
+        "conta_no_teto": bool,
+        "participacao_lucro": float,
+    })
+
+
+@escrita("profissionais")
+def adicionar_profissional(nome, sessoes_mes=0, valor_sessao=0.0, ocupa_sala=False, conta_no_teto=False, participacao_lucro=0.0):
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO profissionais
+                    (nome, sessoes_mes, valor_sessao, ocupa_sala, conta_no_teto, participacao_lucro)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (nome.strip(), int(sessoes_mes), valor_sessao, bool(ocupa_sala), bool(conta_no_teto), participacao_lucro))
+            novo_id = cursor.lastrowid
+        conn.commit()
+    return novo_id
+
+
+@escrita("profissionais")
+def atualizar_profissional(id, nome=None, sessoes_mes=None, valor_sessao=None, ocupa_sala=None, conta_no_teto=None, participacao_lucro=None):
+    campos = {
+        "nome": None if nome is None else nome.strip(),
+        "sessoes_mes": None if sessoes_mes is None else int(sessoes_mes),
+        "valor_sessao": valor_sessao,
+        "ocupa_sala": None if ocupa_sala is None else bool(ocupa_sala),
+        "conta_no_teto": None if conta_no_teto is None else bool(conta_no_teto),
+        "participacao_lucro": participacao_lucro,
+    }
+    campos = {k: v for k, v in campos.items() if v is not None}
+    if not campos:
+        return
+
+    query = f"UPDATE profissionais SET {', '.join(f'{k} = %s' for k in campos)} WHERE id = %s"
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, [*campos.values(), id])
+        conn.commit()
+
+
+@escrita("profissionais")
+def salvar_profissionais_em_lote(alteracoes):
+    """
+    Grava de uma vez vários profissionais editados (lista de dicts com id e
+    todos os campos de COLUNAS_PROFISSIONAIS).
+
+    Uma conexão e uma transação para o lote inteiro (e uma única invalidação
+    do cache): se uma linha falhar (ex.: nome repetido), nenhuma é gravada.
+    Retorna o nº de linhas enviadas.
+    """
+    if not alteracoes:
+        return 0
+
+    query = """
+        UPDATE profissionais
+        SET nome = %s, sessoes_mes = %s, valor_sessao = %s, ocupa_sala = %s, conta_no_teto = %s, participacao_lucro = %s
+        WHERE id = %s
+    """
+    linhas = [
+        (
+            a["nome"].strip(),
+            int(a["sessoes_mes"]),
+            a["valor_sessao"],
+            bool(a["ocupa_sala"]),
+            bool(a["conta_no_teto"]),
+            a["participacao_lucro"],
+            int(a["id"]),
+        )
+        for a in alteracoes
+    ]
+
+    with get_mysql_conn() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.executemany(query, linhas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return len(linhas)
+
+
+@escrita("profissionais")
+def excluir_profissional(profissional_id):
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM profissionais WHERE id = %s", (profissional_id,))
+        conn.commit()
+
+
+# =========================
+# Índices
+# =========================
+# tabela -> [(nome do índice, colunas)]; usados pelas consultas quentes (ver verificar_indices.py)
+INDICES = {
+    "plano_estrategico": [
+        # filtro por categoria (+ status) e ordenação por prazo na página de tarefas
+        ("idx_plano_categoria_status_prazo", "categoria, status, data_limite"),
+        # contagem por status e listagens por prazo sem categoria
+        ("idx_plano_status_prazo", "status, data_limite"),
+    ],
+}
+
+
+def criar_indices():
+    """Cria os índices de INDICES que ainda não existem. Idempotente."""
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            for tabela, indices in INDICES.items():
+                existentes = dialeto().indices(cursor, tabela)
+                for nome, colunas in indices:
+                    if nome not in existentes:
+                        cursor.execute(f"CREATE INDEX {nome} ON {tabela} ({dialeto().colunas_indice(colunas)})")
+        conn.commit()
@@ -0,0 +1,284 @@
+"""
+Medição dos acessos ao banco por rerun do Streamlit.
+
+Com uma medição ativa na thread (`iniciar_rerun`), cada conexão pega por
+`get_mysql_conn()` e cada consulta feita nos cursores dela ficam registradas:
+função do repositório que abriu a conexão, de onde ela foi chamada (página e
+linha), SQL, tempo e linhas lidas. Também entram os commits e os acertos do
+cache de leituras. Sem medição ativa, o custo é uma consulta a um
+thread-local por conexão.
+
+Liga com `?debug=1` na URL ou com a variável de ambiente debug_banco=1. O
+painel vai para a sidebar e, no fim do rerun, a medição é exportada como uma
+linha JSON no logger "pitch_neuropsi.banco" (e no arquivo de
+instrumentacao_arquivo, se definido).
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger("pitch_neuropsi.banco")
+
+# frames destes arquivos não contam como "origem" de uma chamada ao banco
+_ARQUIVOS_INTERNOS = {"functions.py", "instrumentacao.py", "armazenamento.py", "migracoes.py"}
+SQL_MAX_CARACTERES = 200
+
+_local = threading.local()
+
+
+# =========================
+# Medição
+# =========================
+class MedicaoBanco:
+    """O que um rerun fez no banco: conexões, consultas, commits e leituras em cache."""
+
+    def __init__(self, rotulo: str):
+        self.rotulo = rotulo
+        self.iniciada_em = datetime.now()
+        self._inicio = time.perf_counter()
+        self.conexoes = []  # {funcao, origem, espera_ms}
+        self.consultas = []  # {funcao, origem, sql, tempo_ms, linhas, lote}
+        self.commits = []  # {funcao, tempo_ms}
+        self.cache = []  # {funcao, acerto}
+
+    def registrar_conexao(self, funcao, origem, espera_s):
+        self.conexoes.append({"funcao": funcao, "origem": origem, "espera_ms": espera_s * 1000})
+
+    def registrar_consulta(self, funcao, origem, sql, tempo_s, lote=1):
+        consulta = {
+            "funcao": funcao,
+            "origem": origem,
+            "sql": " ".join(sql.split())[:SQL_MAX_CARACTERES],
+            "tempo_ms": tempo_s * 1000,
+            "linhas": 0,
+            "lote": lote,
+        }
+        self.consultas.append(consulta)
+        return consulta
+
+    def registrar_commit(self, funcao, tempo_s):
+        self.commits.append({"funcao": funcao, "tempo_ms": tempo_s * 1000})
+
+    def registrar_cache(self, funcao, acerto):
+        self.cache.append({"funcao": funcao, "acerto": bool(acerto)})
+
+    @property
+    def duracao_ms(self) -> float:
+        return (time.perf_counter() - self._inicio) * 1000
+
+    def totais(self) -> dict:
+        return {
+            "conexoes": len(self.conexoes),
+            "consultas": len(self.consultas),
+            "linhas": sum(c["linhas"] for c in self.consultas),
+            "commits": len(self.commits),
+            "tempo_banco_ms": round(
+                sum(c["tempo_ms"] for c in self.consultas)
+                + sum(c["espera_ms"] for c in self.conexoes)
+                + sum(c["tempo_ms"] for c in self.commits),
+                3,
+            ),
+            "cache_acertos": sum(c["acerto"] for c in self.cache),
+            "cache_faltas": sum(not c["acerto"] for c in self.cache),
+            "rerun_ms": round(self.duracao_ms, 3),
+        }
+
+    def por_funcao(self) -> pd.DataFrame:
+        """
+        Uma linha por função do repositório, da que mais gastou tempo para a
+        que menos. Várias conexões da mesma função num rerun costumam ser um
+        N+1 (a função chamada dentro de um loop da página).
+        """
+        colunas = ["funcao", "conexoes", "consultas", "linhas", "tempo_ms", "tempo_max_ms", "commits", "cache_acertos", "origens"]
+        conexoes = pd.DataFrame(self.conexoes, columns=["funcao", "origem", "espera_ms"])
+        consultas = pd.DataFrame(self.consultas, columns=["funcao", "origem", "sql", "tempo_ms", "linhas", "lote"])
+        commits = pd.DataFrame(self.commits, columns=["funcao", "tempo_ms"])
+        cache = pd.DataFrame(self.cache, columns=["funcao", "acerto"])
+
+        funcoes = sorted(set(conexoes["funcao"]) | set(cache["funcao"]))
+        if not funcoes:
+            return pd.DataFrame(columns=colunas)
+        por_conexao = conexoes.groupby("funcao")
+        por_consulta = consultas.groupby("funcao")
+        resumo = pd.DataFrame({
+            "conexoes": por_conexao.size(),
+            "consultas": por_consulta.size(),
+            "linhas": por_consulta["linhas"].sum(),
+            "tempo_ms": por_consulta["tempo_ms"].sum().add(por_conexao["espera_ms"].sum(), fill_value=0),
+            "tempo_max_ms": por_consulta["tempo_ms"].max(),
+            "commits": commits.groupby("funcao").size(),
+            "cache_acertos": cache.groupby("funcao")["acerto"].sum(),
+            "origens": por_conexao["origem"].agg(lambda o: ", ".join(sorted(set(o)))),
+        }, index=pd.Index(funcoes, name="funcao"))
+        inteiras = ["conexoes", "consultas", "linhas", "commits", "cache_acertos"]
+        resumo[inteiras] = resumo[inteiras].fillna(0).astype(int)
+        resumo[["tempo_ms", "tempo_max_ms"]] = resumo[["tempo_ms", "tempo_max_ms"]].fillna(0.0).round(3)
+        resumo["origens"] = resumo["origens"].fillna("")
+        return resumo.reset_index().sort_values("tempo_ms", ascending=False, ignore_index=True)[colunas]
+
+    def como_dict(self) -> dict:
+        return {
+            "rotulo": self.rotulo,
+            "iniciada_em": self.iniciada_em.isoformat(timespec="milliseconds"),
+            "totais": self.totais(),
+            "por_funcao": self.por_funcao().to_dict(orient="records"),
+            "consultas": [{**c, "tempo_ms": round(c["tempo_ms"], 3)} for c in self.consultas],
+        }
+
+
+def iniciar_medicao(rotulo: str) -> MedicaoBanco:
+    medicao = MedicaoBanco(rotulo)
+    _local.medicao = medicao
+    return medicao
+
+
+def encerrar_medicao() -> "MedicaoBanco | None":
+    medicao, _local.medicao = getattr(_local, "medicao", None), None
+    return medicao
+
+
+def medicao_atual() -> "MedicaoBanco | None":
+    return getattr(_local, "medicao", None)
+
+
+def origem_da_chamada() -> str:
+    """arquivo:linha do primeiro frame fora do repositório (a página ou o script que chamou)."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        arquivo = Path(frame.f_code.co_filename).name
+        if arquivo not in _ARQUIVOS_INTERNOS:
+            return f"{arquivo}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "?"
+
+
+# =========================
+# Cursor medido
+# =========================
+class CursorMedido:
+    """Repassa tudo para o cursor do backend, medindo execute/executemany e contando as linhas lidas."""
+
+    def __init__(self, cursor, medicao: MedicaoBanco, funcao: str, origem: str):
+        self._cursor = cursor
+        self._medicao = medicao
+        self._funcao = funcao
+        self._origem = origem
+        self._ultima = None
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._cursor.__exit__(exc_type, exc, tb)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def execute(self, sql, params=None):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._ultima = self._medicao.registrar_consulta(self._funcao, self._origem, sql, time.perf_counter() - inicio)
+
+    def executemany(self, sql, seq_params):
+        seq_params = list(seq_params)
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params)
+        finally:
+            self._ultima = self._medicao.registrar_consulta(
+                self._funcao, self._origem, sql, time.perf_counter() - inicio, lote=len(seq_params)
+            )
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        if linha is not None and self._ultima is not None:
+            self._ultima["linhas"] += 1
+        return linha
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        if self._ultima is not None:
+            self._ultima["linhas"] += len(linhas)
+        return linhas
+
+
+# =========================
+# Exportação e painel
+# =========================
+def exportar(medicao: MedicaoBanco) -> str:
+    """Uma linha JSON com a medição: vai para o logger e, se configurado, para instrumentacao_arquivo."""
+    linha = json.dumps(medicao.como_dict(), ensure_ascii=False, default=str)
+    logger.info(linha)
+    arquivo = os.getenv("instrumentacao_arquivo")
+    if arquivo:
+        with open(arquivo, "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
+    return linha
+
+
+def debug_ligado() -> bool:
+    if os.getenv("debug_banco", "").strip().lower() in ("1", "true", "sim"):
+        return True
+    import streamlit as st
+
+    return st.query_params.get("debug") == "1"
+
+
+def iniciar_rerun(rotulo: str) -> "MedicaoBanco | None":
+    """No topo da página: começa a medir se o debug estiver ligado (e descarta a medição de um rerun anterior)."""
+    encerrar_medicao()
+    return iniciar_medicao(rotulo) if debug_ligado() else None
+
+
+def painel_debug(medicao: "MedicaoBanco | None") -> None:
+    """No fim da página: mostra a medição na sidebar e exporta o log do rerun."""
+    if medicao is None:
+        return
+    import streamlit as st
+
+    encerrar_medicao()
+    totais = medicao.totais()
+    linha_json = exportar(medicao)
+
+    with st.sidebar.expander("🐞 Banco neste rerun", expanded=False):
+        c1, c2 = st.columns(2)
+        c1.metric("Conexões", totais["conexoes"])
+        c2.metric("Consultas", totais["consultas"])
+        c1.metric("Linhas lidas", totais["linhas"])
+        c2.metric("Commits", totais["commits"])
+        c1.metric("Tempo no banco", f"{totais['tempo_banco_ms']:.1f} ms")
+        c2.metric("Rerun", f"{totais['rerun_ms']:.0f} ms")
+        st.caption(f"Cache de leituras: {totais['cache_acertos']} acertos, {totais['cache_faltas']} faltas")
+
+        por_funcao = medicao.por_funcao()
+        if por_funcao.empty:
+            st.info("Nenhum acesso ao banco neste rerun.")
+        else:
+            st.dataframe(por_funcao, hide_index=True, use_container_width=True)
+            repetidas = por_funcao[por_funcao["conexoes"] > 1]
+            for _, r in repetidas.iterrows():
+                st.warning(f"`{r['funcao']}` abriu {r['conexoes']} conexões neste rerun (N+1?) — {r['origens']}")
+
+            st.markdown("**Consultas mais lentas**")
+            consultas = pd.DataFrame(medicao.consultas).sort_values("tempo_ms", ascending=False).head(10)
+            st.dataframe(consultas[["funcao", "tempo_ms", "linhas", "lote", "sql"]], hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "⬇️ Exportar JSON",
+            linha_json,
+            file_name=f"banco_{medicao.rotulo}_{medicao.iniciada_em:%Y%m%d_%H%M%S}.json",
+            mime="application/json",
+        )
@@ -0,0 +1,116 @@
+"""
+Migrações versionadas do schema.
+
+Cada migração tem um número; as já aplicadas ficam registradas na tabela
+`schema_version`. `garantir_schema()` aplica as pendentes uma única vez por
+processo e guarda as capacidades do schema (ex.: se `despesas` já tem as
+colunas de período), então as páginas não rodam DDL nem introspecção a cada
+rerun.
+"""
+import threading
+
+from functions import (
+    get_mysql_conn,
+    backend,
+    dialeto,
+    criar_tabela_plano_estrategico,
+    criar_tabela_despesas,
+    criar_tabela_categorias,
+    criar_tabela_responsaveis,
+    migrar_tabela_despesas_add_campos_periodo,
+    migrar_ids_auto_increment,
+    criar_tabela_profissionais,
+    seed_profissionais,
+    migrar_tarefa_responsavel,
+    criar_indices,
+    migrar_versionamento_tarefas,
+)
+
+# nome do lock que evita dois processos migrando ao mesmo tempo
+LOCK_MIGRACOES = "pitch_neuropsi_migracoes"
+
+
+def _m001_tabelas_base():
+    criar_tabela_plano_estrategico()
+    criar_tabela_despesas()
+    criar_tabela_categorias()
+    criar_tabela_responsaveis()
+
+
+def _m004_profissionais():
+    criar_tabela_profissionais()
+    seed_profissionais()
+
+
+# (versão, descrição, função). Novas migrações entram sempre no final.
+MIGRACOES = [
+    (1, "Tabelas base (plano, despesas, categorias, responsáveis)", _m001_tabelas_base),
+    (2, "despesas: colunas mes_inicio/duracao_meses", migrar_tabela_despesas_add_campos_periodo),
+    (3, "ids com AUTO_INCREMENT", migrar_ids_auto_increment),
+    (4, "Tabela de profissionais (com a equipe inicial)", _m004_profissionais),
+    (5, "Tabela tarefa_responsavel (preenchida a partir do texto)", migrar_tarefa_responsavel),
+    (6, "Índices compostos de plano_estrategico", criar_indices),
+    (7, "plano_estrategico: colunas row_version/updated_at", migrar_versionamento_tarefas),
+]
+
+_lock = threading.Lock()
+_capacidades = {}  # backend -> capacidades do schema dele
+
+
+def aplicar_migracoes():
+    """Aplica as migrações pendentes e retorna a lista de versões aplicadas agora."""
+    aplicadas_agora = []
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    versao INT PRIMARY KEY,
+                    descricao VARCHAR(255),
+                    aplicada_em DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            if not dialeto().obter_lock(cursor, LOCK_MIGRACOES, 60):
+                raise RuntimeError("Não foi possível obter o lock de migrações (outro processo migrando?).")
+            try:
+                cursor.execute("SELECT versao FROM schema_version")
+                ja_aplicadas = {r["versao"] for r in cursor.fetchall()}
+
+                for versao, descricao, migracao in MIGRACOES:
+                    if versao in ja_aplicadas:
+                        continue
+                    migracao()
+                    cursor.execute(
+                        "INSERT INTO schema_version (versao, descricao) VALUES (%s, %s)",
+                        (versao, descricao),
+                    )
+                    conn.commit()
+                    aplicadas_agora.append(versao)
+            finally:
+                dialeto().liberar_lock(cursor, LOCK_MIGRACOES)
+    return aplicadas_agora
+
+
+def _ler_capacidades():
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT MAX(versao) AS versao FROM schema_version")
+            versao = cursor.fetchone()["versao"] or 0
+            cols_despesas = dialeto().colunas(cursor, "despesas")
+    return {
+        "versao": versao,
+        "tem_periodo": ("mes_inicio" in cols_despesas) and ("duracao_meses" in cols_despesas),
+    }
+
+
+def garantir_schema():
+    """
+    Na primeira chamada do processo: aplica migrações pendentes e lê as
+    capacidades do schema. Nas seguintes, só devolve o que foi guardado.
+    """
+    atual = backend()
+    if atual not in _capacidades:
+        with _lock:
+            if atual not in _capacidades:
+                aplicar_migracoes()
+                _capacidades[atual] = _ler_capacidades()
+    return dict(_capacidades[atual])
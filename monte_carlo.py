@@ -0,0 +1,139 @@
+"""
+Projeção Monte Carlo da clínica.
+
+Roda N cenários de uma vez sobre o motor de `simulacao.projetar_lote`, com
+crescimento de clientes, churn, no-show e valor da sessão sorteados de
+distribuições configuráveis. O resultado traz as faixas de percentis do
+Montante de Saúde e a probabilidade de atingir um valor até cada mês.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from simulacao import MatrizDespesas, ParametrosSimulacao, projetar_lote
+
+
+@dataclass(frozen=True)
+class Distribuicao:
+    """
+    Distribuição de um parâmetro sorteado.
+
+    tipo: "fixo" (sempre `valor`), "normal" (média `valor`, desvio `desvio`),
+    "uniforme" (entre `minimo` e `maximo`), "triangular" (`minimo`, `moda`,
+    `maximo`) ou "poisson" (média `valor`). `minimo`/`maximo`, quando
+    informados, também cortam os sorteios de "normal" e "poisson".
+    """
+    tipo: str = "fixo"
+    valor: float = 0.0
+    desvio: float = 0.0
+    minimo: float | None = None
+    maximo: float | None = None
+    moda: float | None = None
+
+    def sortear(self, rng: np.random.Generator, shape) -> np.ndarray:
+        if self.tipo == "fixo":
+            amostra = np.full(shape, float(self.valor))
+        elif self.tipo == "normal":
+            amostra = rng.normal(self.valor, self.desvio, shape)
+        elif self.tipo == "uniforme":
+            amostra = rng.uniform(self.minimo, self.maximo, shape)
+        elif self.tipo == "triangular":
+            amostra = rng.triangular(self.minimo, self.moda, self.maximo, shape)
+        elif self.tipo == "poisson":
+            amostra = rng.poisson(self.valor, shape).astype(float)
+        else:
+            raise ValueError(f"Distribuição desconhecida: {self.tipo!r}")
+
+        if self.minimo is not None or self.maximo is not None:
+            amostra = np.clip(amostra, self.minimo, self.maximo)
+        return amostra
+
+
+@dataclass(frozen=True)
+class ConfigMonteCarlo:
+    n_cenarios: int = 10_000
+    # clientes novos por mês (sorteado mês a mês em cada cenário)
+    crescimento: Distribuicao = field(default_factory=lambda: Distribuicao("poisson", valor=5, minimo=0))
+    # fração dos clientes que sai a cada mês (um valor por cenário)
+    churn: Distribuicao = field(default_factory=lambda: Distribuicao("fixo", valor=0.0))
+    # fração das sessões que não acontecem (um valor por cenário)
+    no_show: Distribuicao = field(default_factory=lambda: Distribuicao("fixo", valor=0.0))
+    # valor da sessão (um valor por cenário)
+    valor_sessao: Distribuicao | None = None  # None = usa o valor de ParametrosSimulacao
+    semente: int | None = None
+    # > 1 divide os cenários entre processos (vale a pena para N muito grande)
+    processos: int = 1
+
+
+@dataclass
+class ResultadoMonteCarlo:
+    meses: np.ndarray
+    montante_saude: np.ndarray  # (cenário × mês)
+
+    def percentis(self, qs=(5, 25, 50, 75, 95)) -> pd.DataFrame:
+        """Faixas de percentis do Montante de Saúde por mês (colunas P5, P25, ...)."""
+        valores = np.percentile(self.montante_saude, qs, axis=0)
+        dados = {"Mês": self.meses}
+        dados.update({f"P{q}": valores[i] for i, q in enumerate(qs)})
+        return pd.DataFrame(dados)
+
+    def prob_atingir(self, alvo: float) -> np.ndarray:
+        """Probabilidade de o montante já ter atingido `alvo` até cada mês."""
+        atingiu = np.logical_or.accumulate(self.montante_saude >= alvo, axis=1)
+        return atingiu.mean(axis=0)
+
+    def prob_atingir_ate(self, alvo: float, mes: int) -> float:
+        mes = int(np.clip(mes, 1, len(self.meses)))
+        return float(self.prob_atingir(alvo)[mes - 1])
+
+
+def rodar_monte_carlo(
+    params: ParametrosSimulacao,
+    despesas: "pd.DataFrame | MatrizDespesas",
+    config: ConfigMonteCarlo = ConfigMonteCarlo(),
+) -> ResultadoMonteCarlo:
+    matriz = despesas if isinstance(despesas, MatrizDespesas) else MatrizDespesas(despesas, params.max_meses)
+    sementes = np.random.SeedSequence(config.semente)
+
+    if config.processos <= 1:
+        montante = _rodar_bloco(params, matriz, config, config.n_cenarios, sementes)
+    else:
+        tamanhos = [len(b) for b in np.array_split(np.arange(config.n_cenarios), config.processos) if len(b)]
+        with ProcessPoolExecutor(max_workers=config.processos) as executor:
+            blocos = executor.map(
+                _rodar_bloco,
+                [params] * len(tamanhos),
+                [matriz] * len(tamanhos),
+                [config] * len(tamanhos),
+                tamanhos,
+                sementes.spawn(len(tamanhos)),
+            )
+            montante = np.concatenate(list(blocos), axis=0)
+
+    return ResultadoMonteCarlo(meses=np.arange(1, params.max_meses + 1), montante_saude=montante)
+
+
+def _rodar_bloco(params, matriz, config, n_cenarios, semente) -> np.ndarray:
+    rng = np.random.default_rng(semente)
+    n_meses = params.max_meses
+
+    crescimento = np.maximum(0, np.rint(config.crescimento.sortear(rng, (n_cenarios, n_meses)))).astype(np.int64)
+    churn = np.clip(config.churn.sortear(rng, n_cenarios), 0.0, 1.0)
+    no_show = np.clip(config.no_show.sortear(rng, n_cenarios), 0.0, 1.0)
+
+    variacoes = {}
+    if config.valor_sessao is not None:
+        variacoes["valor_sessao"] = np.maximum(0.0, config.valor_sessao.sortear(rng, n_cenarios))
+
+    r = projetar_lote(
+        params,
+        matriz,
+        variacoes=variacoes,
+        crescimento_mensal=crescimento,
+        churn=churn,
+        no_show=no_show,
+        rng=rng,
+    )
+    return r["montante_saude"]
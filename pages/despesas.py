@@ -1,54 +1,31 @@
 import streamlit as st
 import pandas as pd
-from functions import criar_tabela_despesas,adicionar_despesa,atualizar_despesa,excluir_despesa,get_mysql_conn,migrar_tabela_despesas_add_campos_periodo
+from functions import adicionar_despesa,salvar_despesas_em_lote,excluir_despesa,carregar_despesas,DespesasExcluidas
+from instrumentacao import iniciar_rerun, painel_debug
+from migracoes import garantir_schema
 
 st.set_page_config(page_title="Despesas Globais", layout="wide")
 st.title("💰 Cadastro de Despesas Globais da Clínica")
+medicao_banco = iniciar_rerun("despesas")  # ?debug=1 liga o painel de acessos ao banco
 
 # ------------------------------------------------------------
-# Criar tabela e (opcional) migrar colunas
+# Schema (migrações rodam uma vez por processo)
 # ------------------------------------------------------------
-criar_tabela_despesas()
-
-st.markdown("### 🛠️ Estrutura do Banco (Despesas)")
-col_m1, col_m2 = st.columns([1, 3])
-with col_m1:
-    if st.button("➕ Criar colunas de período"):
-        try:
-            migrar_tabela_despesas_add_campos_periodo()
-            st.success("OK! Colunas criadas/atualizadas: mes_inicio, duracao_meses.")
-            st.rerun()
-        except Exception as e:
-            st.error(f"Erro ao atualizar tabela despesas: {e}")
-with col_m2:
-    st.caption("Se ainda não tiver rodado a migração, clique no botão acima (é seguro rodar mais de uma vez).")
-
-
-def colunas_existentes() -> set:
-    with get_mysql_conn() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute("SHOW COLUMNS FROM despesas")
-            cols = cursor.fetchall()
-            return {c["Field"] for c in cols}
+try:
+    SCHEMA = garantir_schema()
+except Exception as e:
+    st.error(f"Erro ao preparar as tabelas do banco: {e}")
+    st.stop()
 
-
-COLS = colunas_existentes()
-TEM_PERIODO = ("mes_inicio" in COLS) and ("duracao_meses" in COLS)
+TEM_PERIODO = SCHEMA["tem_periodo"]
 
 if not TEM_PERIODO:
-    st.info("Sua tabela ainda não tem colunas de período. Clique em **Criar colunas de período** para habilitar início e duração.")
+    st.info("Sua tabela ainda não tem colunas de período (mes_inicio, duracao_meses). Verifique as migrações do banco.")
 
 
 # ------------------------------------------------------------
 # Carregar dados
 # ------------------------------------------------------------
-def carregar_despesas():
-    with get_mysql_conn() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM despesas ORDER BY id")
-            return pd.DataFrame(cursor.fetchall())
-
-
 df_despesas = carregar_despesas()
 
 
@@ -92,6 +69,7 @@ with st.form("form_add_despesa", clear_on_submit=True):
 st.markdown("### 🧾 Despesas Cadastradas")
 
 total_mes1 = 0.0
+alteracoes = []  # edições pendentes; só vão para o banco ao clicar em "Salvar alterações"
 
 def despesa_ativa_no_mes(mes: int, inicio: int, duracao_meses) -> bool:
     # duracao_meses None -> infinito
@@ -140,19 +118,15 @@ for _, row in df_despesas.iterrows():
         )
 
         if mudou:
-            try:
-                duracao_meses = None if int(nova_duracao) == 0 else int(nova_duracao)
-                atualizar_despesa(
-                    id_despesa,
-                    nome=novo_nome,
-                    valor=float(novo_valor),
-                    mes_inicio=int(novo_inicio),
-                    duracao_meses=duracao_meses,
-                )
-            except TypeError:
-                st.error("Seu functions.py ainda não foi atualizado para aceitar mes_inicio/duracao_meses em atualizar_despesa().")
-            except Exception as e:
-                st.error(f"Erro ao atualizar despesa {id_despesa}: {e}")
+            alteracoes.append(
+                {
+                    "id": id_despesa,
+                    "nome": novo_nome,
+                    "valor": float(novo_valor),
+                    "mes_inicio": int(novo_inicio),
+                    "duracao_meses": None if int(nova_duracao) == 0 else int(nova_duracao),
+                }
+            )
 
     else:
         col1, col2, col3 = st.columns([3, 2, 1])
@@ -161,13 +135,35 @@ for _, row in df_despesas.iterrows():
         remover = col3.button("🗑️ Remover", key=f"remove_{id_despesa}")
 
         if novo_nome != nome_atual or float(novo_valor) != float(valor_atual):
-            atualizar_despesa(id_despesa, nome=novo_nome, valor=float(novo_valor))
+            alteracoes.append({"id": id_despesa, "nome": novo_nome, "valor": float(novo_valor)})
 
     if remover:
         excluir_despesa(id_despesa)
         st.rerun()
 
 
+# ------------------------------------------------------------
+# Salvar edições (uma transação para todas)
+# ------------------------------------------------------------
+if alteracoes:
+    st.warning(f"✏️ {len(alteracoes)} despesa(s) com alterações não salvas.")
+    col_s1, col_s2 = st.columns([1, 1])
+    if col_s1.button("💾 Salvar alterações", type="primary"):
+        try:
+            salvar_despesas_em_lote(alteracoes, com_periodo=TEM_PERIODO)
+            st.success(f"{len(alteracoes)} despesa(s) atualizada(s)!")
+            st.rerun()
+        except DespesasExcluidas as e:
+            st.error(f"⚠️ Nada foi salvo: outra pessoa excluiu despesas que você editou. Recarregue a página. ({e})")
+        except Exception as e:
+            st.error(f"Erro ao salvar alterações: {e}")
+    if col_s2.button("↩️ Descartar alterações"):
+        for a in alteracoes:
+            for prefixo in ("nome", "valor", "inicio", "dur"):
+                st.session_state.pop(f"{prefixo}_{a['id']}", None)
+        st.rerun()
+
+
 # ------------------------------------------------------------
 # Total + session_state
 # ------------------------------------------------------------
@@ -181,3 +177,9 @@ else:
     st.subheader(f"💵 Total de despesas fixas: R$ {total_mes1:,.2f}")
     st.session_state["custo_fixo_inicial"] = float(total_mes1)
     st.info("Esse valor será usado como custo fixo inicial no simulador financeiro.")
+
+
+# ------------------------------------------------------------
+# Debug: acessos ao banco neste rerun
+# ------------------------------------------------------------
+painel_debug(medicao_banco)
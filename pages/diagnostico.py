@@ -0,0 +1,83 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from perfil_execucao import historico_padrao
+
+st.set_page_config(page_title="Diagnóstico", layout="wide")
+st.title("⏱️ Diagnóstico de Desempenho")
+
+historico = historico_padrao()
+
+st.caption(
+    "Tempos dos últimos reruns do simulador neste processo (todas as sessões), por etapa. "
+    "Abra o simulador com `?profile=1` (cProfile) ou `?profile=amostragem` na URL para capturar um perfil do rerun."
+)
+
+df_reruns = historico.reruns()
+if df_reruns.empty:
+    st.info("Nenhum rerun registrado ainda: abra o simulador para gerar medições.")
+    st.stop()
+
+
+# ------------------------------------------------------------
+# Resumo por etapa
+# ------------------------------------------------------------
+paginas = sorted(df_reruns["pagina"].unique())
+pagina = st.selectbox("Página", paginas, index=paginas.index("app") if "app" in paginas else 0)
+resumo = historico.resumo(pagina)
+df_pagina = df_reruns[df_reruns["pagina"] == pagina]
+
+total = resumo[resumo["etapa"] == "total"].iloc[0]
+col1, col2, col3 = st.columns(3)
+col1.metric("Reruns", int(total["reruns"]))
+col2.metric("p50 do rerun", f"{total['p50_ms']:.0f} ms")
+col3.metric("p95 do rerun", f"{total['p95_ms']:.0f} ms")
+
+st.dataframe(
+    resumo,
+    column_config={
+        "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+        "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+        "max_ms": st.column_config.NumberColumn("máx (ms)", format="%.1f"),
+        "ultimo_ms": st.column_config.NumberColumn("último (ms)", format="%.1f"),
+    },
+    hide_index=True,
+    use_container_width=True,
+)
+
+
+# ------------------------------------------------------------
+# Reruns recentes
+# ------------------------------------------------------------
+st.markdown("### 📊 Reruns recentes")
+N_RERUNS_GRAFICO = 100
+recentes = sorted(df_pagina["em"].unique())[-N_RERUNS_GRAFICO:]
+etapas = df_pagina[(df_pagina["etapa"] != "total") & df_pagina["em"].isin(recentes)]
+# o que o rerun gastou fora das etapas medidas (widgets, métricas, Monte Carlo...)
+totais = df_pagina[(df_pagina["etapa"] == "total") & df_pagina["em"].isin(recentes)].set_index("em")["ms"]
+fora = totais.sub(etapas.groupby("em")["ms"].sum(), fill_value=0).clip(lower=0).rename("ms").reset_index().assign(etapa="outros")
+grafico = pd.concat([etapas, fora], ignore_index=True)
+fig = px.bar(grafico, x="em", y="ms", color="etapa", labels={"em": "Rerun", "ms": "ms"})
+fig.update_layout(template="plotly_white", bargap=0.1)
+st.plotly_chart(fig, use_container_width=True)
+
+
+# ------------------------------------------------------------
+# Perfis capturados
+# ------------------------------------------------------------
+st.markdown("### 🔬 Perfis capturados")
+perfis = historico.perfis()
+if not perfis:
+    st.caption("Nenhum perfil capturado (use `?profile=1` ou `?profile=amostragem` no simulador).")
+for p in reversed(perfis):
+    with st.expander(f"{p['em']:%d/%m %H:%M:%S} · {p['pagina']} · {p['modo']} · {p['total_ms']:.0f} ms"):
+        st.code(p["relatorio"], language=None)
+
+
+# ------------------------------------------------------------
+# Limpar
+# ------------------------------------------------------------
+st.markdown("---")
+if st.button("🗑️ Limpar histórico"):
+    historico.limpar()
+    st.rerun()
@@ -1,4 +1,6 @@
-from functions import listar_tarefas, adicionar_tarefa, atualizar_tarefa, criar_tabela_plano_estrategico, atualizar_titulo_categoria, criar_tabela_categorias, criar_tabela_responsaveis, seed_categorias_e_responsaveis, adicionar_categoria, adicionar_responsavel, listar_categorias, listar_responsaveis
+from functions import contar_tarefas, contar_tarefas_por_status, progresso_por_categoria, listar_tarefas_pagina, adicionar_tarefa, atualizar_tarefa_completa, ConflitoDeVersao, adicionar_categoria, adicionar_responsavel, listar_categorias, listar_responsaveis, pendentes_por_responsavel, listar_tarefas_do_responsavel
+from instrumentacao import iniciar_rerun, painel_debug
+from migracoes import garantir_schema
 
 from datetime import datetime, date
 import streamlit as st
@@ -6,10 +8,9 @@ import pandas as pd
 
 st.set_page_config(page_title="Dashboard da Clínica", layout="wide")
 st.title("💾 Painel de Acompanhamento do Planejamento")
+medicao_banco = iniciar_rerun("plano_estrategico")  # ?debug=1 liga o painel de acessos ao banco
 
-criar_tabela_plano_estrategico()
-criar_tabela_categorias()
-criar_tabela_responsaveis()
+garantir_schema()  # DDL/migrações só na primeira execução do processo
 
 st.markdown("""
     <style>
@@ -100,135 +101,206 @@ with st.expander("📚 Cadastros", expanded=False):
                 st.warning("Preencha todos os campos para adicionar.")
 
 
+# quantas tarefas por página (a categoria aberta é paginada)
+OPCOES_POR_PAGINA = [10, 25, 50]
+# chaves dos widgets do formulário de uma tarefa (+ a versão lida)
+PREFIXOS_FORM_TAREFA = ("t", "cat", "resp", "date", "chk", "versao")
+
+
+def descartar_form_tarefa(tarefa_id):
+    # no próximo rerun o formulário volta a mostrar o que está no banco
+    for prefixo in PREFIXOS_FORM_TAREFA:
+        st.session_state.pop(f"{prefixo}_{tarefa_id}", None)
+
+
+def render_tarefa(row, responsaveis_disponiveis):
+    with st.form(f"form_tarefa_{row['id']}"):
+        tarefa_id = row["id"]
+        # versão da tarefa quando o formulário apareceu: se outra pessoa gravar
+        # antes do "Atualizar", a gravação é recusada em vez de sobrescrever
+        if f"versao_{tarefa_id}" not in st.session_state:
+            st.session_state[f"versao_{tarefa_id}"] = int(row["row_version"])
+        # já está convertido; se vier NaT, usa hoje
+        parsed_date = row["data_limite"] if isinstance(row["data_limite"], date) else date.today()
+        dias_restantes = (parsed_date - date.today()).days
+
+        col1, col2, col3, col4, col5, col6, col7 = st.columns([4, 2, 2, 2, 1.3, 1.5, 0.5])
+        with col1:
+            novo_titulo = st.text_input("📝 Tarefa", value=row["tarefa"], key=f"t_{tarefa_id}")
+        with col2:
+            st.text_input(
+                "📁 Categoria",
+                value=row["categoria"],
+                key=f"cat_{tarefa_id}",
+                disabled=True
+            )
+            nova_categoria = row["categoria"]  # mantém compatibilidade com o resto do código
+        with col3:
+            responsaveis_selecionados = st.multiselect(
+                "Responsáveis",
+                responsaveis_disponiveis,
+                default=row["responsaveis"].split(", ") if row["responsaveis"] else [],
+                key=f"resp_{tarefa_id}"
+            )
+            responsaveis_txt = ", ".join(responsaveis_selecionados)
+        with col4:
+            data_limite = st.date_input("📆 Data limite", value=parsed_date, key=f"date_{tarefa_id}")
+        with col5:
+            st.markdown("Check")
+            status_val = "OK" if row["status"] == "OK" else ("URGENTE" if dias_restantes < 0 else "PENDENTE")
+            checked = st.checkbox("", value=(status_val == "OK"), key=f"chk_{tarefa_id}")
+            novo_status = "OK" if checked else ("URGENTE" if dias_restantes < 0 else "PENDENTE")
+        with col6:
+            if novo_status == "OK":
+                st.success("✅ Concluído")
+            elif dias_restantes < 0:
+                st.error(f"🚨 {-dias_restantes}d atraso")
+            elif dias_restantes <= 3:
+                st.warning(f"⚠️ {dias_restantes}d")
+            else:
+                st.success(f"⏳ {dias_restantes}d")
+        with col7:
+            if st.form_submit_button("🗑️"):
+                from functions import excluir_tarefa
+                excluir_tarefa(tarefa_id)
+                descartar_form_tarefa(tarefa_id)
+                st.rerun()
+
+        alterou = (
+            row["tarefa"] != novo_titulo
+            or row["categoria"] != nova_categoria
+            or row["status"] != novo_status
+            or row["responsaveis"] != responsaveis_txt
+            or str(row["data_limite"]) != data_limite.isoformat()
+        )
+
+        if st.form_submit_button("📂 Atualizar"):
+            if alterou:
+                try:
+                    st.session_state[f"versao_{tarefa_id}"] = atualizar_tarefa_completa(
+                        tarefa_id,
+                        st.session_state[f"versao_{tarefa_id}"],
+                        novo_titulo,
+                        nova_categoria,
+                        novo_status,
+                        data_limite,
+                        responsaveis_txt,
+                    )
+                except ConflitoDeVersao as e:
+                    descartar_form_tarefa(tarefa_id)
+                    st.session_state["aviso_tarefas"] = (
+                        f"⚠️ \"{novo_titulo}\" não foi salva: outra pessoa alterou ou excluiu a tarefa antes. "
+                        f"O formulário foi recarregado com a versão atual. ({e})"
+                    )
+                else:
+                    st.success(f"🔄 Atualizado: {novo_titulo}")
+                st.rerun()
+
+
 # 🔽 Abas principais
 aba1, aba2 = st.tabs(["📜 Planejamento", "👥 Resumo por Responsável"])
 
 with aba1:
     st.header("📜 Tarefas por Categoria")
-    df_db = listar_tarefas()
+    if "aviso_tarefas" in st.session_state:
+        st.warning(st.session_state.pop("aviso_tarefas"))
+    # contagens e progresso vêm agregados do banco; só a página visível traz linhas
+    por_status = contar_tarefas_por_status()
 
     df_resps = listar_responsaveis()
     responsaveis_disponiveis = df_resps["nome"].tolist()
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("✅ Concluídas", sum(df_db["status"] == "OK"))
+        st.metric("✅ Concluídas", por_status.get("OK", 0))
     with col2:
-        st.metric("⚠️ Pendentes", sum(df_db["status"] == "PENDENTE"))
+        st.metric("⚠️ Pendentes", por_status.get("PENDENTE", 0))
     with col3:
-        st.metric("🚨 Urgentes", sum(df_db["status"] == "URGENTE"))
+        st.metric("🚨 Urgentes", por_status.get("URGENTE", 0))
 
-    for categoria in sorted(df_db["categoria"].unique()):
-        with st.expander(f"📂 {categoria}"):
-            # ✅ filtra e prepara para ordenar
-            cat_df = df_db[df_db["categoria"] == categoria].copy()
+    # progresso de todas as categorias numa tabela só; formulários só da categoria aberta
+    progresso = progresso_por_categoria()
 
-            # garante data válida
-            cat_df["data_limite"] = pd.to_datetime(cat_df["data_limite"], errors="coerce").dt.date
+    if progresso.empty:
+        st.info("Nenhuma tarefa cadastrada.")
+    else:
+        st.dataframe(
+            progresso,
+            column_config={
+                "categoria": "📂 Categoria",
+                "total": "Tarefas",
+                "concluidas": "Concluídas",
+                "progresso": st.column_config.ProgressColumn("Progresso", format="percent", min_value=0, max_value=1),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
 
-            # dias restantes (negativo = atrasado)
-            cat_df["dias_restantes"] = cat_df["data_limite"].apply(
-                lambda d: (d - date.today()).days if pd.notnull(d) else 999999
+        resumo_cat = progresso.set_index("categoria")
+        col_f1, col_f2, col_f3 = st.columns([3, 1.5, 1])
+        with col_f1:
+            categoria = st.selectbox(
+                "📂 Abrir categoria",
+                resumo_cat.index.tolist(),
+                format_func=lambda c: f"{c} ({resumo_cat.at[c, 'concluidas']}/{resumo_cat.at[c, 'total']})",
             )
+        with col_f2:
+            mostrar_concluidas = st.checkbox("Mostrar concluídas", value=False)
+        with col_f3:
+            por_pagina = st.selectbox("Por página", OPCOES_POR_PAGINA)
 
-            # 0 = pendente/urgente, 1 = OK (assim OK vai para o final)
-            cat_df["status_order"] = (cat_df["status"] == "OK").astype(int)
-
-            # 🔽 ordenação: primeiro pendentes/urgentes; dentro deles, mais atrasados primeiro,
-            # depois os que estão por vencer (dias_restantes crescendo). OK ficam no final.
-            cat_df = cat_df.sort_values(
-                by=["status_order", "dias_restantes", "data_limite"],
-                ascending=[True, True, True]
-            )
+        # filtro e ordenação (pendentes/urgentes primeiro, mais atrasadas antes) ficam no banco
+        total_tarefas = contar_tarefas(categoria, incluir_concluidas=mostrar_concluidas)
+        total_paginas = max(1, -(-total_tarefas // por_pagina))
+        pagina = st.number_input(
+            f"Página (de {total_paginas})",
+            min_value=1,
+            max_value=total_paginas,
+            value=1,
+            key=f"pagina_{categoria}_{mostrar_concluidas}_{por_pagina}",
+        )
+        inicio = (pagina - 1) * por_pagina
 
-            total_cat = len(cat_df)
-            concluidas = sum(cat_df["status"] == "OK")
-            progresso = int((concluidas / total_cat) * 100) if total_cat else 0
-            st.progress(progresso / 100, f"{progresso}% concluído ({concluidas}/{total_cat})")
-
-            for _, row in cat_df.iterrows():
-                with st.form(f"form_tarefa_{row['id']}"):
-                    tarefa_id = row["id"]
-                    # já está convertido acima; se vier NaT, usa hoje
-                    parsed_date = row["data_limite"] if isinstance(row["data_limite"], date) else date.today()
-                    dias_restantes = int(row["dias_restantes"])
-
-                    dias_restantes = (parsed_date - date.today()).days
-
-                    col1, col2, col3, col4, col5, col6, col7 = st.columns([4, 2, 2, 2, 1.3, 1.5, 0.5])
-                    with col1:
-                        novo_titulo = st.text_input("📝 Tarefa", value=row["tarefa"], key=f"t_{tarefa_id}")
-                    with col2:
-                        st.text_input(
-                            "📁 Categoria",
-                            value=row["categoria"],
-                            key=f"cat_{tarefa_id}",
-                            disabled=True
-                        )
-                        nova_categoria = row["categoria"]  # mantém compatibilidade com o resto do código
-                    with col3:
-                        responsaveis_selecionados = st.multiselect(
-                            "Responsáveis",
-                            responsaveis_disponiveis,
-                            default=row["responsaveis"].split(", ") if row["responsaveis"] else [],
-                            key=f"resp_{tarefa_id}"
-                        )
-                        responsaveis_txt = ", ".join(responsaveis_selecionados)
-                    with col4:
-                        data_limite = st.date_input("📆 Data limite", value=parsed_date, key=f"date_{tarefa_id}")
-                    with col5:
-                        st.markdown("Check")
-                        status_val = "OK" if row["status"] == "OK" else ("URGENTE" if dias_restantes < 0 else "PENDENTE")
-                        checked = st.checkbox("", value=(status_val == "OK"), key=f"chk_{tarefa_id}")
-                        novo_status = "OK" if checked else ("URGENTE" if dias_restantes < 0 else "PENDENTE")
-                    with col6:
-                        if novo_status == "OK":
-                            st.success("✅ Concluído")
-                        elif dias_restantes < 0:
-                            st.error(f"🚨 {-dias_restantes}d atraso")
-                        elif dias_restantes <= 3:
-                            st.warning(f"⚠️ {dias_restantes}d")
-                        else:
-                            st.success(f"⏳ {dias_restantes}d")
-                    with col7:
-                        if st.form_submit_button("🗑️"):
-                            from functions import excluir_tarefa
-                            excluir_tarefa(tarefa_id)
-                            st.rerun()
-
-                    alterou = (
-                        row["tarefa"] != novo_titulo
-                        or row["categoria"] != nova_categoria
-                        or row["status"] != novo_status
-                        or row["responsaveis"] != responsaveis_txt
-                        or str(row["data_limite"]) != data_limite.isoformat()
-                    )
+        pagina_df = listar_tarefas_pagina(categoria, mostrar_concluidas, limite=por_pagina, offset=inicio)
+        # garante data válida
+        pagina_df["data_limite"] = pd.to_datetime(pagina_df["data_limite"], errors="coerce").dt.date
 
-                    if st.form_submit_button("📂 Atualizar"):
-                        if alterou:
-                            atualizar_tarefa(tarefa_id, novo_status, data_limite, responsaveis_txt)
-                            atualizar_titulo_categoria(tarefa_id, novo_titulo, nova_categoria)
-                            st.success(f"🔄 Atualizado: {novo_titulo}")
-                            st.rerun()
+        if pagina_df.empty:
+            st.success("🎉 Nenhuma tarefa pendente nesta categoria.")
+        else:
+            st.caption(f"Mostrando {inicio + 1}–{inicio + len(pagina_df)} de {total_tarefas} tarefas.")
+        for _, row in pagina_df.iterrows():
+            render_tarefa(row, responsaveis_disponiveis)
 
 with aba2:
     st.header("📌 Tarefas Pendentes por Responsável")
-    df_db = listar_tarefas()
-    pendentes_df = df_db[df_db["status"] != "OK"].copy()
-    pendentes_df["responsaveis"] = pendentes_df["responsaveis"].fillna("")
-    pendentes_df["responsaveis"] = pendentes_df["responsaveis"].apply(lambda x: [r.strip() for r in x.split(",") if r.strip()])
-    pendentes_exploded = pendentes_df.explode("responsaveis")
+    # contagem agregada no banco; as tarefas só da pessoa aberta (busca pelo índice)
+    resumo_resp = pendentes_por_responsavel()
 
-    if pendentes_exploded.empty:
+    if resumo_resp.empty:
         st.success("🎉 Nenhuma tarefa pendente ou urgente!")
     else:
-        for responsavel in sorted(pendentes_exploded["responsaveis"].dropna().unique()):
-            with st.expander(f"👤 {responsavel}"):
-                tarefas = pendentes_exploded[
-                    pendentes_exploded["responsaveis"] == responsavel
-                ][["categoria", "tarefa", "status", "data_limite"]].sort_values(by="data_limite")
-
-                for _, row in tarefas.iterrows():
-                    status_emoji = "⚠️" if row["status"] == "PENDENTE" else "🚨"
-                    st.markdown(
-                        f"- **[{row['categoria']}]** {row['tarefa']} — `{row['data_limite']}` {status_emoji}"
-                    )
+        st.dataframe(
+            resumo_resp[["nome", "pendentes", "urgentes"]],
+            column_config={"nome": "👤 Responsável", "pendentes": "⚠️ Pendentes", "urgentes": "🚨 Urgentes"},
+            hide_index=True,
+            use_container_width=True,
+        )
+        resp_por_id = resumo_resp.set_index("id")
+        responsavel_id = st.selectbox(
+            "👤 Ver tarefas de",
+            resp_por_id.index.tolist(),
+            format_func=lambda i: f"{resp_por_id.at[i, 'nome']} ({resp_por_id.at[i, 'pendentes']})",
+        )
+
+        tarefas = listar_tarefas_do_responsavel(responsavel_id)
+        for _, row in tarefas.iterrows():
+            status_emoji = "⚠️" if row["status"] == "PENDENTE" else "🚨"
+            st.markdown(
+                f"- **[{row['categoria']}]** {row['tarefa']} — `{row['data_limite']}` {status_emoji}"
+            )
+
+
+# ------------------------------------------------------------
+# Debug: acessos ao banco neste rerun
+# ------------------------------------------------------------
+painel_debug(medicao_banco)
@@ -0,0 +1,127 @@
+import streamlit as st
+from functions import adicionar_profissional, excluir_profissional, listar_profissionais, salvar_profissionais_em_lote
+from instrumentacao import iniciar_rerun, painel_debug
+from migracoes import garantir_schema
+
+st.set_page_config(page_title="Profissionais", layout="wide")
+st.title("👩‍⚕️ Equipe Fixa da Clínica")
+medicao_banco = iniciar_rerun("profissionais")  # ?debug=1 liga o painel de acessos ao banco
+
+# ------------------------------------------------------------
+# Schema (migrações rodam uma vez por processo)
+# ------------------------------------------------------------
+try:
+    garantir_schema()
+except Exception as e:
+    st.error(f"Erro ao preparar as tabelas do banco: {e}")
+    st.stop()
+
+st.caption(
+    "Cada profissional entra na simulação com suas sessões/mês e valor (salário fixo, menos o imposto), "
+    "a participação no lucro positivo do mês, se ocupa sala e se suas horas contam no teto de sessões disponíveis."
+)
+
+df_profissionais = listar_profissionais()
+
+
+# ------------------------------------------------------------
+# Formulário: adicionar profissional
+# ------------------------------------------------------------
+st.markdown("### ➕ Adicionar profissional")
+
+with st.form("form_add_profissional", clear_on_submit=True):
+    col1, col2, col3, col4 = st.columns([2.4, 1.2, 1.2, 1.2])
+    nome = col1.text_input("Nome")
+    sessoes = col2.number_input("Sessões/mês", min_value=0, value=0)
+    valor = col3.number_input("Valor sessão (R$)", min_value=0.0, step=10.0, value=0.0)
+    participacao = col4.number_input("Participação no lucro (%)", min_value=0.0, max_value=100.0, value=0.0) / 100
+    col5, col6 = st.columns(2)
+    ocupa_sala = col5.checkbox("Ocupa sala")
+    conta_no_teto = col6.checkbox("Conta no teto de sessões")
+
+    submitted = st.form_submit_button("➕ Adicionar profissional")
+
+    if submitted:
+        if not nome.strip():
+            st.warning("Informe um nome.")
+        elif nome.strip() in set(df_profissionais["nome"]):
+            st.warning(f"Já existe um profissional chamado '{nome.strip()}'.")
+        else:
+            try:
+                adicionar_profissional(nome, sessoes, valor, ocupa_sala, conta_no_teto, participacao)
+                st.success(f"Profissional '{nome.strip()}' adicionado!")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Erro ao adicionar profissional: {e}")
+
+
+# ------------------------------------------------------------
+# Lista / edição
+# ------------------------------------------------------------
+st.markdown("### 📋 Profissionais cadastrados")
+
+if df_profissionais.empty:
+    st.info("Nenhum profissional cadastrado.")
+
+alteracoes = []  # edições pendentes; só vão para o banco ao clicar em "Salvar alterações"
+
+for _, row in df_profissionais.iterrows():
+    id_prof = row["id"]
+    col1, col2, col3, col4, col5, col6, col7 = st.columns([2.4, 1.2, 1.2, 1.2, 1, 1, 1])
+    novo_nome = col1.text_input("Nome", value=row["nome"], key=f"prof_nome_{id_prof}")
+    novas_sessoes = col2.number_input("Sessões/mês", value=int(row["sessoes_mes"]), min_value=0, key=f"prof_sessoes_{id_prof}")
+    novo_valor = col3.number_input("Valor (R$)", value=float(row["valor_sessao"]), min_value=0.0, step=10.0, key=f"prof_valor_{id_prof}")
+    nova_participacao = col4.number_input(
+        "Lucro (%)",
+        value=float(row["participacao_lucro"]) * 100,
+        min_value=0.0,
+        max_value=100.0,
+        key=f"prof_part_{id_prof}",
+    ) / 100
+    novo_ocupa = col5.checkbox("Ocupa sala", value=bool(row["ocupa_sala"]), key=f"prof_sala_{id_prof}")
+    novo_teto = col6.checkbox("No teto", value=bool(row["conta_no_teto"]), key=f"prof_teto_{id_prof}")
+    remover = col7.button("🗑️ Remover", key=f"prof_remove_{id_prof}")
+
+    novo = {
+        "nome": novo_nome.strip(),
+        "sessoes_mes": int(novas_sessoes),
+        "valor_sessao": float(novo_valor),
+        "participacao_lucro": round(float(nova_participacao), 4),
+        "ocupa_sala": bool(novo_ocupa),
+        "conta_no_teto": bool(novo_teto),
+    }
+    if any(novo[k] != row[k] for k in novo):
+        alteracoes.append({"id": id_prof, **novo})
+
+    if remover:
+        excluir_profissional(id_prof)
+        st.rerun()
+
+if alteracoes:
+    st.warning(f"✏️ {len(alteracoes)} profissional(is) com alterações não salvas.")
+    if st.button("💾 Salvar alterações", type="primary"):
+        try:
+            salvos = salvar_profissionais_em_lote(alteracoes)
+            st.success(f"{salvos} profissional(is) atualizado(s)!")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Erro ao salvar alterações: {e}")
+
+
+# ------------------------------------------------------------
+# Resumo
+# ------------------------------------------------------------
+st.markdown("---")
+participacao_total = df_profissionais["participacao_lucro"].sum()
+col1, col2, col3 = st.columns(3)
+col1.metric("Profissionais", len(df_profissionais))
+col2.metric("Ocupam sala", int(df_profissionais["ocupa_sala"].sum()))
+col3.metric("Participação total no lucro", f"{participacao_total:.0%}")
+if participacao_total > 1:
+    st.warning("A soma das participações passa de 100% do lucro.")
+
+
+# ------------------------------------------------------------
+# Debug: acessos ao banco neste rerun
+# ------------------------------------------------------------
+painel_debug(medicao_banco)
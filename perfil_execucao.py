@@ -0,0 +1,271 @@
+"""
+Tempos por etapa dos reruns do app, com histórico em memória e perfil opcional.
+
+Cada rerun mede suas etapas (`with perfil.etapa("simular"): ...`) e, ao
+terminar, entra num histórico do processo (os últimos perfil_historico_max
+reruns), de onde a página Diagnóstico tira p50/p95 por etapa.
+
+Com `?profile=1` (ou `?profile=cprofile`) na URL o rerun roda sob o cProfile;
+com `?profile=amostragem`, uma thread amostra a pilha do script a cada poucos
+milissegundos (custo bem menor, bom para reruns longos). O relatório aparece
+no fim da página e fica guardado para a página Diagnóstico.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MODOS_PERFIL = {"1": "cprofile", "cprofile": "cprofile", "amostragem": "amostragem"}
+LINHAS_RELATORIO = 40
+
+
+# =========================
+# Histórico
+# =========================
+class HistoricoTempos:
+    """Últimos reruns (tempo de cada etapa) e últimos relatórios de perfil, compartilhados pelas sessões."""
+
+    def __init__(self, max_reruns: int = 500, max_perfis: int = 10):
+        self._reruns = deque(maxlen=max_reruns)
+        self._perfis = deque(maxlen=max_perfis)
+        self._lock = threading.Lock()
+
+    def registrar(self, rerun: dict) -> None:
+        with self._lock:
+            self._reruns.append(rerun)
+
+    def registrar_perfil(self, perfil: dict) -> None:
+        with self._lock:
+            self._perfis.append(perfil)
+
+    def reruns(self) -> pd.DataFrame:
+        """Uma linha por (rerun, etapa): em, pagina, etapa, ms. A etapa "total" é o rerun inteiro."""
+        with self._lock:
+            reruns = list(self._reruns)
+        linhas = [
+            {"em": r["em"], "pagina": r["pagina"], "etapa": etapa, "ms": ms}
+            for r in reruns
+            for etapa, ms in [*r["etapas"].items(), ("total", r["total_ms"])]
+        ]
+        return pd.DataFrame(linhas, columns=["em", "pagina", "etapa", "ms"])
+
+    def resumo(self, pagina: str | None = None) -> pd.DataFrame:
+        """p50/p95/máximo por etapa (na ordem em que as etapas rodam)."""
+        df = self.reruns()
+        if pagina is not None:
+            df = df[df["pagina"] == pagina]
+        colunas = ["etapa", "reruns", "p50_ms", "p95_ms", "max_ms", "ultimo_ms"]
+        if df.empty:
+            return pd.DataFrame(columns=colunas)
+        grupos = df.groupby("etapa", sort=False)["ms"]
+        resumo = pd.DataFrame({
+            "reruns": grupos.size(),
+            "p50_ms": grupos.quantile(0.50),
+            "p95_ms": grupos.quantile(0.95),
+            "max_ms": grupos.max(),
+            "ultimo_ms": grupos.last(),
+        }).round(1)
+        return resumo.reset_index()[colunas]
+
+    def perfis(self) -> list[dict]:
+        with self._lock:
+            return list(self._perfis)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._reruns.clear()
+            self._perfis.clear()
+
+
+_historico = None
+_historico_lock = threading.Lock()
+
+
+def historico_padrao() -> HistoricoTempos:
+    """Instância única por processo."""
+    global _historico
+    with _historico_lock:
+        if _historico is None:
+            _historico = HistoricoTempos(max_reruns=int(os.getenv("perfil_historico_max", "500")))
+        return _historico
+
+
+# =========================
+# Perfiladores
+# =========================
+class AmostradorPilhas:
+    """
+    Perfil por amostragem: uma thread lê a pilha da thread medida a cada
+    `intervalo_s` e conta em quantas amostras cada função aparece (inclusivo)
+    e em quantas ela está no topo (próprio).
+    """
+
+    def __init__(self, thread_id: int, intervalo_s: float = 0.005):
+        self.thread_id = thread_id
+        self.intervalo_s = intervalo_s
+        self.amostras = 0
+        self._inclusivo = Counter()
+        self._proprio = Counter()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, name="amostrador-perfil", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.amostras += 1
+            self._proprio[_nome_frame(frame)] += 1
+            vistos = set()
+            while frame is not None:
+                vistos.add(_nome_frame(frame))
+                frame = frame.f_back
+            self._inclusivo.update(vistos)
+
+    def parar(self) -> str:
+        self._parar.set()
+        self._thread.join()
+        if not self.amostras:
+            return "Nenhuma amostra (rerun curto demais)."
+        linhas = [f"{self.amostras} amostras a cada {self.intervalo_s * 1000:.0f} ms", "", f"{'incl.%':>7} {'próprio%':>9}  função"]
+        for nome, n in self._inclusivo.most_common(LINHAS_RELATORIO):
+            linhas.append(f"{100 * n / self.amostras:7.1f} {100 * self._proprio[nome] / self.amostras:9.1f}  {nome}")
+        return "\n".join(linhas)
+
+
+def _nome_frame(frame) -> str:
+    codigo = frame.f_code
+    return f"{Path(codigo.co_filename).name}:{codigo.co_firstlineno}({codigo.co_name})"
+
+
+def _relatorio_cprofile(perfilador: cProfile.Profile) -> str:
+    saida = io.StringIO()
+    pstats.Stats(perfilador, stream=saida).sort_stats("cumulative").print_stats(LINHAS_RELATORIO)
+    return saida.getvalue()
+
+
+# =========================
+# Rerun
+# =========================
+# perfis iniciados e ainda não finalizados, pela thread do script que os iniciou
+_ativos = {}
+_ativos_lock = threading.Lock()
+
+
+class PerfilRerun:
+    """
+    Tempos das etapas de um rerun (e o perfilador, se pedido). Usado como
+    context manager (`with perfil:`), finaliza mesmo quando o rerun é
+    interrompido por st.rerun(), st.stop() ou uma exceção.
+    """
+
+    def __init__(self, pagina: str, modo: str | None = None, historico: HistoricoTempos | None = None):
+        self.pagina = pagina
+        self.modo = modo
+        self.historico = historico or historico_padrao()
+        self.etapas = {}
+        self.relatorio = None
+        self._em = datetime.now()
+        self._inicio = time.perf_counter()
+        self._finalizado = False
+        self._thread_id = threading.get_ident()
+
+        self._perfilador = None
+        if modo == "cprofile":
+            self._perfilador = cProfile.Profile()
+            self._perfilador.enable()
+        elif modo == "amostragem":
+            self._perfilador = AmostradorPilhas(self._thread_id)
+            self._perfilador.iniciar()
+        with _ativos_lock:
+            _ativos[self._thread_id] = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finalizar()
+        return False
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """Soma ao tempo da etapa `nome` o tempo do bloco (uma etapa pode aparecer mais de uma vez)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + (time.perf_counter() - inicio) * 1000
+
+    def finalizar(self) -> dict:
+        """Fecha o rerun: para o perfilador e registra os tempos no histórico. Retorna o registro."""
+        total_ms = (time.perf_counter() - self._inicio) * 1000
+        registro = {"em": self._em, "pagina": self.pagina, "etapas": dict(self.etapas), "total_ms": total_ms}
+        if self._finalizado:
+            return registro
+        self._finalizado = True
+        with _ativos_lock:
+            if _ativos.get(self._thread_id) is self:
+                del _ativos[self._thread_id]
+
+        if isinstance(self._perfilador, cProfile.Profile):
+            self._perfilador.disable()
+            self.relatorio = _relatorio_cprofile(self._perfilador)
+        elif isinstance(self._perfilador, AmostradorPilhas):
+            self.relatorio = self._perfilador.parar()
+        if self.relatorio is not None:
+            self.historico.registrar_perfil({"em": self._em, "pagina": self.pagina, "modo": self.modo, "total_ms": total_ms, "relatorio": self.relatorio})
+
+        self.historico.registrar(registro)
+        return registro
+
+
+def encerrar_perfis_pendentes() -> None:
+    """
+    Finaliza os perfis que ficaram abertos nesta thread ou em threads que já
+    terminaram, parando o cProfile/amostrador deles (senão o cProfile desta
+    thread continua ligado e o próximo enable() falha).
+    """
+    vivas = {t.ident for t in threading.enumerate()}
+    atual = threading.get_ident()
+    with _ativos_lock:
+        pendentes = [p for thread_id, p in _ativos.items() if thread_id == atual or thread_id not in vivas]
+    for perfil in pendentes:
+        perfil.finalizar()
+
+
+def iniciar_perfil(pagina: str) -> PerfilRerun:
+    """
+    No topo da página: mede as etapas sempre e liga o perfilador se a URL
+    tiver ?profile=... O resto da página roda dentro de `with perfil:`.
+    """
+    import streamlit as st
+
+    encerrar_perfis_pendentes()
+    return PerfilRerun(pagina, MODOS_PERFIL.get(st.query_params.get("profile", "")))
+
+
+def painel_perfil(perfil: PerfilRerun) -> None:
+    """No fim da página: registra o rerun e, se houve perfil, mostra os tempos e o relatório."""
+    registro = perfil.finalizar()
+    if perfil.relatorio is None:
+        return
+    import streamlit as st
+
+    with st.expander(f"⏱️ Perfil deste rerun ({perfil.modo}, {registro['total_ms']:.0f} ms)", expanded=True):
+        etapas = pd.DataFrame(list(registro["etapas"].items()), columns=["etapa", "ms"]).round(1)
+        etapas["% do rerun"] = np.round(100 * etapas["ms"] / registro["total_ms"], 1)
+        st.dataframe(etapas, hide_index=True, use_container_width=True)
+        st.code(perfil.relatorio, language=None)
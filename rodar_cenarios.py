@@ -0,0 +1,228 @@
+"""
+Roda projeções em lote, sem Streamlit.
+
+Lê um arquivo de cenários (CSV ou JSON, um conjunto de parâmetros por
+linha/objeto, com os nomes dos campos de `ParametrosSimulacao`) e um
+snapshot das despesas, projeta todos os cenários em paralelo e grava:
+
+- projecao.<ext>: uma linha por cenário e mês (ou semana);
+- resumo_cenarios.<ext>: uma linha por cenário.
+
+Campos ausentes (ou vazios no CSV) usam o padrão de `ParametrosSimulacao`.
+Percentuais vão como fração, como no motor (porcent_clinica=0.6, não 60).
+Uma coluna/chave "cenario" opcional dá nome a cada cenário. A equipe fixa vai
+em "profissionais": lista de objetos com os campos de `Profissional` (no CSV,
+essa lista em JSON dentro da célula).
+
+Exemplo:
+    python rodar_cenarios.py cenarios.csv --despesas despesas.csv --saida resultados/
+Sem --despesas, as despesas são lidas do banco (mesmas variáveis de ambiente do app).
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from pathlib import Path
+
+import pandas as pd
+
+from cache_resultados import cache_padrao, checksum_despesas, chave_cenario
+from simulacao import RESOLUCOES, MatrizDespesas, ParametrosSimulacao, Profissional, projetar_em_blocos
+
+CAMPOS = {f.name: f for f in fields(ParametrosSimulacao)}
+COLUNA_CENARIO = "cenario"
+
+
+# =========================
+# Entrada
+# =========================
+def ler_tabela(caminho: Path) -> pd.DataFrame:
+    """CSV, JSON (lista de objetos) ou JSON Lines (.jsonl)."""
+    sufixo = caminho.suffix.lower()
+    if sufixo == ".csv":
+        return pd.read_csv(caminho)
+    if sufixo == ".jsonl":
+        return pd.read_json(caminho, lines=True)
+    if sufixo == ".json":
+        with open(caminho, encoding="utf-8") as f:
+            return pd.DataFrame(json.load(f))
+    raise ValueError(f"Formato não suportado: {caminho.name} (use .csv, .json ou .jsonl)")
+
+
+def ler_cenarios(caminho: Path) -> list[tuple[str, ParametrosSimulacao]]:
+    df = ler_tabela(caminho)
+    desconhecidas = set(df.columns) - set(CAMPOS) - {COLUNA_CENARIO}
+    if desconhecidas:
+        raise ValueError(f"Colunas desconhecidas em {caminho.name}: {', '.join(sorted(desconhecidas))}")
+
+    cenarios = []
+    for i, linha in enumerate(df.to_dict(orient="records"), start=1):
+        nome = linha.pop(COLUNA_CENARIO, None)
+        nome = str(i) if nome is None or pd.isna(nome) else str(nome)
+        valores = {campo: _converter(campo, v) for campo, v in linha.items() if not _vazio(v)}
+        cenarios.append((nome, ParametrosSimulacao(**valores)))
+    return cenarios
+
+
+def _vazio(valor):
+    return valor is None or (not isinstance(valor, (list, tuple)) and pd.isna(valor))
+
+
+def _converter(campo, valor):
+    if campo == "profissionais":
+        lista = json.loads(valor) if isinstance(valor, str) else valor
+        return tuple(Profissional(**p) for p in lista)
+    tipo = CAMPOS[campo].type
+    if tipo in (int, "int"):
+        return int(valor)
+    if tipo in (float, "float"):
+        return float(valor)
+    return str(valor)
+
+
+def ler_despesas(caminho: Path | None) -> pd.DataFrame:
+    if caminho is not None:
+        return ler_tabela(caminho)
+    from functions import carregar_despesas  # só precisa do banco sem snapshot
+
+    return carregar_despesas()
+
+
+# =========================
+# Execução
+# =========================
+def rodar_cenario(
+    nome: str,
+    params: ParametrosSimulacao,
+    matriz: MatrizDespesas,
+    resolucao: str,
+    alvo: float,
+    checksum: str | None = None,
+):
+    """
+    Projeção de um cenário -> (linhas por período, resumo do cenário).
+
+    Com `checksum` (das despesas), a projeção passa pelo cache de resultados,
+    o mesmo usado pelo app.
+    """
+    def calcular():
+        return pd.concat(list(projetar_em_blocos(params, matriz, resolucao=resolucao)), ignore_index=True)
+
+    if checksum is None:
+        projecao = calcular()
+    else:
+        projecao = cache_padrao().obter_ou_calcular(chave_cenario(params, checksum, resolucao=resolucao), calcular)
+    projecao.insert(0, COLUNA_CENARIO, nome)
+    return projecao, resumir_cenario(nome, params, projecao, alvo)
+
+
+def resumir_cenario(nome: str, params: ParametrosSimulacao, projecao: pd.DataFrame, alvo: float) -> dict:
+    montante = projecao["Montante de Saúde (R$)"].to_numpy()
+    atingiu = montante >= alvo
+    return {
+        COLUNA_CENARIO: nome,
+        "meses": params.max_meses,
+        "mes_breakeven": int(projecao["Mês"].iloc[atingiu.argmax()]) if atingiu.any() else None,
+        "meses_saldo_positivo": int((projecao.groupby("Mês")["Montante de Saúde (R$)"].last() >= 0).sum()),
+        "montante_final": float(montante[-1]),
+        "caixa_minimo": float(montante.min()),
+        "mes_caixa_minimo": int(projecao["Mês"].iloc[montante.argmin()]),
+        "lucro_total": float(projecao["Lucro (R$)"].sum()),
+        "clientes_finais": int(projecao["Clientes"].iloc[-1]),
+        "psicologos_finais": int(projecao["Psicólogos"].iloc[-1]),
+    }
+
+
+def rodar_cenarios(
+    cenarios: list[tuple[str, ParametrosSimulacao]],
+    despesas: pd.DataFrame,
+    resolucao: str = "Mensal",
+    alvo: float = 250_000.0,
+    processos: int = 1,
+    usar_cache: bool = True,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Roda todos os cenários (em `processos` processos) e junta os resultados na ordem de entrada."""
+    if not cenarios:
+        return pd.DataFrame(), pd.DataFrame()
+    # a matriz de despesas cobre o maior horizonte e é compartilhada por todos
+    matriz = MatrizDespesas(despesas, max(p.max_meses for _, p in cenarios))
+    n = len(cenarios)
+    checksum = checksum_despesas(despesas) if usar_cache else None
+    args = (
+        [nome for nome, _ in cenarios],
+        [p for _, p in cenarios],
+        [matriz] * n,
+        [resolucao] * n,
+        [alvo] * n,
+        [checksum] * n,
+    )
+
+    if processos <= 1 or n == 1:
+        resultados = list(map(rodar_cenario, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(rodar_cenario, *args, chunksize=max(1, n // (processos * 4))))
+
+    projecoes = pd.concat([p for p, _ in resultados], ignore_index=True)
+    resumo = pd.DataFrame([r for _, r in resultados])
+    return projecoes, resumo
+
+
+# =========================
+# Saída
+# =========================
+def formato_saida(pedido: str) -> str:
+    tem_parquet = any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet"))
+    if pedido == "auto":
+        return "parquet" if tem_parquet else "csv"
+    if pedido == "parquet" and not tem_parquet:
+        raise SystemExit("Parquet requer pyarrow (pip install pyarrow); use --formato csv.")
+    return pedido
+
+
+def gravar(df: pd.DataFrame, destino: Path, formato: str) -> Path:
+    caminho = destino.with_suffix(f".{formato}")
+    if formato == "parquet":
+        df.to_parquet(caminho, index=False)
+    else:
+        df.to_csv(caminho, index=False)
+    return caminho
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Roda projeções da clínica em lote a partir de um arquivo de cenários.")
+    parser.add_argument("cenarios", type=Path, help="arquivo de cenários (.csv, .json ou .jsonl)")
+    parser.add_argument("--despesas", type=Path, help="snapshot das despesas (.csv/.json); sem ele, lê do banco")
+    parser.add_argument("--saida", type=Path, default=Path("resultados"), help="pasta de saída (padrão: resultados/)")
+    parser.add_argument("--formato", choices=["auto", "parquet", "csv"], default="auto")
+    parser.add_argument("--resolucao", choices=list(RESOLUCOES), default="Mensal")
+    parser.add_argument("--alvo", type=float, default=250_000.0, help="montante de breakeven para o resumo")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sem-cache", action="store_true", help="não lê nem grava o cache de resultados")
+    args = parser.parse_args(argv)
+
+    formato = formato_saida(args.formato)
+    cenarios = ler_cenarios(args.cenarios)
+    despesas = ler_despesas(args.despesas)
+
+    inicio = time.perf_counter()
+    projecoes, resumo = rodar_cenarios(cenarios, despesas, args.resolucao, args.alvo, args.processos, not args.sem_cache)
+    duracao = time.perf_counter() - inicio
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    arquivos = [
+        gravar(projecoes, args.saida / "projecao", formato),
+        gravar(resumo, args.saida / "resumo_cenarios", formato),
+    ]
+    print(f"{len(cenarios)} cenários em {duracao:.2f}s ({args.processos} processos).")
+    for caminho in arquivos:
+        print(f"  -> {caminho}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
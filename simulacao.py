@@ -0,0 +1,755 @@
+"""
+Motor de projeção financeira da clínica (sem Streamlit).
+
+Recebe os parâmetros da simulação (`ParametrosSimulacao`) e a tabela de
+despesas e devolve a projeção mês a mês como DataFrame, com as mesmas
+colunas exibidas no app. Pode ser usado fora do Streamlit (scripts, lotes).
+"""
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+
+# nomes “financeiros” que queremos acompanhar separadamente
+NOMES_FINANCEIROS = {"PRONAMPE", "BB GIRO 1", "BB GIRO 2", "INVESTIDOR"}
+
+TEMPO_SESSAO = 1  # horas
+SESSOES_POR_CLIENTE = 4  # sessões por cliente por mês
+
+
+@dataclass(frozen=True)
+class Profissional:
+    """
+    Psicólogo(a) da equipe fixa (não gera faturamento para a clínica).
+
+    ocupa_sala: atende na clínica, então suas horas ocupam salas.
+    conta_no_teto: suas horas saem das horas disponíveis para clientes.
+    participacao_lucro: fração do lucro positivo do mês somada ao salário.
+    """
+    nome: str
+    sessoes_mes: int = 0
+    valor_sessao: float = 0.0
+    ocupa_sala: bool = False
+    conta_no_teto: bool = False
+    participacao_lucro: float = 0.0
+
+
+PROFISSIONAIS_PADRAO = (
+    Profissional("Luiza", sessoes_mes=100, valor_sessao=300.0, ocupa_sala=True, participacao_lucro=0.5),
+    Profissional("Noelia", sessoes_mes=150, valor_sessao=350.0, participacao_lucro=0.5),
+)
+
+
+def profissionais_do_cadastro(df_profissionais: pd.DataFrame) -> tuple[Profissional, ...]:
+    """Linhas da tabela `profissionais` (ver functions.listar_profissionais) -> tupla de `Profissional`."""
+    colunas = [f.name for f in fields(Profissional)]
+    return tuple(Profissional(**linha) for linha in df_profissionais[colunas].to_dict(orient="records"))
+
+
+@dataclass(frozen=True)
+class ParametrosSimulacao:
+    # financeiro
+    valor_sessao: float = 300.0
+    porcent_clinica: float = 0.60
+    base_imposto: str = "Total do faturamento"
+    porcent_imposto: float = 0.15
+    investimento_inicial_saude: float = 0.0
+    investidor_inicio_mes: int = 8
+
+    # início da clínica
+    meses_sem_funcionar: int = 0
+    clientes_iniciais: int = 15
+
+    # equipe fixa
+    profissionais: tuple[Profissional, ...] = PROFISSIONAIS_PADRAO
+
+    # operacional
+    dias_uteis: int = 5
+    semanas: int = 4
+    horas_dia: int = 12
+    num_salas: int = 3
+
+    # projeção / expansão
+    clientes_crescimento: int = 5
+    clientes_por_psicologo: int = 0
+    capacidade_psicologo: int = 30
+    max_meses: int = 60
+
+    @property
+    def receita_clinica_bruta_por_sessao(self) -> float:
+        return self.valor_sessao * self.porcent_clinica
+
+    @property
+    def imposto_por_sessao(self) -> float:
+        return float(_imposto_por_sessao(self.valor_sessao, self.porcent_clinica, self.base_imposto, self.porcent_imposto))
+
+    @property
+    def receita_liquida_por_sessao(self) -> float:
+        return self.receita_clinica_bruta_por_sessao - self.imposto_por_sessao
+
+    @property
+    def horas_por_sala(self) -> float:
+        return self.horas_dia * self.dias_uteis * self.semanas
+
+    @property
+    def total_horas(self) -> float:
+        return self.horas_por_sala * self.num_salas
+
+    @property
+    def horas_no_teto(self) -> float:
+        """Horas da equipe fixa descontadas das horas disponíveis para clientes."""
+        equipe = _equipe(self.profissionais)
+        return float((equipe["horas"] * equipe["conta_no_teto"]).sum())
+
+    @property
+    def horas_em_sala(self) -> float:
+        """Horas da equipe fixa que ocupam salas."""
+        equipe = _equipe(self.profissionais)
+        return float((equipe["horas"] * equipe["ocupa_sala"]).sum())
+
+    @property
+    def profissionais_em_sala(self) -> int:
+        return int(_equipe(self.profissionais)["ocupa_sala"].sum())
+
+    @property
+    def horas_disponiveis(self) -> float:
+        return float(_horas_disponiveis(self.total_horas, self.horas_no_teto))
+
+    @property
+    def sessoes_disponiveis(self) -> float:
+        return self.horas_disponiveis / TEMPO_SESSAO
+
+
+# as duas regras abaixo valem elemento a elemento, para escalares ou arrays de cenários
+def _imposto_por_sessao(valor_sessao, porcent_clinica, base_imposto, porcent_imposto):
+    bruta = valor_sessao * porcent_clinica
+    return np.where(np.asarray(base_imposto) == "Apenas % da clínica", bruta * porcent_imposto, valor_sessao * porcent_imposto)
+
+
+def _horas_disponiveis(total_horas, horas_no_teto):
+    return np.maximum(0, total_horas - horas_no_teto)
+
+
+def _equipe(profissionais) -> dict[str, np.ndarray]:
+    # colunas da equipe como arrays (um valor por profissional)
+    return {
+        "horas": np.array([p.sessoes_mes for p in profissionais], dtype=float) * TEMPO_SESSAO,
+        "salario_fixo_bruto": np.array([p.sessoes_mes * p.valor_sessao for p in profissionais], dtype=float),
+        "ocupa_sala": np.array([p.ocupa_sala for p in profissionais], dtype=bool),
+        "conta_no_teto": np.array([p.conta_no_teto for p in profissionais], dtype=bool),
+        "participacao_lucro": np.array([p.participacao_lucro for p in profissionais], dtype=float),
+    }
+
+
+# =========================
+# Despesas
+# =========================
+class MatrizDespesas:
+    """
+    Cadastro de despesas pré-processado para a projeção.
+
+    Monta uma única vez a máscara de atividade (despesa × mês), a partir de
+    `mes_inicio`/`duracao_meses`, e o índice de agregação por nome. Depois
+    disso, o custo de qualquer nome/grupo em todos os meses sai de uma
+    redução vetorizada, sem percorrer as linhas do DataFrame.
+
+    Com `mes_inicial` > 1 a matriz cobre só a janela mes_inicial..max_meses,
+    o que mantém a memória constante em projeções longas feitas em blocos.
+    """
+
+    def __init__(self, df_despesas: pd.DataFrame | None, max_meses: int, mes_inicial: int = 1):
+        self.max_meses = int(max_meses)
+        self.mes_inicial = int(mes_inicial)
+        self.meses = np.arange(self.mes_inicial, self.max_meses + 1)
+
+        df = df_despesas if df_despesas is not None else pd.DataFrame()
+        n = len(df)
+
+        nomes = df["nome"] if "nome" in df else pd.Series([""] * n, dtype=object)
+        nomes = nomes.fillna("").astype(str).str.strip().str.upper()
+        valores = _coluna_numerica(df, "valor", n).fillna(0.0).to_numpy(dtype=float)
+
+        # mes_inicio vazio/0 = mês 1; duracao_meses NULL = infinito
+        inicio = _coluna_numerica(df, "mes_inicio", n).fillna(1.0).replace(0.0, 1.0).to_numpy(dtype=float)
+        duracao = _coluna_numerica(df, "duracao_meses", n).to_numpy(dtype=float)
+        fim = np.where(np.isnan(duracao), np.inf, inicio + duracao - 1)
+
+        # (despesa × mês)
+        self.ativo = (self.meses >= inicio[:, None]) & (self.meses <= fim[:, None])
+
+        # índice por nome: linhas ordenadas por código e somadas em blocos
+        codigos, uniques = pd.factorize(nomes.to_numpy(), sort=True)
+        self.nomes = [str(u) for u in uniques]
+        self._linha_por_nome = {nome: i for i, nome in enumerate(self.nomes)}
+
+        if n:
+            ordem = np.argsort(codigos, kind="stable")
+            valores_ativos = self.ativo[ordem] * valores[ordem, None]
+            inicios_bloco = np.flatnonzero(np.r_[True, np.diff(codigos[ordem]) != 0])
+            self.por_nome = np.add.reduceat(valores_ativos, inicios_bloco, axis=0)
+        else:
+            self.por_nome = np.zeros((0, len(self.meses)))
+
+    def cobre(self, mes_inicial: int, max_meses: int) -> bool:
+        return self.mes_inicial <= mes_inicial and self.max_meses >= max_meses
+
+    def soma_por_nome(self, nome_exato: str) -> np.ndarray:
+        """Total mensal das despesas com esse nome (comparação sem caixa/espaços)."""
+        i = self._linha_por_nome.get(nome_exato.strip().upper())
+        if i is None:
+            return np.zeros(len(self.meses))
+        return self.por_nome[i]
+
+    def soma_operacional(self, nomes_excluir: set[str]) -> np.ndarray:
+        """Total mensal de todas as despesas, exceto os nomes em `nomes_excluir`."""
+        manter = np.array([nome not in nomes_excluir for nome in self.nomes], dtype=bool)
+        return self.por_nome[manter].sum(axis=0) if manter.any() else np.zeros(len(self.meses))
+
+
+def _coluna_numerica(df: pd.DataFrame, coluna: str, n: int) -> pd.Series:
+    if coluna not in df:
+        return pd.Series(np.full(n, np.nan))
+    return pd.to_numeric(df[coluna], errors="coerce").astype(float)
+
+
+def soma_por_nome(df: pd.DataFrame, mes: int, nome_exato: str) -> float:
+    if df is None or df.empty:
+        return 0.0
+    return float(MatrizDespesas(df, mes).soma_por_nome(nome_exato)[mes - 1])
+
+
+def soma_operacional(df: pd.DataFrame, mes: int, nomes_excluir: set[str]) -> float:
+    if df is None or df.empty:
+        return 0.0
+    return float(MatrizDespesas(df, mes).soma_operacional(nomes_excluir)[mes - 1])
+
+
+def custos_por_mes(
+    despesas: "pd.DataFrame | MatrizDespesas",
+    max_meses: int,
+    investidor_inicio_mes: int,
+    mes_inicial: int = 1,
+) -> dict[str, np.ndarray]:
+    """
+    Custos de cada mês (mes_inicial..max_meses) a partir do cadastro de despesas.
+
+    Aceita o DataFrame do banco ou uma `MatrizDespesas` já montada (que pode
+    ser reaproveitada por várias projeções). Retorna arrays com: operacional,
+    pronampe, bb1, bb2, investidor e custo_fixo. O investidor só é pago a
+    partir de `investidor_inicio_mes`; se ele for um array (um valor por
+    cenário), investidor e custo_fixo saem como (cenário × mês).
+    """
+    matriz = _como_matriz(despesas, max_meses, mes_inicial)
+    janela = slice(mes_inicial - matriz.mes_inicial, max_meses - matriz.mes_inicial + 1)
+    meses = matriz.meses[janela]
+
+    operacional = matriz.soma_operacional(NOMES_FINANCEIROS)[janela]
+    pronampe = matriz.soma_por_nome("PRONAMPE")[janela]
+    bb1 = matriz.soma_por_nome("BB GIRO 1")[janela]
+    bb2 = matriz.soma_por_nome("BB GIRO 2")[janela]
+
+    investidor_db = matriz.soma_por_nome("INVESTIDOR")[janela]
+    # escalar -> (mês,); um valor por cenário -> (cenário × mês)
+    investidor = np.where(meses >= np.asarray(investidor_inicio_mes)[..., None], investidor_db, 0.0)
+
+    return {
+        "operacional": operacional,
+        "pronampe": pronampe,
+        "bb1": bb1,
+        "bb2": bb2,
+        "investidor": investidor,
+        "custo_fixo": operacional + pronampe + bb1 + bb2 + investidor,
+    }
+
+
+def _como_matriz(despesas, max_meses: int, mes_inicial: int = 1) -> MatrizDespesas:
+    if isinstance(despesas, MatrizDespesas):
+        if not despesas.cobre(mes_inicial, max_meses):
+            raise ValueError(
+                f"MatrizDespesas cobre os meses {despesas.mes_inicial}..{despesas.max_meses}, "
+                f"mas a projeção pede {mes_inicial}..{max_meses}."
+            )
+        return despesas
+    return MatrizDespesas(despesas, max_meses, mes_inicial)
+
+
+# =========================
+# Projeção
+# =========================
+def psicologos_dinamicos(clientes: np.ndarray, capacidade_psicologo, inicial=0) -> np.ndarray:
+    """
+    Nº acumulado de psicólogos contratados em cada mês.
+
+    Um novo grupo só é contratado quando os clientes estouram a capacidade
+    atual, então a contagem depende do mês anterior: o laço é sobre os meses
+    (último eixo) e vetorizado em todos os outros eixos (ex.: cenários).
+    `inicial` é a contagem vinda do mês anterior ao primeiro (projeção em blocos).
+    """
+    clientes = np.asarray(clientes)
+    capacidade = np.asarray(capacidade_psicologo)
+
+    saida = np.zeros(clientes.shape, dtype=np.int64)
+    n = np.broadcast_to(np.asarray(inicial, dtype=np.int64), clientes.shape[:-1]).copy()
+    for i in range(clientes.shape[-1]):
+        c = clientes[..., i]
+        estourou = c > n * capacidade
+        n = np.where(estourou, c // capacidade + 1, n)
+        saida[..., i] = n
+    return saida
+
+
+@dataclass(frozen=True)
+class EstadoProjecao:
+    """
+    Estado ao fim do mês `mes`: o suficiente para continuar a projeção dali.
+
+    Os campos são escalares ou arrays com um valor por cenário.
+    """
+    mes: int = 0
+    clientes: np.ndarray | int = 0
+    psicologos_dinamicos: np.ndarray | int = 0
+    lucro_acumulado: np.ndarray | float = 0.0
+    investidor_acum: np.ndarray | float = 0.0
+    pronampe_acum: np.ndarray | float = 0.0
+    bb1_acum: np.ndarray | float = 0.0
+    bb2_acum: np.ndarray | float = 0.0
+
+
+def projetar_lote(
+    params: ParametrosSimulacao,
+    despesas: "pd.DataFrame | MatrizDespesas",
+    variacoes: dict | None = None,
+    crescimento_mensal: np.ndarray | None = None,
+    churn: np.ndarray | None = None,
+    no_show: np.ndarray | None = None,
+    rng: np.random.Generator | None = None,
+    estado: EstadoProjecao | None = None,
+    ate_mes: int | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Roda várias projeções de uma vez, em arrays (cenário × mês).
+
+    `variacoes` troca campos de `params` por arrays com um valor por cenário
+    (ex.: {"valor_sessao": np.array([250, 300, 350])}). Opcionalmente:
+    `crescimento_mensal` (cenário × mês) substitui `clientes_crescimento` por
+    valores mês a mês, `churn` é a fração de clientes que sai a cada mês
+    (sorteada com `rng`) e `no_show` a fração de sessões que não acontecem.
+
+    Por padrão projeta os meses 1..params.max_meses. Com `estado` (o
+    `EstadoProjecao` devolvido por uma chamada anterior) continua do mês
+    seguinte a `estado.mes`, e `ate_mes` encerra antes do fim do horizonte;
+    `crescimento_mensal` então cobre só os meses dessa janela.
+
+    Retorna arrays que fazem broadcast para (cenário × mês): clientes,
+    psicologos (e só os psicologos_dinamicos), salas, sessoes, faturamento,
+    lucro, lucro_acumulado, montante_saude, os custos (operacional, pronampe,
+    bb1, bb2, investidor, custo_fixo) e seus acumulados (investidor_acum,
+    ...), além de `meses` e do `estado` final.
+    """
+    variacoes = variacoes or {}
+    estado = estado or EstadoProjecao()
+    ate_mes = params.max_meses if ate_mes is None else min(int(ate_mes), params.max_meses)
+    if ate_mes <= estado.mes:
+        raise ValueError(f"Nada a projetar: estado já está no mês {estado.mes} (até o mês {ate_mes}).")
+
+    def coluna(nome):
+        return np.asarray(variacoes.get(nome, getattr(params, nome))).reshape(-1, 1)
+
+    meses = np.arange(estado.mes + 1, ate_mes + 1)
+    custos = custos_por_mes(despesas, ate_mes, coluna("investidor_inicio_mes")[:, 0], mes_inicial=estado.mes + 1)
+
+    valor_sessao = coluna("valor_sessao")
+    imposto = _imposto_por_sessao(valor_sessao, coluna("porcent_clinica"), coluna("base_imposto"), coluna("porcent_imposto"))
+    receita_liquida = valor_sessao * coluna("porcent_clinica") - imposto
+
+    horas_por_sala = coluna("horas_dia") * coluna("dias_uteis") * coluna("semanas")
+    num_salas = coluna("num_salas")
+    horas_disp = _horas_disponiveis(horas_por_sala * num_salas, params.horas_no_teto)
+    sessoes_disp = horas_disp / TEMPO_SESSAO
+
+    inicio = coluna("meses_sem_funcionar") + 1
+    operando = meses >= inicio
+
+    if crescimento_mensal is None and churn is None:
+        clientes, dinamicos = _clientes_linear(params, coluna, meses, inicio, operando, estado)
+    else:
+        n_cenarios = max(
+            len(np.atleast_1d(x)) for x in [*variacoes.values(), crescimento_mensal, churn, no_show] if x is not None
+        )
+        if crescimento_mensal is None:
+            crescimento_mensal = np.broadcast_to(coluna("clientes_crescimento"), (n_cenarios, len(meses)))
+        clientes, dinamicos = _clientes_com_churn(
+            coluna, meses, inicio, np.asarray(crescimento_mensal), churn, rng or np.random.default_rng(), estado
+        )
+
+    sessoes = np.where(operando, np.minimum(clientes * SESSOES_POR_CLIENTE, sessoes_disp), 0)
+    if no_show is not None:
+        sessoes = sessoes * (1 - np.asarray(no_show).reshape(-1, 1))
+    faturamento = sessoes * receita_liquida
+    lucro = faturamento - custos["custo_fixo"]
+
+    salas = np.where(operando, np.minimum(num_salas, ((params.horas_em_sala + sessoes) // horas_por_sala).astype(int) + 1), 0)
+    psicologos = np.where(operando, params.profissionais_em_sala + dinamicos, 0)  # equipe em sala + dinâmicos
+
+    lucro_acumulado = _por_cenario(estado.lucro_acumulado) + np.cumsum(lucro, axis=-1)
+    montante_saude = coluna("investimento_inicial_saude") + lucro_acumulado
+    acumulados = {
+        f"{nome}_acum": _por_cenario(getattr(estado, f"{nome}_acum")) + np.cumsum(custos[nome], axis=-1)
+        for nome in ("investidor", "pronampe", "bb1", "bb2")
+    }
+
+    return {
+        "meses": meses,
+        "clientes": clientes,
+        "psicologos_dinamicos": dinamicos,
+        "psicologos": psicologos,
+        "salas": salas,
+        "sessoes": sessoes,
+        "faturamento": faturamento,
+        "lucro": lucro,
+        "lucro_acumulado": lucro_acumulado,
+        "montante_saude": montante_saude,
+        **custos,
+        **acumulados,
+        "estado": EstadoProjecao(
+            mes=int(ate_mes),
+            clientes=np.asarray(clientes)[..., -1],
+            psicologos_dinamicos=np.asarray(dinamicos)[..., -1],
+            lucro_acumulado=lucro_acumulado[..., -1],
+            **{nome: valores[..., -1] for nome, valores in acumulados.items()},
+        ),
+    }
+
+
+def _por_cenario(valor) -> np.ndarray:
+    # escalar ou um valor por cenário -> coluna (cenário × 1)
+    return np.asarray(valor).reshape(-1, 1)
+
+
+def _clientes_linear(params, coluna, meses, inicio, operando, estado):
+    # clientes crescem linearmente a partir do mês de início; no 1º mês de
+    # operação cada psicólogo contratado traz `clientes_por_psicologo` clientes
+    clientes_iniciais = coluna("clientes_iniciais")
+    capacidade = coluna("capacidade_psicologo")
+    clientes_base = np.where(operando, clientes_iniciais + (meses - inicio) * coluna("clientes_crescimento"), 0)
+    novos_no_inicio = np.where(clientes_iniciais > 0, clientes_iniciais // capacidade + 1, 0)
+    bonus = novos_no_inicio * coluna("clientes_por_psicologo")
+
+    # a checagem de capacidade do mês de início usa os clientes antes do bônus
+    clientes_checagem = np.where(meses > inicio, clientes_base + bonus, clientes_base)
+    dinamicos = psicologos_dinamicos(clientes_checagem, capacidade[:, 0], _por_cenario(estado.psicologos_dinamicos)[:, 0])
+    return np.where(operando, clientes_base + bonus, 0), dinamicos
+
+
+def _clientes_com_churn(coluna, meses, inicio, crescimento_mensal, churn, rng, estado):
+    # com saída de clientes (e/ou crescimento variável) não há forma fechada:
+    # o laço é sobre os meses, vetorizado nos cenários
+    n_cenarios = crescimento_mensal.shape[0]
+    inicio = np.broadcast_to(inicio[:, 0], (n_cenarios,))
+    clientes_iniciais = np.broadcast_to(coluna("clientes_iniciais")[:, 0], (n_cenarios,))
+    por_psicologo = coluna("clientes_por_psicologo")[:, 0]
+    capacidade = coluna("capacidade_psicologo")[:, 0]
+    churn = None if churn is None else np.asarray(churn)
+
+    clientes = np.zeros((n_cenarios, len(meses)), dtype=np.int64)
+    dinamicos = np.zeros((n_cenarios, len(meses)), dtype=np.int64)
+    c = np.broadcast_to(np.asarray(estado.clientes, dtype=np.int64), (n_cenarios,)).copy()
+    n = np.broadcast_to(np.asarray(estado.psicologos_dinamicos, dtype=np.int64), (n_cenarios,)).copy()
+    for i, mes in enumerate(meses):
+        saem = rng.binomial(c, churn) if churn is not None else 0
+        c = np.where(mes == inicio, clientes_iniciais, np.where(mes > inicio, c - saem + crescimento_mensal[:, i], 0))
+        novo_n = np.where(c > n * capacidade, c // capacidade + 1, n)
+        c = np.where(mes == inicio, c + (novo_n - n) * por_psicologo, c)
+        n = novo_n
+        clientes[:, i] = c
+        dinamicos[:, i] = n
+    return clientes, dinamicos
+
+
+# =========================
+# Saída tabular (em blocos)
+# =========================
+# colunas de fluxo (valor do período), de estoque (posição no fim do período)
+# e acumuladas (com o fluxo que as alimenta) da tabela de projeção
+COLUNAS_FLUXO = [
+    "Sessões",
+    "Custo Operacional (R$)",
+    "Pagamento Investidor (mês) (R$)",
+    "Pagamento PRONAMPE (mês) (R$)",
+    "Pagamento BB Giro 1 (mês) (R$)",
+    "Pagamento BB Giro 2 (mês) (R$)",
+    "Custo Fixo Total (R$)",
+    "Faturamento (R$)",
+    "Lucro (R$)",
+]
+COLUNAS_ESTOQUE = ["Clientes", "Psicólogos", "Salas Usadas"]
+COLUNAS_ACUMULADAS = {
+    "Montante de Saúde (R$)": "Lucro (R$)",
+    "Investidor (acum) (R$)": "Pagamento Investidor (mês) (R$)",
+    "PRONAMPE (acum) (R$)": "Pagamento PRONAMPE (mês) (R$)",
+    "BB Giro 1 (acum) (R$)": "Pagamento BB Giro 1 (mês) (R$)",
+    "BB Giro 2 (acum) (R$)": "Pagamento BB Giro 2 (mês) (R$)",
+}
+
+RESOLUCOES = ("Mensal", "Semanal")
+TAMANHO_BLOCO_PADRAO = 120  # meses por bloco
+
+
+def tabela_projecao(r: dict) -> pd.DataFrame:
+    """Resultado de `projetar_lote` com um único cenário -> tabela exibida no app."""
+    meses = r["meses"]
+
+    def serie(nome):
+        return np.broadcast_to(r[nome], (1, len(meses)))[0]
+
+    return pd.DataFrame(
+        {
+            "Mês": meses,
+            "Clientes": serie("clientes"),
+            "Psicólogos": serie("psicologos"),
+            "Salas Usadas": serie("salas"),
+            "Sessões": serie("sessoes"),
+            "Custo Operacional (R$)": np.round(serie("operacional"), 2),
+            "Pagamento Investidor (mês) (R$)": np.round(serie("investidor"), 2),
+            "Pagamento PRONAMPE (mês) (R$)": np.round(serie("pronampe"), 2),
+            "Pagamento BB Giro 1 (mês) (R$)": np.round(serie("bb1"), 2),
+            "Pagamento BB Giro 2 (mês) (R$)": np.round(serie("bb2"), 2),
+            "Custo Fixo Total (R$)": np.round(serie("custo_fixo"), 2),
+            "Faturamento (R$)": np.round(serie("faturamento"), 2),
+            "Lucro (R$)": np.round(serie("lucro"), 2),
+            "Montante de Saúde (R$)": np.round(serie("montante_saude"), 2),
+            "Investidor (acum) (R$)": np.round(serie("investidor_acum"), 2),
+            "PRONAMPE (acum) (R$)": np.round(serie("pronampe_acum"), 2),
+            "BB Giro 1 (acum) (R$)": np.round(serie("bb1_acum"), 2),
+            "BB Giro 2 (acum) (R$)": np.round(serie("bb2_acum"), 2),
+        }
+    )
+
+
+def simular_projecao(params: ParametrosSimulacao, despesas: "pd.DataFrame | MatrizDespesas") -> pd.DataFrame:
+    """Projeção mês a mês (1..params.max_meses), com as colunas exibidas no app."""
+    return tabela_projecao(projetar_lote(params, despesas))
+
+
+def projetar_em_blocos(
+    params: ParametrosSimulacao,
+    despesas: "pd.DataFrame | MatrizDespesas",
+    tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+    resolucao: str = "Mensal",
+):
+    """
+    Gera a projeção em DataFrames de até `tamanho_bloco` meses cada.
+
+    O estado do fim de cada bloco (`EstadoProjecao`) alimenta o seguinte, então
+    a concatenação dos blocos é igual a `simular_projecao`. Com o DataFrame do
+    banco, cada bloco monta só a sua janela da matriz de despesas, e a memória
+    não cresce com o horizonte. Em resolução "Semanal" cada mês vira
+    `params.semanas` linhas (ver `para_semanal`).
+    """
+    if resolucao not in RESOLUCOES:
+        raise ValueError(f"Resolução desconhecida: {resolucao!r}")
+    tamanho_bloco = max(1, int(tamanho_bloco))
+
+    estado = EstadoProjecao()
+    while estado.mes < params.max_meses:
+        ate_mes = min(estado.mes + tamanho_bloco, params.max_meses)
+        janela = despesas if isinstance(despesas, MatrizDespesas) else MatrizDespesas(despesas, ate_mes, estado.mes + 1)
+        r = projetar_lote(params, janela, estado=estado, ate_mes=ate_mes)
+        bloco = tabela_projecao(r)
+        yield para_semanal(bloco, params.semanas) if resolucao == "Semanal" else bloco
+        estado = r["estado"]
+
+
+def para_semanal(bloco: pd.DataFrame, semanas_por_mes: int) -> pd.DataFrame:
+    """
+    Abre cada mês em `semanas_por_mes` linhas: fluxos são divididos igualmente
+    entre as semanas, estoques se repetem e os acumulados crescem semana a
+    semana até o valor de fim de mês.
+    """
+    k = max(1, int(semanas_por_mes))
+    semanal = bloco.loc[bloco.index.repeat(k)].reset_index(drop=True)
+    fracao = np.tile(np.arange(1, k + 1) / k, len(bloco))
+
+    for col in COLUNAS_FLUXO:
+        semanal[col] = np.round(semanal[col] / k, 2)
+    for col, fluxo in COLUNAS_ACUMULADAS.items():
+        # valor no fim da semana = fim do mês - parte do fluxo que ainda falta
+        falta = bloco[fluxo].to_numpy().repeat(k) * (1 - fracao)
+        semanal[col] = np.round(semanal[col] - falta, 2)
+
+    semanal.insert(0, "Semana", (semanal["Mês"] - 1) * k + np.tile(np.arange(1, k + 1), len(bloco)))
+    return semanal
+
+
+def resumo_anual(bloco: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por ano: fluxos somados, estoques e acumulados do fim do ano.
+
+    Funciona em blocos mensais ou semanais; para concatenar resumos de vários
+    blocos, os blocos devem começar em mês 1 + 12k (ex.: blocos de 120 meses).
+    """
+    ano = ((bloco["Mês"] - 1) // 12 + 1).rename("Ano")
+    agregacoes = {col: "sum" for col in COLUNAS_FLUXO}
+    agregacoes.update({col: "last" for col in [*COLUNAS_ESTOQUE, *COLUNAS_ACUMULADAS]})
+    anual = bloco.groupby(ano).agg(agregacoes).reset_index()
+    return anual[["Ano", *COLUNAS_ESTOQUE, *COLUNAS_FLUXO, *COLUNAS_ACUMULADAS]].round(2)
+
+
+# =========================
+# Projeção incremental
+# =========================
+# só entram na conta a partir do 1º mês de operação (antes dele não há
+# clientes, sessões, salas nem psicólogos)
+PARAMETROS_DA_OPERACAO = {
+    "valor_sessao",
+    "porcent_clinica",
+    "base_imposto",
+    "porcent_imposto",
+    "clientes_iniciais",
+    "profissionais",
+    "dias_uteis",
+    "semanas",
+    "horas_dia",
+    "num_salas",
+    "clientes_crescimento",
+    "clientes_por_psicologo",
+    "capacidade_psicologo",
+}
+# não mudam diretamente nenhum mês: investidor_inicio_mes age pelos custos
+# (comparados mês a mês), investimento_inicial_saude só desloca o montante e
+# max_meses só muda até onde a projeção vai
+PARAMETROS_FORA_DOS_MESES = {"investidor_inicio_mes", "investimento_inicial_saude", "max_meses"}
+NOMES_CUSTOS = ("operacional", "pronampe", "bb1", "bb2", "investidor")
+
+
+def primeiro_mes_afetado(
+    antigo: ParametrosSimulacao,
+    novo: ParametrosSimulacao,
+    custos_antigos: dict[str, np.ndarray],
+    custos_novos: dict[str, np.ndarray],
+) -> int:
+    """
+    Primeiro mês cuja projeção muda ao passar de `antigo` para `novo`
+    (parâmetros e custos de `custos_por_mes` de cada um). Se nada muda nos
+    meses em comum, retorna o mês seguinte ao último deles.
+    """
+    n = min(antigo.max_meses, novo.max_meses)
+    mes = n + 1
+    for nome in NOMES_CUSTOS:
+        diferentes = np.flatnonzero(custos_antigos[nome][:n] != custos_novos[nome][:n])
+        if len(diferentes):
+            mes = min(mes, int(diferentes[0]) + 1)
+
+    for campo in fields(ParametrosSimulacao):
+        a, b = getattr(antigo, campo.name), getattr(novo, campo.name)
+        if a == b or campo.name in PARAMETROS_FORA_DOS_MESES:
+            continue
+        if campo.name in PARAMETROS_DA_OPERACAO:
+            mes = min(mes, antigo.meses_sem_funcionar + 1)
+        elif campo.name == "meses_sem_funcionar":
+            mes = min(mes, min(a, b) + 1)
+        else:
+            mes = 1  # parâmetro sem regra: recalcula tudo
+    return max(mes, 1)
+
+
+def _por_mes(r: dict) -> dict[str, np.ndarray]:
+    # resultado de `projetar_lote` com um cenário -> um array 1-D por série (sem o estado)
+    n = len(r["meses"])
+    return {nome: np.broadcast_to(valores, (1, n))[0].copy() for nome, valores in r.items() if nome != "estado"}
+
+
+class ProjecaoIncremental:
+    """
+    Projeção de um cenário que, a cada chamada, só recalcula a partir do
+    primeiro mês afetado pelo que mudou desde a chamada anterior.
+
+    Guarda as séries mês a mês da última projeção; o `EstadoProjecao` do fim
+    de qualquer mês sai delas (`estado_no_mes`), então todo mês serve de
+    ponto de retomada. Ex.: uma despesa nova com mes_inicio 40 reaproveita os
+    meses 1..39, e trocar só o investimento inicial não projeta mês nenhum.
+    Feita para uma sessão interativa: uma instância por sessão, sem variações
+    por cenário.
+    """
+
+    def __init__(self):
+        self._params = None
+        self._custos = None
+        self._series = None
+        self.ultimo_recalculo = None  # {"desde_mes", "meses_recalculados", "meses"}
+
+    def estado_no_mes(self, mes: int) -> EstadoProjecao:
+        if mes == 0:
+            return EstadoProjecao()
+        i = mes - 1
+        return EstadoProjecao(
+            mes=mes,
+            clientes=self._series["clientes"][i],
+            psicologos_dinamicos=self._series["psicologos_dinamicos"][i],
+            lucro_acumulado=self._series["lucro_acumulado"][i],
+            **{f"{nome}_acum": self._series[f"{nome}_acum"][i] for nome in ("investidor", "pronampe", "bb1", "bb2")},
+        )
+
+    def projetar(self, params: ParametrosSimulacao, despesas: "pd.DataFrame | MatrizDespesas") -> dict[str, np.ndarray]:
+        """Mesmo resultado de `projetar_lote(params, despesas)`, com uma série 1-D por nome."""
+        matriz = _como_matriz(despesas, params.max_meses)
+        custos = custos_por_mes(matriz, params.max_meses, params.investidor_inicio_mes)
+
+        reaproveitar = 0
+        if self._series is not None:
+            reaproveitar = min(primeiro_mes_afetado(self._params, params, self._custos, custos) - 1, params.max_meses)
+        series = {nome: valores[:reaproveitar] for nome, valores in self._series.items()} if reaproveitar else None
+
+        if reaproveitar < params.max_meses:
+            novas = _por_mes(projetar_lote(params, matriz, estado=self.estado_no_mes(reaproveitar)))
+            series = novas if series is None else {nome: np.concatenate([series[nome], novas[nome]]) for nome in novas}
+        series["montante_saude"] = params.investimento_inicial_saude + series["lucro_acumulado"]
+
+        self._params, self._custos, self._series = params, custos, series
+        self.ultimo_recalculo = {
+            "desde_mes": reaproveitar + 1,
+            "meses_recalculados": params.max_meses - reaproveitar,
+            "meses": params.max_meses,
+        }
+        return {**series, "estado": self.estado_no_mes(params.max_meses)}
+
+    def em_blocos(
+        self,
+        params: ParametrosSimulacao,
+        despesas: "pd.DataFrame | MatrizDespesas",
+        tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+        resolucao: str = "Mensal",
+    ):
+        """Os mesmos blocos de `projetar_em_blocos`, fatiados da projeção incremental."""
+        if resolucao not in RESOLUCOES:
+            raise ValueError(f"Resolução desconhecida: {resolucao!r}")
+        tamanho_bloco = max(1, int(tamanho_bloco))
+
+        r = self.projetar(params, despesas)
+        for inicio in range(0, params.max_meses, tamanho_bloco):
+            bloco = tabela_projecao({nome: valores[inicio:inicio + tamanho_bloco] for nome, valores in r.items() if nome != "estado"})
+            yield para_semanal(bloco, params.semanas) if resolucao == "Semanal" else bloco
+
+
+# =========================
+# Salários
+# =========================
+def salarios_por_mes(profissionais, lucro, porcent_imposto) -> np.ndarray:
+    """
+    Salário de cada profissional em cada mês, em (profissional × mês): fixo
+    (sessões × valor, menos o imposto) + participação no lucro positivo do mês.
+    """
+    equipe = _equipe(profissionais)
+    fixo = equipe["salario_fixo_bruto"] * (1 - porcent_imposto)
+    return fixo[:, None] + equipe["participacao_lucro"][:, None] * np.maximum(np.asarray(lucro, dtype=float), 0)
+
+
+def tabela_salarios(params: ParametrosSimulacao, lucro_mensal: pd.DataFrame) -> pd.DataFrame:
+    """Colunas "Mês" e "Lucro (R$)" + uma coluna de salário por profissional."""
+    salarios = salarios_por_mes(params.profissionais, lucro_mensal["Lucro (R$)"], params.porcent_imposto)
+    colunas = {f"Salário {p.nome} (R$)": np.round(salarios[i], 2) for i, p in enumerate(params.profissionais)}
+    return pd.concat(
+        [lucro_mensal[["Mês", "Lucro (R$)"]].reset_index(drop=True), pd.DataFrame(colunas)],
+        axis=1,
+    )
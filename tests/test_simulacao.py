@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from simulacao import custos_por_mes
+
+
+def despesas():
+    return pd.DataFrame({
+        "nome": ["ALUGUEL", "INVESTIDOR"],
+        "valor": [1000.0, 500.0],
+        "mes_inicio": [1, 1],
+        "duracao_meses": [None, None],
+    })
+
+
+def test_custos_por_mes_investidor_escalar():
+    # o app lê os custos do mês 1 com custos_por_mes(despesas, 1, investidor_inicio_mes)
+    custos = custos_por_mes(despesas(), 1, 1)
+    assert custos["investidor"].shape == (1,)
+    assert custos["investidor"][0] == 500.0
+    assert custos["custo_fixo"][0] == 1500.0
+
+    custos = custos_por_mes(despesas(), 3, 3)
+    assert custos["investidor"].tolist() == [0.0, 0.0, 500.0]
+
+
+def test_custos_por_mes_investidor_por_cenario():
+    custos = custos_por_mes(despesas(), 3, np.array([1, 3]))
+    assert custos["investidor"].tolist() == [[500.0, 500.0, 500.0], [0.0, 0.0, 500.0]]
+    assert custos["custo_fixo"].shape == (2, 3)
@@ -0,0 +1,110 @@
+"""
+Varredura de parâmetros da simulação.
+
+Declara faixas de valores para qualquer subconjunto dos campos de
+`ParametrosSimulacao` e avalia a grade cartesiana completa em blocos
+vetorizados (e, para grades grandes, em vários processos). Cada ponto vira
+uma linha compacta com mês de breakeven, montante final e caixa mínimo.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+import numpy as np
+import pandas as pd
+
+from simulacao import MatrizDespesas, ParametrosSimulacao, projetar_lote
+
+# campos numéricos que podem ser varridos (rótulos usados no app)
+PARAMETROS_VARREDURA = {
+    "valor_sessao": "Valor da sessão (R$)",
+    "porcent_clinica": "% da sessão para a clínica",
+    "clientes_crescimento": "Clientes adicionais/mês",
+    "num_salas": "Nº de salas",
+    "capacidade_psicologo": "Capacidade por psicólogo",
+    "clientes_iniciais": "Clientes iniciais",
+    "porcent_imposto": "% de imposto",
+    "meses_sem_funcionar": "Meses antes de operar",
+    "investidor_inicio_mes": "Mês de início do investidor",
+}
+
+_CAMPOS_INTEIROS = {f.name for f in fields(ParametrosSimulacao) if f.type is int or f.type == "int"}
+
+
+def tamanho_grade(faixas: dict) -> int:
+    return int(np.prod([len(v) for v in faixas.values()])) if faixas else 1
+
+
+def pontos_da_grade(faixas: dict, inicio: int, fim: int) -> dict[str, np.ndarray]:
+    """Valores dos parâmetros para os pontos [inicio, fim) da grade, sem materializar a grade toda."""
+    nomes = list(faixas)
+    valores = [_valores_do_campo(nome, faixas[nome]) for nome in nomes]
+    indices = np.unravel_index(np.arange(inicio, fim), [len(v) for v in valores])
+    return {nome: valores[k][indices[k]] for k, nome in enumerate(nomes)}
+
+
+def resumir_lote(r: dict, alvo: float) -> dict[str, np.ndarray]:
+    montante = r["montante_saude"]
+    atingiu = montante >= alvo
+    mes_breakeven = np.where(atingiu.any(axis=1), atingiu.argmax(axis=1) + 1, np.nan)
+    return {
+        "mes_breakeven": mes_breakeven.astype(np.float32),  # NaN = não atingido
+        "montante_final": montante[:, -1].astype(np.float32),
+        "caixa_minimo": montante.min(axis=1).astype(np.float32),
+    }
+
+
+def varrer_em_blocos(
+    params: ParametrosSimulacao,
+    despesas: "pd.DataFrame | MatrizDespesas",
+    faixas: dict,
+    alvo: float,
+    tamanho_bloco: int = 20_000,
+    processos: int = 1,
+):
+    """Gera DataFrames (um por bloco de pontos da grade), na ordem da grade."""
+    matriz = despesas if isinstance(despesas, MatrizDespesas) else MatrizDespesas(despesas, params.max_meses)
+    total = tamanho_grade(faixas)
+    limites = [(i, min(i + tamanho_bloco, total)) for i in range(0, total, tamanho_bloco)]
+
+    if processos <= 1 or len(limites) == 1:
+        for inicio, fim in limites:
+            yield _avaliar_bloco(params, matriz, faixas, alvo, inicio, fim)
+        return
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        n = len(limites)
+        yield from executor.map(
+            _avaliar_bloco,
+            [params] * n,
+            [matriz] * n,
+            [faixas] * n,
+            [alvo] * n,
+            [a for a, _ in limites],
+            [b for _, b in limites],
+        )
+
+
+def executar_varredura(params, despesas, faixas, alvo, tamanho_bloco=20_000, processos=1) -> pd.DataFrame:
+    blocos = list(varrer_em_blocos(params, despesas, faixas, alvo, tamanho_bloco, processos))
+    return pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame()
+
+
+def mapa_calor(resultado: pd.DataFrame, eixo_x: str, eixo_y: str, metrica: str, agregacao: str = "median") -> pd.DataFrame:
+    """
+    Tabela (eixo_y × eixo_x) da métrica, pronta para heatmap. Se a grade tiver
+    outros parâmetros além dos dois eixos, eles são resumidos por `agregacao`.
+    """
+    return resultado.pivot_table(index=eixo_y, columns=eixo_x, values=metrica, aggfunc=agregacao, dropna=False)
+
+
+def _valores_do_campo(nome, valores):
+    if nome not in PARAMETROS_VARREDURA:
+        raise ValueError(f"Parâmetro não pode ser varrido: {nome!r}")
+    valores = np.asarray(valores)
+    return np.rint(valores).astype(np.int32) if nome in _CAMPOS_INTEIROS else valores.astype(float)
+
+
+def _avaliar_bloco(params, matriz, faixas, alvo, inicio, fim) -> pd.DataFrame:
+    pontos = pontos_da_grade(faixas, inicio, fim)
+    r = projetar_lote(params, matriz, variacoes=pontos)
+    return pd.DataFrame({**pontos, **resumir_lote(r, alvo)})
@@ -0,0 +1,121 @@
+"""
+Confere, com EXPLAIN, se as consultas quentes usam os índices esperados.
+
+Para cada consulta mostra o plano (tipo de acesso, índice escolhido, linhas
+estimadas) e o tempo mediano de execução. Sai com código 1 se algum índice
+esperado nem aparece entre os candidatos (`possible_keys`), o que indica
+índice faltando ou consulta escrita de um jeito que não o aproveita.
+
+Com tabelas pequenas o MySQL pode preferir varrer a tabela mesmo com o índice
+disponível; por isso "usado" é informativo e só "disponível" reprova.
+
+Só para o backend MySQL (o formato do EXPLAIN é o do MySQL).
+
+Uso:
+    python verificar_indices.py [--repeticoes 20]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from functions import (
+    SQL_CONTAR_POR_STATUS,
+    SQL_PROGRESSO_POR_CATEGORIA,
+    dialeto,
+    get_mysql_conn,
+    sql_tarefas_do_responsavel,
+    sql_tarefas_pagina,
+)
+from migracoes import garantir_schema
+
+# (descrição, SQL, parâmetros, índices aceitos). Os SQLs são os mesmos que as
+# funções de functions.py executam, então o plano conferido é o de produção.
+CONSULTAS_QUENTES = [
+    (
+        "Tarefas: contagem por status",
+        SQL_CONTAR_POR_STATUS,
+        (),
+        {"idx_plano_status_prazo", "idx_plano_categoria_status_prazo"},
+    ),
+    (
+        "Tarefas: progresso por categoria",
+        SQL_PROGRESSO_POR_CATEGORIA,
+        (),
+        {"idx_plano_categoria_status_prazo"},
+    ),
+    (
+        "Tarefas: página de uma categoria (sem concluídas)",
+        *sql_tarefas_pagina("Geral", incluir_concluidas=False, limite=25, offset=0),
+        {"idx_plano_categoria_status_prazo"},
+    ),
+    (
+        "Tarefas de um responsável",
+        *sql_tarefas_do_responsavel(1),
+        {"idx_tarefa_responsavel_responsavel"},
+    ),
+]
+
+
+def explicar(cursor, sql, params) -> list[dict]:
+    cursor.execute(f"EXPLAIN {sql}", params)
+    return cursor.fetchall()
+
+
+def cronometrar(cursor, sql, params, repeticoes) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def verificar_planos(repeticoes: int = 20) -> pd.DataFrame:
+    """Uma linha por consulta quente com o plano da tabela principal e o tempo mediano (ms)."""
+    linhas = []
+    with get_mysql_conn() as conn:
+        with conn.cursor() as cursor:
+            for descricao, sql, params, aceitos in CONSULTAS_QUENTES:
+                plano = explicar(cursor, sql, params)
+                # a linha do plano que deveria usar um dos índices aceitos
+                candidatos = [p for p in plano if set((p.get("possible_keys") or "").split(",")) & aceitos]
+                principal = (candidatos or plano)[0]
+                possiveis = set((principal.get("possible_keys") or "").split(","))
+                linhas.append({
+                    "consulta": descricao,
+                    "tabela": principal.get("table"),
+                    "tipo": principal.get("type"),
+                    "indice": principal.get("key"),
+                    "linhas_estimadas": principal.get("rows"),
+                    "disponivel": bool(possiveis & aceitos),
+                    "usado": principal.get("key") in aceitos,
+                    "tempo_ms": round(cronometrar(cursor, sql, params, repeticoes), 3),
+                })
+    return pd.DataFrame(linhas)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Confere os planos (EXPLAIN) das consultas quentes.")
+    parser.add_argument("--repeticoes", type=int, default=20, help="execuções por consulta para o tempo mediano")
+    args = parser.parse_args(argv)
+
+    if dialeto().nome != "mysql":
+        print(f"verificar_indices só funciona com o MySQL (backend atual: {dialeto().nome}).")
+        return 2
+    garantir_schema()
+    resultado = verificar_planos(args.repeticoes)
+    print(resultado.to_string(index=False))
+
+    faltando = resultado[~resultado["disponivel"]]
+    if not faltando.empty:
+        print(f"\n{len(faltando)} consulta(s) sem o índice esperado: {', '.join(faltando['consulta'])}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())